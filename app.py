@@ -1,31 +1,83 @@
 #!/usr/bin/env python
+import sys
 import typer
-from datetime import date
+from time import perf_counter
+from datetime import date, timedelta
+from typing import Callable, List, Optional
 from typing_extensions import Annotated
 from database import Database
-from constants import InfoText, Event, Format, File
+from constants import (
+    Backup,
+    InfoText,
+    Event,
+    Format,
+    File,
+    Hooks,
+    Metrics,
+    Notify,
+    Page,
+)
 from timer import Timer
+from storage import open_storage
+from codec import TimeStamp, format_date, parse_date
+from archive import update_archive
+from sync import BundleError, export_bundle, import_bundle
+from doctor import RowIdSpool, check
+from metrics import recorder
+from complete import complete_dates, complete_entries, complete_ids
 from rich import print
 from utility import (
     output_with_timestamp,
     db_file_existing,
     output_week,
     output_day,
+    output_entries,
+    output_report,
+    output_projects,
+    output_periods,
+    output_issue,
+    check_label,
+    archive_file_existing,
+    read_lines,
+    format_balance,
     check_correct_date_format,
-    remove_time_from_date_time,
 )
 
 
 app = typer.Typer()
+sync_app = typer.Typer(help=InfoText.HELP_SYNC)
+app.add_typer(sync_app, name="sync")
+
+
+@app.callback()
+def main(ctx: typer.Context):
+    # opt-in with PTYMER_METRICS, nothing is measured otherwise
+    if recorder:
+        started = perf_counter()
+        # only the queries of the long-running commands are counted
+        timed = ctx.invoked_subcommand not in Metrics.UNTIMED
+        ctx.call_on_close(
+            lambda: recorder.record(
+                ctx.invoked_subcommand, perf_counter() - started if timed else None
+            )
+        )
 
 
 @app.command()
-def start(delta: Annotated[int, typer.Option(help=InfoText.HELP_DELTA)] = 0):
-    db = Database(File.NAME)
+def start(
+    delta: Annotated[int, typer.Option(help=InfoText.HELP_DELTA)] = 0,
+    project: Annotated[Optional[str], typer.Option(help=InfoText.HELP_PROJECT)] = None,
+    tag: Annotated[Optional[List[str]], typer.Option(help=InfoText.HELP_TAG)] = None,
+):
+    tags = tag or []
+    if not all(map(check_label, [project or "-", *tags])):
+        print(f"{InfoText.WARN_SYMBOL} {InfoText.WARN_LABEL}")
+        return
+    db = open_storage(File.NAME)
     timer = Timer(db)
     if timer.check_state_allowed(Event.START):
         try:
-            timer.create_timestamp(Event.START, delta)
+            timer.create_timestamp(Event.START, delta, project, tags)
         except Exception:
             print(InfoText.WARN_COLLISON)
             return
@@ -40,7 +92,7 @@ def stop(delta: Annotated[int, typer.Option(help=InfoText.HELP_DELTA)] = 0):
     if not db_file_existing():
         print(f"{InfoText.WARN_SYMBOL} No session started, yet")
         return
-    db = Database(File.NAME)
+    db = open_storage(File.NAME)
     timer = Timer(db)
     if timer.check_state_allowed(Event.STOP):
         try:
@@ -48,7 +100,7 @@ def stop(delta: Annotated[int, typer.Option(help=InfoText.HELP_DELTA)] = 0):
         except Exception:
             print(InfoText.WARN_COLLISON)
             return
-        duration = timer.calc_worktime()
+        duration = timer.calc_closed_worktime()
         output_with_timestamp(f"Worked for {duration} hours", delta)
     else:
         print(f"{InfoText.WARN_SYMBOL} Session already stopped.")
@@ -60,7 +112,7 @@ def show():
     if not db_file_existing():
         print(f"{InfoText.WARN_SYMBOL} No data to show")
         return
-    db = Database(File.NAME)
+    db = open_storage(File.NAME)
     if not db.get_last_event():
         print(f"{InfoText.WARN_SYMBOL} No session existing for today, yet")
         return
@@ -78,13 +130,18 @@ def show():
 
 
 @app.command()
-def week():
+def week(
+    project: Annotated[
+        Optional[str], typer.Option(help=InfoText.HELP_FILTER_PROJECT)
+    ] = None,
+    offset: Annotated[int, typer.Option(help=InfoText.HELP_OFFSET)] = 0,
+):
     if not db_file_existing():
         print(f"{InfoText.WARN_SYMBOL} No data to show")
         return
-    db = Database(File.NAME)
+    db = open_storage(File.NAME)
     timer = Timer(db)
-    week_durations = timer.calc_week()
+    week_durations = timer.calc_week(project, offset)
     if week_durations:
         output_week(week_durations)
     else:
@@ -92,52 +149,478 @@ def week():
     timer.db.close()
 
 
+@app.command(help=InfoText.HELP_MONTH)
+def month(
+    offset: Annotated[int, typer.Option(help=InfoText.HELP_OFFSET)] = 0,
+    project: Annotated[
+        Optional[str], typer.Option(help=InfoText.HELP_FILTER_PROJECT)
+    ] = None,
+    tag: Annotated[Optional[str], typer.Option(help=InfoText.HELP_FILTER_TAG)] = None,
+):
+    _output_period(lambda timer: timer.calc_month(offset, project, tag), "Week")
+
+
+@app.command(help=InfoText.HELP_YEAR)
+def year(
+    offset: Annotated[int, typer.Option(help=InfoText.HELP_OFFSET)] = 0,
+    project: Annotated[
+        Optional[str], typer.Option(help=InfoText.HELP_FILTER_PROJECT)
+    ] = None,
+    tag: Annotated[Optional[str], typer.Option(help=InfoText.HELP_FILTER_TAG)] = None,
+):
+    _output_period(lambda timer: timer.calc_year(offset, project, tag), "Month")
+
+
+@app.command(help=InfoText.HELP_BALANCE)
+def balance():
+    if not db_file_existing():
+        print(f"{InfoText.WARN_SYMBOL} No data to show")
+        return
+    db = open_storage(File.NAME)
+    timer = Timer(db)
+    balance_ = timer.calc_balance()
+    print(
+        f"{InfoText.CONFIRM_SYMBOL} Overtime balance: {format_balance(balance_)} hours"
+    )
+    timer.db.close()
+
+
+@app.command(help=InfoText.HELP_BACKUP)
+def backup(
+    directory: Annotated[
+        str, typer.Argument(help=InfoText.HELP_BACKUP_DIRECTORY)
+    ] = Backup.DIRECTORY,
+    keep: Annotated[int, typer.Option(help=InfoText.HELP_KEEP)] = Backup.KEEP,
+):
+    if not db_file_existing():
+        print(f"{InfoText.WARN_SYMBOL} No data to show")
+        return
+    db = open_storage(File.NAME)
+    if not isinstance(db, Database):
+        print(f"{InfoText.WARN_SYMBOL} {InfoText.WARN_BACKUP_ENGINE}")
+        db.close()
+        return
+    # the long-running and rarely used commands import their modules themselves, every other command starts faster
+    from backup import BackupError, backup_database
+
+    try:
+        snapshot = backup_database(db, directory, keep)
+    except BackupError as e:
+        print(f"{InfoText.WARN_SYMBOL} {e}")
+        return
+    finally:
+        db.close()
+    if snapshot.file:
+        print(
+            f"{InfoText.CONFIRM_SYMBOL} Snapshot {snapshot.file} written, {snapshot.pages} pages checked."
+        )
+    else:
+        print(f"{InfoText.CONFIRM_SYMBOL} No changes since the latest snapshot.")
+    if snapshot.removed:
+        print(
+            f"{InfoText.CONFIRM_SYMBOL} Removed {len(snapshot.removed)} old snapshot(s)."
+        )
+
+
+@app.command(help=InfoText.HELP_ARCHIVE)
+def archive():
+    if not db_file_existing():
+        print(f"{InfoText.WARN_SYMBOL} No data to show")
+        return
+    db = open_storage(File.NAME)
+    if not isinstance(db, Database):
+        print(f"{InfoText.WARN_SYMBOL} {InfoText.WARN_ARCHIVE_ENGINE}")
+        db.close()
+        return
+    archive_ = update_archive(db, File.ARCHIVE)
+    print(
+        f"{InfoText.CONFIRM_SYMBOL} Archived {len(archive_.days)} days until {archive_.until}."
+    )
+    archive_.close()
+    db.close()
+
+
+@app.command(help=InfoText.HELP_REPORT)
+def report(
+    from_: Annotated[
+        str, typer.Argument(metavar="FROM", autocompletion=complete_dates)
+    ],
+    to: Annotated[str, typer.Argument(autocompletion=complete_dates)] = format_date(
+        date.today()
+    ),
+    project: Annotated[
+        Optional[str], typer.Option(help=InfoText.HELP_FILTER_PROJECT)
+    ] = None,
+    tag: Annotated[Optional[str], typer.Option(help=InfoText.HELP_FILTER_TAG)] = None,
+    by_project: Annotated[bool, typer.Option(help=InfoText.HELP_BY_PROJECT)] = False,
+):
+    for date_ in (from_, to):
+        if not check_correct_date_format(date_, Format.DATE):
+            print(f"{InfoText.WARN_SYMBOL} Incorrect date format. Use: YYYY-MM-DD")
+            return
+    if not db_file_existing():
+        print(f"{InfoText.WARN_SYMBOL} No data to show")
+        return
+    db = open_storage(File.NAME)
+    timer = Timer(db)
+    start, end = parse_date(from_), parse_date(to)
+    if by_project:
+        totals = timer.calc_project_totals(start, end, project, tag)
+        if totals:
+            output_projects(totals)
+        else:
+            print(f"{InfoText.WARN_SYMBOL} No data to show")
+        timer.db.close()
+        return
+    archive_ = None
+    if project is not None or tag is not None:
+        durations = timer.calc_labelled_days(start, end, project, tag)
+    else:
+        if isinstance(db, Database) and archive_file_existing():
+            archive_ = update_archive(db, File.ARCHIVE)
+        durations = timer.calc_range(start, end, archive_)
+    if durations:
+        output_report(durations)
+    else:
+        print(f"{InfoText.WARN_SYMBOL} No data to show")
+    if archive_:
+        archive_.close()
+    timer.db.close()
+
+
 @app.command()
 def timestamps(
-    date_: Annotated[str, typer.Argument()] = date.today().strftime(Format.DATE),
+    date_: Annotated[str, typer.Argument(autocompletion=complete_dates)] = format_date(
+        date.today()
+    ),
+    project: Annotated[
+        Optional[str], typer.Option(help=InfoText.HELP_FILTER_PROJECT)
+    ] = None,
+    from_: Annotated[
+        Optional[str],
+        typer.Option(
+            "--from", help=InfoText.HELP_LIST_FROM, autocompletion=complete_dates
+        ),
+    ] = None,
+    to: Annotated[
+        Optional[str],
+        typer.Option(help=InfoText.HELP_LIST_TO, autocompletion=complete_dates),
+    ] = None,
+    limit: Annotated[Optional[int], typer.Option(help=InfoText.HELP_LIMIT)] = None,
+    after: Annotated[Optional[int], typer.Option(help=InfoText.HELP_AFTER)] = None,
 ):
+    if from_ is not None:
+        _page_timestamps(from_, to or format_date(date.today()), project, limit, after)
+        return
     if not check_correct_date_format(date_, Format.DATE):
         print(f"{InfoText.WARN_SYMBOL} Incorrect date format. Use: YYYY-MM-DD")
         return
     if not db_file_existing():
         print(f"{InfoText.WARN_SYMBOL} No data to show")
         return
-    db = Database(File.NAME)
-    entries = db.get_data_by_date(date_)
+    db = open_storage(File.NAME)
+    if project is None:
+        entries = db.get_data_by_date(date_)
+    else:
+        entries = db.get_session_data(date_, project)
     if entries:
         output_day(entries)
     else:
         print(f"{InfoText.WARN_SYMBOL} No entries for today")
 
 
+def _page_timestamps(
+    start: str,
+    end: str,
+    project: Optional[str],
+    limit: Optional[int],
+    after: Optional[int],
+) -> None:
+    for date_ in (start, end):
+        if not check_correct_date_format(date_, Format.DATE):
+            print(f"{InfoText.WARN_SYMBOL} Incorrect date format. Use: YYYY-MM-DD")
+            return
+    if project is not None:
+        print(f"{InfoText.WARN_SYMBOL} {InfoText.WARN_PAGE_PROJECT}")
+        return
+    if not db_file_existing():
+        print(f"{InfoText.WARN_SYMBOL} No data to show")
+        return
+    db = open_storage(File.NAME)
+    size = limit or Page.SIZE
+    shown = 0
+    while True:
+        # one extra row tells whether another page follows
+        rows = db.get_timestamp_page(start, end, size + 1, after)
+        page = rows[:size]
+        if page:
+            output_entries([(row_id, time, event) for row_id, _, time, event in page])
+            shown += len(page)
+            after = page[-1][0]
+        if len(rows) <= size:
+            break
+        if limit:
+            print(f"More timestamps with: --after {after}")
+            break
+        if sys.stdout.isatty() and not typer.confirm("Next page?", default=True):
+            break
+    if not shown:
+        print(f"{InfoText.WARN_SYMBOL} No entries for the range")
+    db.close()
+
+
 @app.command()
-def delete(rowid: int):
+def delete(
+    rowids: Annotated[
+        Optional[List[int]], typer.Argument(autocompletion=complete_ids)
+    ] = None,
+    file: Annotated[Optional[str], typer.Option(help=InfoText.HELP_ROWIDS_FILE)] = None,
+    from_: Annotated[
+        Optional[str],
+        typer.Option("--from", help=InfoText.HELP_FROM, autocompletion=complete_dates),
+    ] = None,
+    to: Annotated[
+        Optional[str],
+        typer.Option(help=InfoText.HELP_TO, autocompletion=complete_dates),
+    ] = None,
+    dry_run: Annotated[bool, typer.Option(help=InfoText.HELP_DRY_RUN)] = False,
+):
+    rowids = list(rowids or [])
+    if file:
+        try:
+            rowids += [int(line) for line in read_lines(file)]
+        except (OSError, ValueError):
+            print(f"{InfoText.WARN_SYMBOL} Couldn't read timestamp ids from {file}")
+            return
+    to = to or from_
+    for date_ in (from_, to):
+        if date_ and not check_correct_date_format(date_, Format.DATE):
+            print(f"{InfoText.WARN_SYMBOL} Incorrect date format. Use: YYYY-MM-DD")
+            return
+    if not rowids and not from_:
+        print(f"{InfoText.WARN_SYMBOL} No timestamps to remove given.")
+        return
     if not db_file_existing():
         print(f"{InfoText.WARN_SYMBOL} No data to show")
         return
-    db = Database(File.NAME)
-    if db.delete_row(rowid):
-        print(f"{InfoText.CONFIRM_SYMBOL} Timestamp successfully removed.")
+    db = open_storage(File.NAME)
+    entries = db.get_rows_by_id(rowids) if rowids else []
+    missing = set(rowids) - {entry.id for entry in entries}
+    if missing:
+        print(
+            f"{InfoText.WARN_SYMBOL} Removal of timestamp not possible, unknown ids: "
+            + ", ".join(map(str, sorted(missing)))
+        )
+        return
+    if from_:
+        entries += [e for e in db.get_data_between(from_, to) if e.id not in rowids]
+    if dry_run:
+        output_entries([(entry.id, entry.time, entry.event) for entry in entries])
+        print(f"{InfoText.WARN_SYMBOL} {InfoText.WARN_DRY_RUN}")
+        return
+    if entries and db.delete_rows([entry.id for entry in entries]):
+        print(f"{InfoText.CONFIRM_SYMBOL} {_count(entries)} successfully removed.")
     else:
         print(f"{InfoText.WARN_SYMBOL} Removal of timestamp not possible.")
 
 
 @app.command()
-def add(date_time: str, event: str):
-    if not check_correct_date_format(date_time, Format.DATETIME):
-        print(
-            f"{InfoText.WARN_SYMBOL} Incorrect timestamp format. Use: YYYY-MM-DD HH:MM:SS"
-        )
+def add(
+    entries: Annotated[
+        Optional[List[str]],
+        typer.Argument(help=InfoText.HELP_ENTRIES, autocompletion=complete_entries),
+    ] = None,
+    file: Annotated[
+        Optional[str], typer.Option(help=InfoText.HELP_ENTRIES_FILE)
+    ] = None,
+    dry_run: Annotated[bool, typer.Option(help=InfoText.HELP_DRY_RUN)] = False,
+):
+    values = list(entries or [])
+    if file:
+        try:
+            for line in read_lines(file):
+                values += line.rsplit(" ", 1)
+        except OSError:
+            print(f"{InfoText.WARN_SYMBOL} Couldn't read timestamps from {file}")
+            return
+    if not values or len(values) % 2:
+        print(f"{InfoText.WARN_SYMBOL} Timestamps need to be given with an event")
+        return
+    rows = []
+    for date_time, event in zip(values[::2], values[1::2]):
+        try:
+            time_stamp = TimeStamp.parse(date_time)
+        except ValueError:
+            print(
+                f"{InfoText.WARN_SYMBOL} Incorrect timestamp format. Use: YYYY-MM-DD HH:MM:SS"
+            )
+            return
+        if event not in ("start", "stop"):
+            print(f"{InfoText.WARN_SYMBOL} Incorrect event")
+            return
+        rows.append((event, time_stamp.time, time_stamp.date))
+    if not db_file_existing():
+        print(f"{InfoText.WARN_SYMBOL} No data to show")
+        return
+    if dry_run:
+        output_entries([("new", date_time, event) for event, date_time, _ in rows])
+        print(f"{InfoText.WARN_SYMBOL} {InfoText.WARN_DRY_RUN}")
+        return
+    db = open_storage(File.NAME)
+    db.write_timestamps(rows)
+    print(f"{InfoText.CONFIRM_SYMBOL} {_count(rows)} successfully added.")
+
+
+@app.command(help=InfoText.HELP_NOTIFY)
+def notify(
+    break_after: Annotated[
+        int, typer.Option(help=InfoText.HELP_BREAK_AFTER)
+    ] = Notify.BREAK_AFTER,
+):
+    from notify import NotifyDaemon, get_notifier
+
+    daemon = NotifyDaemon(File.NAME, get_notifier(), timedelta(minutes=break_after))
+    print(f"{InfoText.CONFIRM_SYMBOL} Watching {File.NAME}, stop with Ctrl+C")
+    try:
+        daemon.run()
+    except KeyboardInterrupt:
+        pass
+
+
+@app.command(help=InfoText.HELP_HOOKS)
+def hooks(
+    url: Annotated[
+        Optional[str], typer.Option(help=InfoText.HELP_HOOK_URL)
+    ] = Hooks.URL,
+    once: Annotated[bool, typer.Option(help=InfoText.HELP_ONCE)] = False,
+):
+    if File.ENGINE != "sqlite":
+        print(f"{InfoText.WARN_SYMBOL} {InfoText.WARN_HOOKS_ENGINE}")
         return
-    if event not in ("start", "stop"):
-        print(f"{InfoText.WARN_SYMBOL} Incorrect event")
+    if not url:
+        print(f"{InfoText.WARN_SYMBOL} {InfoText.WARN_HOOK_URL}")
         return
+    from hooks import HookWorker
+
+    db = Database(File.NAME, user=File.USER)
+    worker = HookWorker(db, url)
+    try:
+        if once:
+            delivered = worker.drain()
+            print(f"{InfoText.CONFIRM_SYMBOL} Delivered {delivered} event(s).")
+        else:
+            print(
+                f"{InfoText.CONFIRM_SYMBOL} Posting events to {url}, stop with Ctrl+C"
+            )
+            worker.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        db.close()
+
+
+@app.command(help=InfoText.HELP_SERVE)
+def serve(
+    host: Annotated[str, typer.Option(help=InfoText.HELP_HOST)] = "127.0.0.1",
+    port: Annotated[int, typer.Option(help=InfoText.HELP_PORT)] = 8765,
+    workers: Annotated[int, typer.Option(help=InfoText.HELP_WORKERS)] = 4,
+):
+    if File.ENGINE != "sqlite":
+        print(f"{InfoText.WARN_SYMBOL} {InfoText.WARN_SERVE_ENGINE}")
+        return
+    from server import ApiServer
+
+    db = Database(File.NAME, shared=True, user=File.USER)
+    server = ApiServer((host, port), db, workers)
+    print(f"{InfoText.CONFIRM_SYMBOL} Serving on http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        db.close()
+
+
+@app.command(help=InfoText.HELP_DOCTOR)
+def doctor(fix: Annotated[bool, typer.Option(help=InfoText.HELP_FIX)] = False):
+    if not db_file_existing():
+        print(f"{InfoText.WARN_SYMBOL} No data to show")
+        return
+    db = open_storage(File.NAME)
+    issues = 0
+    with RowIdSpool() as spool:
+        for issue in check(db.iter_timestamps(), db.date_today):
+            issues += 1
+            output_issue(issue)
+            if issue.fixable:
+                spool.add(issue.row_id)
+        if not issues:
+            print(f"{InfoText.CONFIRM_SYMBOL} No inconsistencies found.")
+        elif fix and spool.count:
+            removed = db.delete_row_batches(spool.batches())
+            print(f"{InfoText.CONFIRM_SYMBOL} Removed {removed} timestamp(s).")
+        else:
+            print(
+                f"{InfoText.WARN_SYMBOL} {issues} issue(s) found, "
+                f"{spool.count} can be fixed with --fix."
+            )
+    db.close()
+
+
+@sync_app.command("export", help=InfoText.HELP_SYNC_EXPORT)
+def sync_export(
+    bundle: str,
+    full: Annotated[bool, typer.Option(help=InfoText.HELP_SYNC_FULL)] = False,
+):
+    if not db_file_existing():
+        print(f"{InfoText.WARN_SYMBOL} No data to show")
+        return
+    db = open_storage(File.NAME)
+    if not isinstance(db, Database):
+        print(f"{InfoText.WARN_SYMBOL} {InfoText.WARN_SYNC_ENGINE}")
+        db.close()
+        return
+    count = export_bundle(db, bundle, full)
+    print(f"{InfoText.CONFIRM_SYMBOL} Exported {count} change(s) to {bundle}.")
+    db.close()
+
+
+@sync_app.command("import", help=InfoText.HELP_SYNC_IMPORT)
+def sync_import(bundle: str):
+    db = open_storage(File.NAME)
+    if not isinstance(db, Database):
+        print(f"{InfoText.WARN_SYMBOL} {InfoText.WARN_SYNC_ENGINE}")
+        db.close()
+        return
+    try:
+        count = import_bundle(db, bundle)
+    except BundleError as e:
+        print(f"{InfoText.WARN_SYMBOL} {e}")
+        return
+    finally:
+        db.close()
+    print(f"{InfoText.CONFIRM_SYMBOL} Applied {count} change(s) from {bundle}.")
+
+
+def _output_period(calc_period: Callable[[Timer], list], name: str) -> None:
     if not db_file_existing():
         print(f"{InfoText.WARN_SYMBOL} No data to show")
         return
-    db = Database(File.NAME)
-    db.write_timestamp(event, date_time, remove_time_from_date_time(date_time))
-    print(f"{InfoText.CONFIRM_SYMBOL} Timestamp successfully added.")
+    db = open_storage(File.NAME)
+    timer = Timer(db)
+    periods = calc_period(timer)
+    if any(days for _, days, _, _ in periods):
+        output_periods(periods, name)
+    else:
+        print(f"{InfoText.WARN_SYMBOL} No data to show")
+    timer.db.close()
+
+
+def _count(entries: list) -> str:
+    if len(entries) == 1:
+        return "Timestamp"
+    return f"{len(entries)} timestamps"
 
 
 if __name__ == "__main__":
@@ -0,0 +1,125 @@
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+from itertools import groupby
+from database import Database
+from codec import from_day, parse_date, parse_datetime, to_day, to_epoch
+
+# Columnar snapshot of all closed days, in native byte order since it is a local cache:
+#   header   magic, version, changelog seq and first day not archived yet, day and session count
+#   days     int32 days since 1970-01-01, sorted
+#   offsets  uint32 index of the first session per day, plus the session count at the end
+#   starts   int64 session starts in seconds since 1970-01-01
+#   stops    int64 session stops, same index as starts
+MAGIC = b"PTYA"
+VERSION = 1
+HEADER = struct.Struct("=4sIqiII4x")
+
+
+class Archive:
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        with open(filename, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self.map)
+        magic, version, self.seq, until, n_days, n_sessions = HEADER.unpack_from(view)
+        if magic != MAGIC or version != VERSION:
+            view.release()
+            self.map.close()
+            raise ValueError(f"{filename} is no ptymer archive")
+        self.until = from_day(until)
+        self.days = _column(view, HEADER.size, n_days, "i")
+        self.offsets = _column(view, HEADER.size + 4 * n_days, n_days + 1, "I")
+        position = _align(HEADER.size + 4 * (2 * n_days + 1))
+        self.starts = _column(view, position, n_sessions, "q")
+        self.stops = _column(view, position + 8 * n_sessions, n_sessions, "q")
+
+    def close(self) -> None:
+        for view in (self.days, self.offsets, self.starts, self.stops):
+            view.release()
+        self.map.close()
+
+    def calc_total(self, start: date, end: date) -> timedelta:
+        first, last = self._day_range(start, end)
+        low, high = self.offsets[first], self.offsets[last]
+        return timedelta(seconds=sum(self.stops[low:high]) - sum(self.starts[low:high]))
+
+    def calc_days(self, start: date, end: date) -> list[tuple[date, timedelta]]:
+        first, last = self._day_range(start, end)
+        days = []
+        for index in range(first, last):
+            low, high = self.offsets[index], self.offsets[index + 1]
+            seconds = sum(self.stops[low:high]) - sum(self.starts[low:high])
+            days.append((from_day(self.days[index]), timedelta(seconds=seconds)))
+        return days
+
+    def _day_range(self, start: date, end: date) -> tuple[int, int]:
+        return bisect_left(self.days, to_day(start)), bisect_right(
+            self.days, to_day(end)
+        )
+
+
+def update_archive(db: Database, filename: str) -> Archive:
+    today = parse_date(db.date_today)
+    if os.path.isfile(filename):
+        archive = Archive(filename)
+        changed = db.get_first_changed_date(archive.seq)
+        if changed is None and archive.until >= today:
+            return archive
+        if changed is None or parse_date(changed) >= archive.until:
+            columns = _columns(archive)
+            archive.close()
+            return _write(db, filename, columns, archive.until, today)
+        archive.close()
+    return _write(db, filename, ([], [0], [], []), date.min, today)
+
+
+def _write(
+    db: Database, filename: str, columns: tuple, since: date, until: date
+) -> Archive:
+    days, offsets, starts, stops = columns
+    seq = db.get_last_seq()
+    last_day = until - timedelta(days=1)
+    events = db.get_events_between(since.isoformat(), last_day.isoformat())
+    for date_, rows in groupby(events, key=lambda row: row[0]):
+        times = {"start": [], "stop": []}
+        for _, event, time_stamp in rows:
+            times[event].append(to_epoch(parse_datetime(time_stamp)))
+        # pair like Timer.calc_duration, an unmatched start or stop is dropped
+        for start, stop in zip(times["start"], times["stop"]):
+            starts.append(start)
+            stops.append(stop)
+        days.append(to_day(parse_date(date_)))
+        offsets.append(len(starts))
+    temporary = f"{filename}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, seq, to_day(until), len(days), len(starts)))
+        array("i", days).tofile(f)
+        array("I", offsets).tofile(f)
+        f.write(b"\0" * (_align(f.tell()) - f.tell()))
+        array("q", starts).tofile(f)
+        array("q", stops).tofile(f)
+    os.replace(temporary, filename)
+    return Archive(filename)
+
+
+def _columns(archive: Archive) -> tuple[array, array, array, array]:
+    return (
+        array("i", archive.days),
+        array("I", archive.offsets),
+        array("q", archive.starts),
+        array("q", archive.stops),
+    )
+
+
+def _column(view: memoryview, position: int, count: int, code: str) -> memoryview:
+    end = position + count * struct.calcsize(code)
+    return view[position:end].cast(code)
+
+
+def _align(position: int) -> int:
+    return (position + 7) // 8 * 8
@@ -0,0 +1,102 @@
+import gzip
+import os
+import shutil
+import sqlite3
+import time
+from datetime import datetime
+from glob import glob
+from typing import NamedTuple, Optional
+from constants import Backup
+from database import Database
+
+PREFIX = "ptymer-"
+SUFFIX = ".db.gz"
+
+
+class BackupError(Exception):
+    pass
+
+
+class _Restarted(Exception):
+    pass
+
+
+class Snapshot(NamedTuple):
+    file: Optional[str]
+    pages: int
+    removed: list[str]
+
+
+def list_snapshots(directory: str) -> list[str]:
+    # oldest first, the names sort by time
+    return sorted(glob(os.path.join(directory, f"{PREFIX}*{SUFFIX}")))
+
+
+def backup_database(
+    db: Database,
+    directory: str,
+    keep: int = Backup.KEEP,
+    pages: int = Backup.PAGES,
+    pause: float = Backup.PAUSE,
+    now: Optional[datetime] = None,
+    restarts: int = Backup.RESTARTS,
+) -> Snapshot:
+    os.makedirs(directory, exist_ok=True)
+    seq = db.get_last_seq()
+    snapshots = list_snapshots(directory)
+    if snapshots and _seq_of(snapshots[-1]) == seq:
+        # nothing changed since the latest snapshot
+        return Snapshot(None, 0, _rotate(snapshots, keep))
+    name = f"{PREFIX}{(now or datetime.now()):%Y%m%d-%H%M%S}-{seq}"
+    temp = os.path.join(directory, name + ".db.tmp")
+    target = sqlite3.connect(temp)
+    copied = [0, 0, 0]
+
+    def progress(status: int, remaining: int, total: int) -> None:
+        # a write of another connection restarts the copy, seen as more pages remaining than before
+        if copied[0] and remaining >= copied[1]:
+            copied[2] += 1
+            if copied[2] > restarts:
+                raise _Restarted()
+        copied[0:2] = total, remaining
+        # between two steps the source is unlocked, so start and stop go through
+        time.sleep(pause)
+
+    try:
+        if db.con.execute("PRAGMA journal_mode").fetchone()[0] == "wal":
+            # the copy reads from one snapshot that doesn't block writers, so it needs no steps
+            db.con.backup(target)
+            copied[0] = target.execute("PRAGMA page_count").fetchone()[0]
+        else:
+            db.con.backup(target, pages=pages, progress=progress)
+        result = target.execute("PRAGMA integrity_check").fetchall()
+    except _Restarted:
+        result = None
+    finally:
+        target.close()
+    try:
+        if result is None:
+            # one step over all pages would lock out start and stop for the whole copy
+            raise BackupError(
+                f"The database changed during {restarts + 1} attempts of the backup, try again later"
+            )
+        if result != [("ok",)]:
+            raise BackupError(f"Integrity check of the snapshot failed: {result[0][0]}")
+        file = os.path.join(directory, name + SUFFIX)
+        with open(temp, "rb") as source, gzip.open(file + ".tmp", "wb") as packed:
+            shutil.copyfileobj(source, packed)
+        os.replace(file + ".tmp", file)
+    finally:
+        os.remove(temp)
+    return Snapshot(file, copied[0], _rotate(list_snapshots(directory), keep))
+
+
+def _seq_of(snapshot: str) -> int:
+    return int(os.path.basename(snapshot)[: -len(SUFFIX)].rsplit("-", 1)[1])
+
+
+def _rotate(snapshots: list[str], keep: int) -> list[str]:
+    removed = snapshots[: max(len(snapshots) - keep, 0)]
+    for snapshot in removed:
+        os.remove(snapshot)
+    return removed
@@ -0,0 +1,94 @@
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from http.client import HTTPConnection
+from os import path
+from tempfile import TemporaryDirectory
+from threading import Thread
+from codec import format_date, format_datetime
+from database import Database
+from server import ApiServer
+
+PATHS = ["/state", "/today", "/week", "/timestamps", "/range?from={start}"]
+
+
+def populate(db: Database, days: int) -> str:
+    rows = []
+    first = date.today() - timedelta(days=days)
+    for offset in range(days):
+        day = first + timedelta(days=offset)
+        morning = datetime.combine(day, datetime.min.time()) + timedelta(hours=8)
+        for event, hours in (("start", 0), ("stop", 4), ("start", 5), ("stop", 9)):
+            time_stamp = format_datetime(morning + timedelta(hours=hours))
+            rows.append((event, time_stamp, format_date(day)))
+    db.write_timestamps(rows)
+    return format_date(first)
+
+
+def client(port: int, paths: list[str], requests: int, conditional: bool) -> dict:
+    # one client per polling dashboard, the server closes the connection after each response
+    connection = HTTPConnection("127.0.0.1", port)
+    etags: dict[str, str] = {}
+    statuses: dict[int, int] = {}
+    for index in range(requests):
+        url = paths[index % len(paths)]
+        headers = {"If-None-Match": etags[url]} if conditional and url in etags else {}
+        connection.request("GET", url, headers=headers)
+        response = connection.getresponse()
+        response.read()
+        if response.getheader("ETag"):
+            etags[url] = response.getheader("ETag")
+        statuses[response.status] = statuses.get(response.status, 0) + 1
+    connection.close()
+    return statuses
+
+
+def run(args: argparse.Namespace, conditional: bool, port: int, start: str) -> None:
+    paths = [url.format(start=start) for url in PATHS]
+    began = time.perf_counter()
+    with ThreadPoolExecutor(args.clients) as pool:
+        results = list(
+            pool.map(
+                lambda _: client(port, paths, args.requests, conditional),
+                range(args.clients),
+            )
+        )
+    elapsed = time.perf_counter() - began
+    statuses: dict[int, int] = {}
+    for result in results:
+        for status, count in result.items():
+            statuses[status] = statuses.get(status, 0) + count
+    total = sum(statuses.values())
+    mode = "conditional" if conditional else "plain"
+    print(
+        f"{mode:>11}: {total} requests in {elapsed:.2f}s, "
+        f"{total / elapsed:.0f} req/s, statuses {dict(sorted(statuses.items()))}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test of the ptymer JSON API")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+    with TemporaryDirectory() as directory:
+        db = Database(path.join(directory, "ptymer.db"), shared=True)
+        start = populate(db, args.days)
+        server = ApiServer(("127.0.0.1", 0), db, args.workers)
+        thread = Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            for conditional in (False, True):
+                run(args, conditional, server.server_port, start)
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import argparse
+import time
+from os import path
+from tempfile import TemporaryDirectory
+from database import Database
+from tests.test_query_plan import QUERIES, populate
+
+
+def measure(db: Database, query, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        query(db)
+        timings.append(time.perf_counter() - began)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Timings of the Database queries")
+    parser.add_argument("--days", type=int, nargs="+", default=[365, 1825, 3650])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    timings: dict[str, list[float]] = {name: [] for name in QUERIES}
+    with TemporaryDirectory() as directory:
+        for days in args.days:
+            db = Database(path.join(directory, f"ptymer-{days}.db"))
+            db.date_today = "2024-01-02"
+            populate(db, days)
+            for name, query in QUERIES.items():
+                timings[name].append(measure(db, query, args.repeat))
+            db.close()
+    print(f"{'query':<24}" + "".join(f"{f'{days} days':>14}" for days in args.days))
+    for name, values in timings.items():
+        print(f"{name:<24}" + "".join(f"{value * 1000:>12.3f}ms" for value in values))
+
+
+if __name__ == "__main__":
+    main()
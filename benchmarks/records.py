@@ -0,0 +1,71 @@
+import argparse
+import time
+import tracemalloc
+from datetime import date
+from os import path
+from tempfile import TemporaryDirectory
+from codec import parse_datetime
+from database import Database
+from tests.test_query_plan import populate
+from timer import Timer
+
+SQL = (
+    "SELECT rowid, time, event FROM timestamp WHERE user = ? AND date >= ? AND date <= ? "
+    "ORDER BY time ASC"
+)
+
+
+def read_tuples(db: Database) -> list:
+    # the former rows: plain tuples, every consumer parses the time again
+    rows = db.con.execute(SQL, (db.user, "", "9999")).fetchall()
+    return [(parse_datetime(row[1]), row) for row in rows]
+
+
+def read_records(db: Database) -> list:
+    return [(record.value, record) for record in db.get_data_between("", "9999")]
+
+
+def report(db: Database) -> list:
+    return Timer(db).calc_range(date(1900, 1, 1), date(2024, 1, 2))
+
+
+def measure(db: Database, read, repeat: int) -> tuple[float, int]:
+    timings = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        read(db)
+        timings.append(time.perf_counter() - began)
+    tracemalloc.start()
+    result = read(db)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del result
+    return min(timings), peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Timings and memory of reading timestamp rows"
+    )
+    parser.add_argument("--days", type=int, nargs="+", default=[365, 3650])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    cases = {"tuples": read_tuples, "records": read_records, "report": report}
+    print(f"{'case':<10}{'days':>8}{'rows':>9}{'time':>12}{'rows/s':>12}{'peak':>12}")
+    with TemporaryDirectory() as directory:
+        for days in args.days:
+            db = Database(path.join(directory, f"ptymer-{days}.db"))
+            db.date_today = "2024-01-02"
+            populate(db, days)
+            rows = days * 4 + 1
+            for name, read in cases.items():
+                seconds, peak = measure(db, read, args.repeat)
+                print(
+                    f"{name:<10}{days:>8}{rows:>9}{seconds * 1000:>10.2f}ms"
+                    f"{rows / seconds:>12.0f}{peak / 1024:>10.0f}kB"
+                )
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+from datetime import date, datetime
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+from constants import Format, Target
+
+# timestamps are stored as fixed width ISO strings, "YYYY-MM-DD HH:MM:SS"
+DATE_LENGTH = 10
+DATETIME_LENGTH = 19
+TIME_OFFSET = DATE_LENGTH + 1
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+DAY_SECONDS = 86400
+
+
+class TimeStamp(NamedTuple):
+    date: str
+    time: str
+    value: datetime
+
+    @classmethod
+    def parse(cls, text: str) -> "TimeStamp":
+        return cls(date_of(text), text, parse_datetime(text))
+
+    @classmethod
+    def of(cls, value: datetime) -> "TimeStamp":
+        text = format_datetime(value)
+        return cls(date_of(text), text, value)
+
+
+class EventRecord:
+    # one row of rowid, time and event; the time is parsed on first use, at most once per row
+    __slots__ = ("id", "time", "event", "_value")
+
+    def __init__(self, id: int, time: str, event: str):
+        self.id = id
+        self.time = time
+        self.event = event
+        self._value: Optional[datetime] = None
+
+    @property
+    def value(self) -> datetime:
+        if self._value is None:
+            self._value = parse_datetime(self.time)
+        return self._value
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, EventRecord):
+            return NotImplemented
+        return (self.id, self.time, self.event) == (other.id, other.time, other.event)
+
+    def __repr__(self) -> str:
+        return f"EventRecord({self.id!r}, {self.time!r}, {self.event!r})"
+
+
+def event_record(cursor, row: tuple) -> EventRecord:
+    # sqlite3 row factory of the queries selecting rowid, time and event
+    return EventRecord(*row)
+
+
+def parse_datetime(text: str) -> datetime:
+    if (
+        len(text) != DATETIME_LENGTH
+        or text[10] != " "
+        or text[13] != ":"
+        or text[16] != ":"
+    ):
+        raise ValueError(f"Invalid timestamp: {text!r}")
+    return datetime.fromisoformat(text)
+
+
+@lru_cache(maxsize=1024)
+def parse_date(text: str) -> date:
+    if len(text) != DATE_LENGTH or text[4] != "-" or text[7] != "-":
+        raise ValueError(f"Invalid date: {text!r}")
+    return date.fromisoformat(text)
+
+
+def format_datetime(value: datetime) -> str:
+    return value.isoformat(" ", "seconds")
+
+
+@lru_cache(maxsize=1024)
+def format_date(value: date) -> str:
+    return value.isoformat()
+
+
+def format_time(value: datetime) -> str:
+    return value.time().isoformat("seconds")
+
+
+def to_epoch(value: datetime) -> int:
+    # seconds since 1970-01-01, naive local time like the stored timestamps
+    return (
+        (value.toordinal() - EPOCH_ORDINAL) * DAY_SECONDS
+        + value.hour * 3600
+        + value.minute * 60
+        + value.second
+    )
+
+
+def to_day(value: date) -> int:
+    return value.toordinal() - EPOCH_ORDINAL
+
+
+def from_day(day: int) -> date:
+    return date.fromordinal(day + EPOCH_ORDINAL)
+
+
+def calendar_day(value: date) -> tuple:
+    # one row of the calendar table: date, week, month, quarter, year, ISO weekday, workday, target seconds
+    text = format_date(value)
+    iso_year, week, weekday = value.isocalendar()
+    workday = Target.HOURS[weekday - 1] > 0 and text not in Target.HOLIDAYS
+    return (
+        text,
+        f"{iso_year}-W{week:02d}",
+        text[:7],
+        f"{value.year}-Q{(value.month + 2) // 3}",
+        text[:4],
+        weekday,
+        int(workday),
+        Target.HOURS[weekday - 1] * 3600 if workday else 0,
+    )
+
+
+def targets_version() -> str:
+    # the calendar and the checkpointed balances are stale once the targets or holidays change
+    return repr((Target.HOURS, Target.HOLIDAYS))
+
+
+def days_of_year(year: int) -> list[date]:
+    first, last = date(year, 1, 1).toordinal(), date(year + 1, 1, 1).toordinal()
+    return [date.fromordinal(day) for day in range(first, last)]
+
+
+def date_of(text: str) -> str:
+    return text[:DATE_LENGTH]
+
+
+def time_of(text: str) -> str:
+    return text[TIME_OFFSET:]
+
+
+def is_valid(text: str, format: str) -> bool:
+    parse = {Format.DATE: parse_date, Format.DATETIME: parse_datetime}.get(format)
+    try:
+        if parse:
+            parse(text)
+        else:
+            datetime.strptime(text, format)
+    except ValueError:
+        return False
+    return True
@@ -0,0 +1,136 @@
+import json
+import os
+import sqlite3
+import sys
+from itertools import dropwhile
+from typing import List
+from constants import Completion, File
+
+# sourced by bash: ids and dates come from this module, everything else from Typer's own completion.
+# Typer reads _<PROG NAME>_COMPLETE with the dot of app.py kept, only env can set such a variable.
+BASH = """_ptymer_completion() {
+    local IFS=$'\\n' word="${COMP_WORDS[COMP_CWORD]}" kind=""
+    case "${COMP_WORDS[1]}:${COMP_WORDS[COMP_CWORD-1]}" in
+        *:--from|*:--to|timestamps:timestamps|report:report) kind=dates ;;
+        *:--file) ;;
+        add:*) kind=entries ;;
+        delete:*) [[ $word != -* ]] && kind=ids ;;
+    esac
+    if [[ -n $kind ]]; then
+        local words="${COMP_WORDS[*]:1:COMP_CWORD-1}"
+        COMPREPLY=( $(COMP_WORDS="$words" "%(python)s" "%(module)s" "$kind" "$word" | cut -f1) )
+    else
+        COMPREPLY=( $(env COMP_WORDS="${COMP_WORDS[*]}" COMP_CWORD=$COMP_CWORD "_APP.PY_COMPLETE=complete_bash" "$1") )
+    fi
+}
+complete -o default -F _ptymer_completion app.py
+"""
+
+
+def load_index(
+    database: str = File.NAME, cache: str = File.COMPLETION, user: str = File.USER
+) -> dict:
+    # the cache is valid as long as the database and its WAL file keep their size and modification time
+    stamp = _stamp(database)
+    try:
+        with open(cache) as f:
+            index = json.load(f)
+        if index["stamp"] == stamp and index["user"] == user:
+            return index
+    except (OSError, ValueError, KeyError):
+        pass
+    index = {"stamp": stamp, "user": user, "ids": [], "dates": []}
+    if stamp[0] and File.ENGINE == "sqlite":
+        index.update(_read(database, user))
+    temp = cache + ".tmp"
+    with open(temp, "w") as f:
+        json.dump(index, f, separators=(",", ":"))
+    os.replace(temp, cache)
+    return index
+
+
+def complete_ids(incomplete: str) -> list[tuple[str, str]]:
+    return [
+        (str(row_id), f"{time_stamp} {event}")
+        for row_id, time_stamp, event in _index()["ids"]
+        if str(row_id).startswith(incomplete)
+    ]
+
+
+def complete_dates(incomplete: str) -> list[tuple[str, str]]:
+    return [
+        (date_, f"{count} timestamps")
+        for date_, count in _index()["dates"]
+        if date_.startswith(incomplete)
+    ]
+
+
+def complete_entries(args: List[str], incomplete: str) -> list[tuple[str, str]]:
+    # add takes pairs of timestamp and event, a timestamp starts with the date
+    given = list(dropwhile(lambda arg: arg != "add", args))[1:]
+    if len([arg for arg in given if not arg.startswith("-")]) % 2:
+        return [
+            (event, "") for event in ("start", "stop") if event.startswith(incomplete)
+        ]
+    return complete_dates(incomplete)
+
+
+def _index() -> dict:
+    return load_index(File.NAME, File.COMPLETION, File.USER)
+
+
+def _stamp(database: str) -> list:
+    stamp = []
+    for name in (database, database + "-wal"):
+        try:
+            stat = os.stat(name)
+            stamp.append([stat.st_size, stat.st_mtime_ns])
+        except FileNotFoundError:
+            stamp.append(None)
+    return stamp
+
+
+def _read(database: str, user: str) -> dict:
+    # read only and without migrations; both queries walk the (user, date, time) index backwards
+    con = sqlite3.connect(f"file:{database}?mode=ro", uri=True)
+    try:
+        ids = con.execute(
+            "SELECT rowid, time, event FROM timestamp WHERE user = ? ORDER BY date DESC, time DESC LIMIT ?",
+            (user, Completion.IDS),
+        ).fetchall()
+        dates = con.execute(
+            "SELECT date, COUNT(*) FROM timestamp WHERE user = ? GROUP BY date ORDER BY date DESC LIMIT ?",
+            (user, Completion.DATES),
+        ).fetchall()
+    except sqlite3.Error:
+        # a file ptymer hasn't migrated yet
+        return {}
+    finally:
+        con.close()
+    # the same lists as read back from the JSON cache
+    return {"ids": [list(row) for row in ids], "dates": [list(row) for row in dates]}
+
+
+def main(argv: list[str]) -> None:
+    # python complete.py bash | ids PREFIX | dates PREFIX | entries PREFIX
+    kind, incomplete = (argv + ["", ""])[:2]
+    if kind == "bash":
+        print(BASH % {"python": sys.executable, "module": os.path.abspath(__file__)})
+        return
+    if kind == "entries":
+        # the words before the current one, joined by newlines as timestamps contain a space
+        candidates = complete_entries(
+            os.environ.get("COMP_WORDS", "").splitlines(), incomplete
+        )
+    elif kind in ("ids", "dates"):
+        candidates = (
+            complete_ids(incomplete) if kind == "ids" else complete_dates(incomplete)
+        )
+    else:
+        raise SystemExit(f"Unknown completion: {kind}")
+    for value, hint in candidates:
+        print(f"{value}\t{hint}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,8 +1,63 @@
+from os import environ
+
+
 class InfoText:
     HELP_DELTA = "Time delta in minutes to stop in the past."
+    HELP_BALANCE = "Shows the overtime balance against the daily targets."
+    HELP_ENTRIES = 'Pairs of timestamp and event, e.g. "YYYY-MM-DD HH:MM:SS" start.'
+    HELP_ENTRIES_FILE = 'File with one "YYYY-MM-DD HH:MM:SS <event>" entry per line.'
+    HELP_ROWIDS_FILE = "File with one timestamp id per line."
+    HELP_FROM = "First date (YYYY-MM-DD) of the range to delete."
+    HELP_TO = "Last date (YYYY-MM-DD) of the range to delete, defaults to --from."
+    HELP_DRY_RUN = "Only show the affected timestamps, don't change anything."
+    HELP_SYNC = "Exchanges timestamp changes with another machine."
+    HELP_SYNC_EXPORT = "Writes the changes since the last export to a bundle file."
+    HELP_SYNC_IMPORT = "Applies the changes of a bundle file from another machine."
+    HELP_SYNC_FULL = "Exports all changes instead of the ones since the last export."
+    HELP_ARCHIVE = "Creates or updates the columnar archive of all closed days."
+    HELP_REPORT = "Shows worktime statistics for a date range (YYYY-MM-DD)."
+    HELP_PROJECT = "Project of the session."
+    HELP_TAG = "Tag of the session, can be given multiple times."
+    HELP_FILTER_PROJECT = "Only count sessions of this project."
+    HELP_FILTER_TAG = "Only count sessions with this tag."
+    HELP_BY_PROJECT = "Shows the worktime per project."
+    HELP_OFFSET = "Number of periods to go back, 1 is the previous one."
+    HELP_MONTH = "Shows the worktime per week of the current month."
+    HELP_YEAR = "Shows the worktime per month of the current year."
+    HELP_NOTIFY = "Notifies when the daily target is reached or a break is due."
+    HELP_BREAK_AFTER = (
+        "Minutes of continuous work until the break reminder, 0 disables it."
+    )
+    HELP_DOCTOR = "Checks all timestamps for inconsistencies."
+    HELP_FIX = "Removes the timestamps that break the start and stop order."
+    HELP_LIST_FROM = "First date (YYYY-MM-DD) of a range to list page by page."
+    HELP_LIST_TO = "Last date (YYYY-MM-DD) of the range, defaults to today."
+    HELP_LIMIT = "Shows only one page of this many timestamps."
+    HELP_AFTER = "Id of the last timestamp of the previous page."
+    HELP_BACKUP = "Writes a compressed snapshot of the database while it stays in use."
+    HELP_BACKUP_DIRECTORY = "Directory of the snapshots."
+    HELP_KEEP = "Number of snapshots to keep, older ones are removed."
+    HELP_HOOKS = "Posts the queued start, stop and delete events to the hook endpoint."
+    HELP_HOOK_URL = "Endpoint of the hooks, defaults to PTYMER_HOOK_URL."
+    HELP_ONCE = "Delivers the queued events once and exits."
+    HELP_SERVE = "Serves the data as JSON API for dashboards."
+    HELP_HOST = "Address to listen on."
+    HELP_PORT = "Port to listen on."
+    HELP_WORKERS = "Number of worker threads."
 
     WARN_COLLISON = "Timestamp collision with existing one"
     WARN_DURATION = "Couldn't calculate duration for today"
+    WARN_DRY_RUN = "Dry run, nothing changed."
+    WARN_LABEL = (
+        "Project and tag names must not be empty or contain commas, tabs or newlines."
+    )
+    WARN_PAGE_PROJECT = "--project can't be combined with --from."
+    WARN_SYNC_ENGINE = "Sync is only supported by the sqlite engine."
+    WARN_ARCHIVE_ENGINE = "The archive is only supported by the sqlite engine."
+    WARN_BACKUP_ENGINE = "Backups are only supported by the sqlite engine."
+    WARN_HOOKS_ENGINE = "Hooks are only supported by the sqlite engine."
+    WARN_HOOK_URL = "No hook endpoint, set PTYMER_HOOK_URL or --url."
+    WARN_SERVE_ENGINE = "The server is only supported by the sqlite engine."
     WARN_SYMBOL = "[red]⏱[/red]"
     CONFIRM_SYMBOL = "[green]⏱[/green]"
 
@@ -12,6 +67,79 @@ class Event:
     STOP = "stop"
 
 
+class Notify:
+    # minutes of continuous work until the break reminder
+    BREAK_AFTER = 360
+    # seconds between two checks of the data file for changes
+    WATCH_SECONDS = 2
+
+
+class Doctor:
+    # timestamps removed per statement by doctor --fix
+    BATCH = 500
+
+
+class Metrics:
+    # Prometheus text file the commands add their latency and queries to, unset disables the metrics
+    FILE = environ.get("PTYMER_METRICS")
+    # upper bounds of the latency histogram in seconds
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+    # the row counts scan every table, they are taken again at most after this many seconds
+    ROWS_SECONDS = 300
+    # commands that run until they are stopped, their runtime is no latency
+    UNTIMED = ("serve", "notify", "hooks")
+
+
+class Log:
+    # the log engine compacts its file on open once it has this many times the lines of its entries,
+    # but not below the minimum, so a short log isn't rewritten on every command
+    COMPACT_FACTOR = 2
+    COMPACT_MIN = 1000
+
+
+class Backup:
+    DIRECTORY = "backups"
+    KEEP = 7
+    # database pages copied per step, and the pause after each step that lets other writers in
+    PAGES = 256
+    PAUSE = 0.005
+    # copies restarted by writes of other processes before the backup gives up
+    RESTARTS = 10
+
+
+class Hooks:
+    # endpoint the hook worker posts start, stop and delete events to, unset leaves the outbox empty
+    URL = environ.get("PTYMER_HOOK_URL")
+    # events per request, and seconds to wait for the endpoint and between two looks at the outbox
+    BATCH = 100
+    TIMEOUT = 5
+    POLL = 1.0
+    # wait after the first failed request, doubled per attempt up to the maximum
+    BACKOFF = 1.0
+    MAX_BACKOFF = 300.0
+
+
+class Completion:
+    # most recent timestamp ids and dates offered by the shell completion
+    IDS = 50
+    DATES = 400
+
+
+class Page:
+    # timestamps per table when browsing a date range
+    SIZE = 50
+
+
+class Period:
+    # columns of the calendar table, from the finest to the coarsest
+    DATE = "date"
+    WEEK = "week"
+    MONTH = "month"
+    QUARTER = "quarter"
+    YEAR = "year"
+    ALL = (DATE, WEEK, MONTH, QUARTER, YEAR)
+
+
 class Format:
     TIME = "%H:%M:%S"
     DATETIME = "%Y-%m-%d %H:%M:%S"
@@ -19,4 +147,17 @@ class Format:
 
 
 class File:
-    NAME = "ptymer.db"
+    # storage engine, one of "sqlite", "log" or "memory"
+    ENGINE = environ.get("PTYMER_ENGINE", "sqlite")
+    NAME = "ptymer.log" if ENGINE == "log" else "ptymer.db"
+    # user of a database shared by a team, unset for a personal file
+    USER = environ.get("PTYMER_USER", "")
+    ARCHIVE = f"ptymer.{USER}.col" if USER else "ptymer.col"
+    COMPLETION = f"ptymer.{USER}.cmp" if USER else "ptymer.cmp"
+
+
+class Target:
+    # daily worktime targets in hours, Monday first
+    HOURS = (8, 8, 8, 8, 8, 0, 0)
+    # days off as "YYYY-MM-DD", they have no target
+    HOLIDAYS: tuple[str, ...] = ()
@@ -1,63 +1,666 @@
 import sqlite3
 from datetime import date
 from os import path
-from sqlite3 import Connection
-from typing import Any
+from sqlite3 import Connection, Cursor
+from typing import Any, Iterable, Iterator
+from codec import (
+    EventRecord,
+    calendar_day,
+    days_of_year,
+    event_record,
+    format_date,
+    parse_date,
+    targets_version,
+)
+from constants import Period
+from metrics import recorder
+
+# pairs the n-th start with the n-th stop of a day, like Timer.calc_duration does, and labels it with
+# the project of the start; sessions still running have no stop
+SESSIONS = """
+WITH numbered AS (
+    SELECT rowid AS id, date, event, time, ROW_NUMBER() OVER (PARTITION BY date, event ORDER BY time) AS n
+    FROM timestamp WHERE user = :user AND date >= :start AND date <= :end
+), pairs AS (
+    SELECT date,
+           MAX(CASE WHEN event = 'start' THEN id END) AS start_id,
+           MAX(CASE WHEN event = 'start' THEN time END) AS start,
+           MAX(CASE WHEN event = 'stop' THEN id END) AS stop_id,
+           MAX(CASE WHEN event = 'stop' THEN time END) AS stop
+    FROM numbered GROUP BY date, n
+), sessions AS (
+    SELECT start_id, date, start, stop_id, stop,
+           COALESCE(project.name, '') AS project,
+           strftime('%s', stop) - strftime('%s', start) AS seconds
+    FROM pairs
+    LEFT JOIN timestamp_project ON timestamp_project.timestamp_id = start_id
+    LEFT JOIN project ON project.id = timestamp_project.project_id
+    WHERE start_id IS NOT NULL AND (:tag IS NULL OR EXISTS (
+        SELECT 1 FROM timestamp_tag JOIN tag ON tag.id = timestamp_tag.tag_id
+        WHERE timestamp_tag.timestamp_id = start_id AND tag.name = :tag
+    ))
+)
+"""
+
+# worktime per day joined to the calendar, a session running today counts until :now
+CALENDAR_TOTALS = """
+, days AS (
+    SELECT date, SUM(COALESCE(seconds, strftime('%s', :now) - strftime('%s', start))) AS seconds
+    FROM sessions
+    WHERE (stop IS NOT NULL OR date = date(:now)) AND (:project IS NULL OR project = :project)
+    GROUP BY date
+)
+SELECT calendar.{period}, COUNT(days.date), COALESCE(SUM(days.seconds), 0), SUM(calendar.target)
+FROM calendar LEFT JOIN days ON days.date = calendar.date
+WHERE calendar.date >= :start AND calendar.date <= :end
+GROUP BY calendar.{period} ORDER BY calendar.{period}
+"""
+
+# drops the stored worktime of finished sessions when an insert can change it: a stop, a timestamp before the
+# last one of the day, or a start that is paired with a stop written before it
+DAY_TOTAL_INSERT = """
+CREATE TRIGGER day_total_insert AFTER INSERT ON timestamp
+WHEN new.event != 'start'
+    OR EXISTS (
+        SELECT 1 FROM timestamp WHERE user = new.user AND date = new.date AND time >= new.time AND rowid != new.rowid
+    )
+    OR (SELECT COUNT(*) FROM timestamp WHERE user = new.user AND event = 'stop' AND date = new.date)
+        >= (SELECT COUNT(*) FROM timestamp WHERE user = new.user AND event = 'start' AND date = new.date)
+BEGIN
+    DELETE FROM day_total WHERE user = new.user AND date = new.date;
+END
+"""
 
 
 class Database:
 
-    def __init__(self, filename):
+    def __init__(self, filename, shared=False, user="", outbox=False):
         self.filename = filename
-        if not path.isfile(f"./{self.filename}"):
+        # a shared connection may be used by several threads, the caller serializes the access
+        self.shared = shared
+        # every timestamp belongs to a user, single user files only have the user ''
+        self.user = user
+        # writes also queue their events for the hook worker
+        self.outbox = outbox
+        if not path.isfile(self.filename):
             self.con = self.create()
         self.con = self.load()
-        self.date_today = f"{date.today()}"
+        if recorder:
+            recorder.watch(self.con, self.filename)
+        self.migrate()
+        self.date_today = format_date(date.today())
 
     def load(self) -> Connection:
-        return sqlite3.connect(self.filename)
+        return sqlite3.connect(self.filename, check_same_thread=not self.shared)
 
     def create(self) -> Connection:
         con = self.load()
         cur = con.cursor()
-        cur.execute("CREATE TABLE timestamp(date, event, time)")
+        cur.execute(
+            "CREATE TABLE timestamp(date, event, time, user NOT NULL DEFAULT '')"
+        )
         return con
 
+    def migrate(self) -> None:
+        cur = self.con.cursor()
+        if self.user:
+            # readers of one user don't wait for the writes of another
+            cur.execute("PRAGMA journal_mode=WAL")
+        self._migrate_user(cur)
+        cur.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoint(user, period, balance, PRIMARY KEY (user, period))"
+        )
+        cur.execute("CREATE TABLE IF NOT EXISTS meta(key PRIMARY KEY, value)")
+        cur.execute(
+            "CREATE TABLE IF NOT EXISTS sync_state(user, origin, seq, PRIMARY KEY (user, origin))"
+        )
+        cur.executescript("""
+            CREATE INDEX IF NOT EXISTS timestamp_user_date_time ON timestamp(user, date, time);
+            CREATE INDEX IF NOT EXISTS timestamp_user_event_date_time ON timestamp(user, event, date, time);
+            CREATE TABLE IF NOT EXISTS project(id INTEGER PRIMARY KEY, name UNIQUE NOT NULL);
+            CREATE TABLE IF NOT EXISTS tag(id INTEGER PRIMARY KEY, name UNIQUE NOT NULL);
+            CREATE TABLE IF NOT EXISTS timestamp_project(
+                timestamp_id INTEGER PRIMARY KEY, project_id INTEGER NOT NULL REFERENCES project(id)
+            );
+            CREATE INDEX IF NOT EXISTS timestamp_project_project ON timestamp_project(project_id);
+            CREATE TABLE IF NOT EXISTS timestamp_tag(
+                timestamp_id INTEGER NOT NULL, tag_id INTEGER NOT NULL REFERENCES tag(id),
+                PRIMARY KEY (timestamp_id, tag_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS timestamp_tag_tag ON timestamp_tag(tag_id, timestamp_id);
+            CREATE TABLE IF NOT EXISTS calendar(
+                date PRIMARY KEY, week, month, quarter, year, weekday, workday, target
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS day_total(user, date, seconds, PRIMARY KEY (user, date)) WITHOUT ROWID;
+            CREATE TRIGGER IF NOT EXISTS day_total_delete AFTER DELETE ON timestamp BEGIN
+                DELETE FROM day_total WHERE user = old.user AND date = old.date;
+            END;
+            CREATE TABLE IF NOT EXISTS outbox(
+                id INTEGER PRIMARY KEY AUTOINCREMENT, op, date, event, time, user NOT NULL DEFAULT '',
+                attempts NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS outbox_user ON outbox(user);
+            CREATE TRIGGER IF NOT EXISTS timestamp_labels_delete AFTER DELETE ON timestamp BEGIN
+                DELETE FROM timestamp_project WHERE timestamp_id = old.rowid;
+                DELETE FROM timestamp_tag WHERE timestamp_id = old.rowid;
+            END;
+            """)
+        if not cur.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name='changelog'"
+        ).fetchone():
+            with self.con:
+                cur.execute(
+                    "CREATE TABLE changelog(seq INTEGER PRIMARY KEY AUTOINCREMENT, op, date, event, time, "
+                    "user NOT NULL DEFAULT '', origin NOT NULL DEFAULT '')"
+                )
+                # timestamps written before the changelog existed are its first inserts
+                cur.execute(
+                    "INSERT INTO changelog(op, date, event, time, user) "
+                    "SELECT 'insert', date, event, time, user FROM timestamp ORDER BY date, time"
+                )
+        self._migrate_origin(cur)
+        self._migrate_day_total(cur)
+
+    def _migrate_origin(self, cur) -> None:
+        # imported changes are logged with the machine they came from, so they aren't exported again
+        if "origin" in self._columns(cur, "changelog"):
+            return
+        with self.con:
+            cur.execute("BEGIN IMMEDIATE")
+            if "origin" in self._columns(cur, "changelog"):
+                return
+            cur.execute("ALTER TABLE changelog ADD COLUMN origin NOT NULL DEFAULT ''")
+
+    def _migrate_day_total(self, cur) -> None:
+        # a start after the last row of the day closes no session and keeps the stored total
+        if "WHEN" in self._trigger(cur, "day_total_insert"):
+            return
+        with self.con:
+            cur.execute("BEGIN IMMEDIATE")
+            if "WHEN" in self._trigger(cur, "day_total_insert"):
+                return
+            cur.execute("DROP TRIGGER IF EXISTS day_total_insert")
+            cur.execute(DAY_TOTAL_INSERT)
+
+    def _migrate_user(self, cur) -> None:
+        # files from before the user column belong to the user '', the per day caches are rebuilt per user
+        if "user" in self._columns(cur, "timestamp"):
+            return
+        with self.con:
+            # concurrent processes migrate one after the other
+            cur.execute("BEGIN IMMEDIATE")
+            if "user" in self._columns(cur, "timestamp"):
+                return
+            cur.execute("ALTER TABLE timestamp ADD COLUMN user NOT NULL DEFAULT ''")
+            for index in ("timestamp_date_time", "timestamp_event_date_time"):
+                cur.execute(f"DROP INDEX IF EXISTS {index}")
+            for trigger in ("day_total_insert", "day_total_delete"):
+                cur.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+            cur.execute("DROP TABLE IF EXISTS day_total")
+            cur.execute("DROP TABLE IF EXISTS checkpoint")
+            if self._columns(cur, "sync_state"):
+                cur.execute("ALTER TABLE sync_state RENAME TO sync_state_single")
+                cur.execute(
+                    "CREATE TABLE sync_state(user, origin, seq, PRIMARY KEY (user, origin))"
+                )
+                cur.execute(
+                    "INSERT INTO sync_state SELECT '', origin, seq FROM sync_state_single"
+                )
+                cur.execute("DROP TABLE sync_state_single")
+            if self._columns(cur, "changelog"):
+                cur.execute("ALTER TABLE changelog ADD COLUMN user NOT NULL DEFAULT ''")
+
     def close(self) -> None:
         self.con.close()
 
-    def write_timestamp(self, event: str, time_stamp: str, date=None):
+    def write_timestamp(
+        self,
+        event: str,
+        time_stamp: str,
+        date=None,
+        project=None,
+        tags=(),
+        day_total=None,
+    ):
         if not date:
             date = self.date_today
         cur = self.con.cursor()
+        values = (date, event, time_stamp, self.user)
         cur.execute(
-            f"INSERT INTO timestamp VALUES ('{date}', '{event}', '{time_stamp}')"
+            "INSERT INTO timestamp(date, event, time, user) VALUES (?, ?, ?, ?)", values
         )
+        if project or tags:
+            self._write_labels(cur, cur.lastrowid, project, tags)
+        self._log_inserts(cur, [values])
+        self._invalidate_checkpoints(cur, self.user, date)
+        if day_total is not None:
+            # after the insert dropped the stored total, in the same commit
+            cur.execute(
+                "INSERT OR REPLACE INTO day_total VALUES (?, ?, ?)",
+                (self.user, date, day_total),
+            )
         self.con.commit()
 
-    def get_times_by(self, event: str, ascending: bool = True) -> list[Any]:
-        cur = self.con.cursor()
+    def get_times_by(self, event: str, ascending: bool = True) -> list[EventRecord]:
+        cur = self._records()
         order = "ASC" if ascending else "DESC"
         return cur.execute(
-            f"SELECT time FROM timestamp WHERE date='{self.date_today}' AND event='{event}' ORDER BY time {order}"
+            "SELECT rowid, time, event FROM timestamp WHERE user = ? AND date = ? AND event = ? "
+            f"ORDER BY time {order}",
+            (self.user, self.date_today, event),
         ).fetchall()
 
     def get_last_event(self) -> str | None:
         cur = self.con.cursor()
         return cur.execute(
-            f"SELECT event FROM timestamp WHERE date='{self.date_today}' ORDER BY time DESC"
+            "SELECT event FROM timestamp WHERE user = ? AND date = ? ORDER BY time DESC",
+            (self.user, self.date_today),
         ).fetchone()
 
-    def get_data_by_date(self, date: str) -> list[Any]:
-        cur = self.con.cursor()
+    def get_data_by_date(self, date: str) -> list[EventRecord]:
+        cur = self._records()
         return cur.execute(
-            f"SELECT rowid, time, event FROM timestamp WHERE date='{date}' ORDER BY time ASC"
+            "SELECT rowid, time, event FROM timestamp WHERE user = ? AND date = ? ORDER BY time ASC",
+            (self.user, date),
         ).fetchall()
 
     def delete_row(self, row_id: int) -> bool:
         cur = self.con.cursor()
-        cur.execute(f"DELETE FROM timestamp WHERE rowid='{row_id}'")
+        params = (row_id, self.user)
+        row = cur.execute(
+            "SELECT date FROM timestamp WHERE rowid = ? AND user = ?", params
+        ).fetchone()
+        self._log_deletes(cur, "rowid = ? AND user = ?", params)
+        cur.execute("DELETE FROM timestamp WHERE rowid = ? AND user = ?", params)
+        deleted = cur.rowcount > 0
+        if row:
+            self._invalidate_checkpoints(cur, self.user, row[0])
+        self.con.commit()
+        return deleted
+
+    def write_timestamps(self, rows: list[tuple[str, str, str]]) -> None:
+        with self.con:
+            cur = self.con.cursor()
+            values = [
+                (date, event, time_stamp, self.user) for event, time_stamp, date in rows
+            ]
+            cur.executemany(
+                "INSERT INTO timestamp(date, event, time, user) VALUES (?, ?, ?, ?)",
+                values,
+            )
+            self._log_inserts(cur, values)
+            self._invalidate_checkpoints(
+                cur, self.user, min(date for _, _, date in rows)
+            )
+
+    def get_rows_by_id(self, row_ids: list[int]) -> list[EventRecord]:
+        cur = self._records()
+        return cur.execute(
+            f"SELECT rowid, time, event FROM timestamp WHERE rowid IN ({self._placeholders(row_ids)}) "
+            "AND user = ? ORDER BY time ASC",
+            [*row_ids, self.user],
+        ).fetchall()
+
+    def get_data_between(self, start: str, end: str) -> list[EventRecord]:
+        cur = self._records()
+        return cur.execute(
+            "SELECT rowid, time, event FROM timestamp WHERE user = ? AND date >= ? AND date <= ? "
+            "ORDER BY time ASC",
+            (self.user, start, end),
+        ).fetchall()
+
+    def delete_rows(self, row_ids: list[int]) -> int:
+        return self.delete_row_batches([row_ids])
+
+    def delete_row_batches(self, batches: Iterable[list[int]]) -> int:
+        # all batches are removed in one transaction
+        deleted = 0
+        with self.con:
+            cur = self.con.cursor()
+            for row_ids in batches:
+                where = f"rowid IN ({self._placeholders(row_ids)}) AND user = ?"
+                params = [*row_ids, self.user]
+                (first_date,) = cur.execute(
+                    f"SELECT MIN(date) FROM timestamp WHERE {where}", params
+                ).fetchone()
+                self._log_deletes(cur, where, params)
+                cur.execute(f"DELETE FROM timestamp WHERE {where}", params)
+                deleted += cur.rowcount
+                if first_date:
+                    self._invalidate_checkpoints(cur, self.user, first_date)
+        return deleted
+
+    def iter_timestamps(self) -> Iterator[Any]:
+        # streams the whole table along the date and time index, without sorting
+        cur = self.con.cursor()
+        return cur.execute(
+            "SELECT rowid, date, event, time FROM timestamp WHERE user = ? ORDER BY date, time, rowid",
+            (self.user,),
+        )
+
+    def get_timestamp_page(
+        self, start: str, end: str, limit: int, after: int | None = None
+    ) -> list[Any]:
+        # keyset page on (date, time, rowid): seeks to the row after the cursor instead of skipping an offset
+        cur = self.con.cursor()
+        keyset = (
+            "AND (date, time, rowid) > (SELECT date, time, rowid FROM timestamp WHERE rowid = :after) "
+            if after is not None
+            else ""
+        )
+        return cur.execute(
+            "SELECT rowid, date, time, event FROM timestamp "
+            "WHERE user = :user AND date BETWEEN :start AND :end "
+            + keyset
+            + "ORDER BY date, time, rowid LIMIT :limit",
+            {
+                "user": self.user,
+                "start": start,
+                "end": end,
+                "after": after,
+                "limit": limit,
+            },
+        ).fetchall()
+
+    def get_events_between(self, start: str, end: str) -> Iterator[Any]:
+        cur = self.con.cursor()
+        return cur.execute(
+            "SELECT date, event, time FROM timestamp WHERE user = ? AND date >= ? AND date <= ? "
+            "ORDER BY date, time",
+            (self.user, start, end),
+        )
+
+    def get_dates_between(self, start: str, end: str) -> list[Any]:
+        cur = self.con.cursor()
+        return cur.execute(
+            "SELECT DISTINCT date FROM timestamp WHERE user = ? AND date >= ? AND date <= ? "
+            "ORDER BY date ASC",
+            (self.user, start, end),
+        ).fetchall()
+
+    def get_project_totals(
+        self, start: str, end: str, project=None, tag=None
+    ) -> list[Any]:
+        cur = self.con.cursor()
+        return cur.execute(
+            SESSIONS
+            + "SELECT project, SUM(seconds) FROM sessions WHERE stop IS NOT NULL "
+            "AND (:project IS NULL OR project = :project) GROUP BY project ORDER BY project",
+            self._sessions(start, end, project, tag),
+        ).fetchall()
+
+    def get_daily_totals(
+        self, start: str, end: str, project=None, tag=None
+    ) -> list[Any]:
+        cur = self.con.cursor()
+        return cur.execute(
+            SESSIONS + "SELECT date, SUM(seconds) FROM sessions WHERE stop IS NOT NULL "
+            "AND (:project IS NULL OR project = :project) GROUP BY date ORDER BY date",
+            self._sessions(start, end, project, tag),
+        ).fetchall()
+
+    def get_session_data(self, date: str, project: str) -> list[EventRecord]:
+        cur = self._records()
+        return cur.execute(
+            SESSIONS
+            + "SELECT start_id, start, 'start' FROM sessions WHERE project = :project "
+            "UNION ALL SELECT stop_id, stop, 'stop' FROM sessions WHERE project = :project AND stop IS NOT NULL "
+            "ORDER BY 2",
+            self._sessions(date, date, project),
+        ).fetchall()
+
+    def get_calendar_span(self, period: str, date: str) -> tuple[str, str]:
+        self._check_period(period)
+        year = parse_date(date).year
+        # ISO weeks reach into the neighbouring years
+        self._fill_calendar(year - 1, year + 1)
+        cur = self.con.cursor()
+        return cur.execute(
+            f"SELECT MIN(date), MAX(date) FROM calendar WHERE date >= ? AND date <= ? "
+            f"AND {period} = (SELECT {period} FROM calendar WHERE date = ?)",
+            (f"{year - 1}-01-01", f"{year + 1}-12-31", date),
+        ).fetchone()
+
+    def get_calendar_totals(
+        self, start: str, end: str, period: str, project=None, tag=None, now=None
+    ) -> list[Any]:
+        self._check_period(period)
+        self._fill_calendar(parse_date(start).year, parse_date(end).year)
+        cur = self.con.cursor()
+        return cur.execute(
+            SESSIONS + CALENDAR_TOTALS.format(period=period),
+            {**self._sessions(start, end, project, tag), "now": now},
+        ).fetchall()
+
+    def get_last_time(self, event: str) -> tuple | None:
+        cur = self.con.cursor()
+        return cur.execute(
+            "SELECT time FROM timestamp WHERE user = ? AND date = ? AND event = ? ORDER BY time DESC LIMIT 1",
+            (self.user, self.date_today, event),
+        ).fetchone()
+
+    def get_day_total(self, date: str) -> int | None:
+        cur = self.con.cursor()
+        row = cur.execute(
+            "SELECT seconds FROM day_total WHERE user = ? AND date = ?",
+            (self.user, date),
+        ).fetchone()
+        return row[0] if row else None
+
+    def write_day_total(self, date: str, seconds: int) -> None:
+        # dropped again by the triggers on every insert or delete of the day
+        cur = self.con.cursor()
+        cur.execute(
+            "INSERT OR REPLACE INTO day_total VALUES (?, ?, ?)",
+            (self.user, date, seconds),
+        )
+        self.con.commit()
+
+    def get_last_checkpoint(self) -> tuple | None:
+        cur = self.con.cursor()
+        self._check_checkpoints(cur)
+        return cur.execute(
+            "SELECT period, balance FROM checkpoint WHERE user = ? ORDER BY period DESC LIMIT 1",
+            (self.user,),
+        ).fetchone()
+
+    def write_checkpoint(self, period: str, balance: int) -> None:
+        cur = self.con.cursor()
+        self._check_checkpoints(cur)
+        cur.execute(
+            "INSERT OR REPLACE INTO checkpoint VALUES (?, ?, ?)",
+            (self.user, period, balance),
+        )
+        self.con.commit()
+
+    def _check_checkpoints(self, cur) -> None:
+        # the balances depend on the daily targets and holidays, like the calendar
+        version = targets_version()
+        if self.get_meta("checkpoint") != version:
+            cur.execute("DELETE FROM checkpoint")
+            self.set_meta("checkpoint", version)
+
+    def get_meta(self, key: str) -> str | None:
+        cur = self.con.cursor()
+        row = cur.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        cur = self.con.cursor()
+        cur.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
+        self.con.commit()
+
+    def get_changes_since(self, seq: int) -> list[Any]:
+        cur = self.con.cursor()
+        return cur.execute(
+            "SELECT seq, op, date, event, time FROM changelog WHERE seq > ? AND user = ? AND origin = '' "
+            "ORDER BY seq ASC",
+            (seq, self.user),
+        ).fetchall()
+
+    def get_last_seq(self) -> int:
+        cur = self.con.cursor()
+        return cur.execute("SELECT COALESCE(MAX(seq), 0) FROM changelog").fetchone()[0]
+
+    def get_first_changed_date(self, seq: int) -> str | None:
+        cur = self.con.cursor()
+        return cur.execute(
+            "SELECT MIN(date) FROM changelog WHERE seq > ? AND user = ?",
+            (seq, self.user),
+        ).fetchone()[0]
+
+    def get_sync_seq(self, origin: str) -> int:
+        cur = self.con.cursor()
+        row = cur.execute(
+            "SELECT seq FROM sync_state WHERE user = ? AND origin = ?",
+            (self.user, origin),
+        ).fetchone()
+        return row[0] if row else 0
+
+    def apply_changes(self, origin: str, changes: list[tuple]) -> int:
+        applied = 0
+        with self.con:
+            cur = self.con.cursor()
+            for _, op, date_, event, time_stamp in changes:
+                values = (date_, event, time_stamp, self.user)
+                row = cur.execute(
+                    "SELECT rowid FROM timestamp WHERE date = ? AND event = ? AND time = ? AND user = ?",
+                    values,
+                ).fetchone()
+                if op == "insert" and not row:
+                    cur.execute(
+                        "INSERT INTO timestamp(date, event, time, user) VALUES (?, ?, ?, ?)",
+                        values,
+                    )
+                elif op == "delete" and row:
+                    cur.execute("DELETE FROM timestamp WHERE rowid = ?", row)
+                else:
+                    continue
+                # the changelog is the data version of backups, the archive and the API
+                cur.execute(
+                    "INSERT INTO changelog(op, date, event, time, user, origin) VALUES (?, ?, ?, ?, ?, ?)",
+                    (op, *values, origin),
+                )
+                applied += 1
+                self._invalidate_checkpoints(cur, self.user, date_)
+            cur.execute(
+                "INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?)",
+                (self.user, origin, max(change[0] for change in changes)),
+            )
+        return applied
+
+    def get_outbox(self, limit: int) -> list[Any]:
+        cur = self.con.cursor()
+        return cur.execute(
+            "SELECT id, op, date, event, time, attempts FROM outbox WHERE user = ? ORDER BY id ASC LIMIT ?",
+            (self.user, limit),
+        ).fetchall()
+
+    def delete_outbox(self, ids: list[int]) -> None:
+        cur = self.con.cursor()
+        cur.execute(f"DELETE FROM outbox WHERE id IN ({self._placeholders(ids)})", ids)
+        self.con.commit()
+
+    def retry_outbox(self, ids: list[int]) -> None:
+        cur = self.con.cursor()
+        cur.execute(
+            f"UPDATE outbox SET attempts = attempts + 1 WHERE id IN ({self._placeholders(ids)})",
+            ids,
+        )
         self.con.commit()
-        if cur.rowcount > 0:
-            return True
-        return False
+
+    def _fill_calendar(self, first: int, last: int) -> None:
+        # filled per year on first use, and again when the targets or holidays change
+        cur = self.con.cursor()
+        version = targets_version()
+        if self.get_meta("calendar") != version:
+            cur.execute("DELETE FROM calendar")
+            self.set_meta("calendar", version)
+        for year in range(first, last + 1):
+            days = days_of_year(year)
+            count = cur.execute(
+                "SELECT COUNT(*) FROM calendar WHERE date >= ? AND date <= ?",
+                (f"{year}-01-01", f"{year}-12-31"),
+            ).fetchone()[0]
+            if count < len(days):
+                cur.executemany(
+                    "INSERT OR IGNORE INTO calendar VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    map(calendar_day, days),
+                )
+        self.con.commit()
+
+    def _records(self) -> Cursor:
+        # a cursor of its own, the other queries keep the plain tuples
+        cur = self.con.cursor()
+        cur.row_factory = event_record
+        return cur
+
+    def _sessions(self, start: str, end: str, project=None, tag=None) -> dict:
+        return {
+            "user": self.user,
+            "start": start,
+            "end": end,
+            "project": project,
+            "tag": tag,
+        }
+
+    @staticmethod
+    def _columns(cur, table: str) -> list[str]:
+        return [row[1] for row in cur.execute(f"PRAGMA table_info({table})")]
+
+    @staticmethod
+    def _trigger(cur, name: str) -> str:
+        row = cur.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = ?", (name,)
+        ).fetchone()
+        return row[0] if row else ""
+
+    @staticmethod
+    def _check_period(period: str) -> None:
+        if period not in Period.ALL:
+            raise ValueError(f"Unknown period: {period}")
+
+    @staticmethod
+    def _write_labels(cur, row_id: int, project, tags) -> None:
+        if project:
+            cur.execute("INSERT OR IGNORE INTO project(name) VALUES (?)", (project,))
+            cur.execute(
+                "INSERT INTO timestamp_project SELECT ?, id FROM project WHERE name = ?",
+                (row_id, project),
+            )
+        for tag in set(tags):
+            cur.execute("INSERT OR IGNORE INTO tag(name) VALUES (?)", (tag,))
+            cur.execute(
+                "INSERT INTO timestamp_tag SELECT ?, id FROM tag WHERE name = ?",
+                (row_id, tag),
+            )
+
+    def _logs(self) -> tuple[str, ...]:
+        # the outbox is written in the same transaction as the change, so no event is lost or queued twice
+        return ("changelog", "outbox") if self.outbox else ("changelog",)
+
+    def _log_inserts(self, cur, values: list[tuple]) -> None:
+        for log in self._logs():
+            cur.executemany(
+                f"INSERT INTO {log}(op, date, event, time, user) VALUES ('insert', ?, ?, ?, ?)",
+                values,
+            )
+
+    def _log_deletes(self, cur, where: str, params) -> None:
+        for log in self._logs():
+            cur.execute(
+                f"INSERT INTO {log}(op, date, event, time, user) "
+                f"SELECT 'delete', date, event, time, user FROM timestamp WHERE {where}",
+                params,
+            )
+
+    @staticmethod
+    def _placeholders(values: list) -> str:
+        return ", ".join("?" * len(values))
+
+    @staticmethod
+    def _invalidate_checkpoints(cur, user: str, date: str) -> None:
+        # a changed day makes its month's closing balance and all later ones stale
+        cur.execute(
+            "DELETE FROM checkpoint WHERE user = ? AND period >= ?", (user, date[:7])
+        )
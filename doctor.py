@@ -0,0 +1,93 @@
+from array import array
+from tempfile import TemporaryFile
+from typing import Iterable, Iterator, NamedTuple
+from codec import date_of, is_valid
+from constants import Doctor, Event, Format
+
+INVALID = "invalid timestamp"
+DUPLICATE = "duplicate"
+LEADING_STOP = "stop without start"
+SECOND_START = "second start"
+SECOND_STOP = "second stop"
+NOT_STOPPED = "session not stopped"
+OTHER_DATE = "time outside its date"
+
+
+class Issue(NamedTuple):
+    date: str
+    row_id: int
+    time: str
+    kind: str
+    # removed by doctor --fix
+    fixable: bool
+
+
+def check(rows: Iterable[tuple], today: str) -> Iterator[Issue]:
+    # rows ordered by date and time; only the last kept timestamp of the current day is remembered.
+    # The fixes keep the earliest start and the latest stop, so every day alternates again.
+    day = last = None
+    for row_id, date_, event, time_stamp in rows:
+        if date_ != day:
+            if last and last[1] == Event.START and day != today:
+                yield Issue(day, last[0], last[2], NOT_STOPPED, False)
+            day, last = date_, None
+        if event not in (Event.START, Event.STOP) or not is_valid(
+            time_stamp, Format.DATETIME
+        ):
+            yield Issue(date_, row_id, time_stamp, INVALID, True)
+            continue
+        if date_of(time_stamp) != date_:
+            yield Issue(date_, row_id, time_stamp, OTHER_DATE, False)
+        if last and last[1:] == (event, time_stamp):
+            yield Issue(date_, row_id, time_stamp, DUPLICATE, True)
+        elif last is None and event == Event.STOP:
+            yield Issue(date_, row_id, time_stamp, LEADING_STOP, True)
+        elif last and last[1] == event == Event.START:
+            yield Issue(date_, row_id, time_stamp, SECOND_START, True)
+        elif last and last[1] == event == Event.STOP:
+            yield Issue(date_, last[0], last[2], SECOND_STOP, True)
+            last = (row_id, event, time_stamp)
+        else:
+            last = (row_id, event, time_stamp)
+    if last and last[1] == Event.START and day != today:
+        yield Issue(day, last[0], last[2], NOT_STOPPED, False)
+
+
+class RowIdSpool:
+    # row ids to remove, buffered in a temporary file so long histories don't grow the memory
+
+    def __init__(self, batch: int = Doctor.BATCH):
+        self.batch = batch
+        self.file = TemporaryFile()
+        self.buffer = array("q")
+        self.count = 0
+
+    def __enter__(self) -> "RowIdSpool":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.file.close()
+
+    def add(self, row_id: int) -> None:
+        self.buffer.append(row_id)
+        self.count += 1
+        if len(self.buffer) >= self.batch:
+            self._flush()
+
+    def batches(self) -> Iterator[list[int]]:
+        self._flush()
+        self.file.seek(0)
+        while True:
+            chunk = array("q")
+            try:
+                chunk.fromfile(self.file, self.batch)
+            except EOFError:
+                # the last chunk is shorter
+                pass
+            if not chunk:
+                return
+            yield chunk.tolist()
+
+    def _flush(self) -> None:
+        self.buffer.tofile(self.file)
+        self.buffer = array("q")
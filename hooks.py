@@ -0,0 +1,99 @@
+import json
+import time
+import urllib.error
+import urllib.request
+from typing import Callable, Optional
+from rich import print
+from constants import Hooks, InfoText
+from database import Database
+
+
+class HookError(Exception):
+
+    def __init__(self, message: str, retry: bool = True):
+        super().__init__(message)
+        # a rejected request fails the same way again, an endpoint that is down may come back
+        self.retry = retry
+
+
+def post_events(url: str, events: list[dict], timeout: float = Hooks.TIMEOUT) -> None:
+    request = urllib.request.Request(
+        url,
+        data=json.dumps({"events": events}).encode(),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=timeout):
+            pass
+    except urllib.error.HTTPError as e:
+        raise HookError(f"{url} answered {e.code}", e.code >= 500 or e.code == 429)
+    except OSError as e:
+        raise HookError(f"{url} is not reachable: {e}")
+
+
+def to_event(row: tuple, user: str) -> dict:
+    row_id, op, date_, event, time_stamp, _ = row
+    # the id lets the endpoint skip an event it already got before a retry
+    return {
+        "id": row_id,
+        "op": op,
+        "date": date_,
+        "event": event,
+        "time": time_stamp,
+        "user": user,
+    }
+
+
+class HookWorker:
+    # drains the outbox in order; a failed batch and all events after it wait for the next attempt
+
+    def __init__(
+        self,
+        db: Database,
+        url: str,
+        send: Callable[[str, list[dict]], None] = post_events,
+        batch: int = Hooks.BATCH,
+        poll: float = Hooks.POLL,
+        backoff: float = Hooks.BACKOFF,
+        max_backoff: float = Hooks.MAX_BACKOFF,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.db = db
+        self.url = url
+        self.send = send
+        self.batch = batch
+        self.poll = poll
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.sleep = sleep
+        self.delay = 0.0
+
+    def run(self, cycles: Optional[int] = None) -> None:
+        while cycles is None or cycles > 0:
+            self.drain()
+            self.sleep(self.delay or self.poll)
+            if cycles is not None:
+                cycles -= 1
+
+    def drain(self) -> int:
+        delivered = 0
+        while rows := self.db.get_outbox(self.batch):
+            ids = [row[0] for row in rows]
+            try:
+                self.send(self.url, [to_event(row, self.db.user) for row in rows])
+            except HookError as e:
+                if e.retry:
+                    self.db.retry_outbox(ids)
+                    attempts = rows[0][5]
+                    self.delay = min(self.backoff * 2**attempts, self.max_backoff)
+                    print(
+                        f"{InfoText.WARN_SYMBOL} {e}, retrying in {self.delay:g} seconds"
+                    )
+                    return delivered
+                print(f"{InfoText.WARN_SYMBOL} {e}, dropped {len(rows)} event(s)")
+            else:
+                delivered += len(rows)
+            self.db.delete_outbox(ids)
+            self.delay = 0.0
+        return delivered
@@ -0,0 +1,186 @@
+import os
+from codec import targets_version
+from constants import Log
+from memory import MemoryDatabase
+
+INSERT = "+"
+DELETE = "-"
+CHECKPOINT = "c"
+DAY_TOTAL = "t"
+
+
+class LogDatabase(MemoryDatabase):
+    # every change is one appended line, the state is replayed into memory on load.
+    # Row ids continue from the replayed ones, so only one process may write at a time;
+    # a process that only reads never changes the file.
+
+    def __init__(self, filename: str):
+        super().__init__(filename)
+        self.log = None
+        # end of the last complete line if the file ends with a torn one
+        self.torn: int | None = None
+        self.lines = self.replay()
+
+    def replay(self) -> int:
+        lines = 0
+        if not os.path.isfile(self.filename):
+            return lines
+        end = 0
+        with open(self.filename, "rb") as f:
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    # torn write of an interrupted process
+                    self.torn = end
+                    break
+                end += len(raw)
+                lines += 1
+                op, *fields = raw[:-1].decode("utf-8").split("\t")
+                if op == INSERT:
+                    row_id, date_, event, time_stamp, *labels = fields
+                    project, tags = labels or ("", "")
+                    super()._insert(
+                        date_,
+                        event,
+                        time_stamp,
+                        int(row_id),
+                        project,
+                        tuple(filter(None, tags.split(","))),
+                    )
+                elif op == DELETE:
+                    super()._delete(int(fields[0]))
+                elif op == CHECKPOINT:
+                    period, balance, *version = fields
+                    # checkpoints of other daily targets or holidays are stale
+                    if version == [targets_version()]:
+                        super().write_checkpoint(period, int(balance))
+                elif op == DAY_TOTAL:
+                    super().write_day_total(fields[0], int(fields[1]))
+        return lines
+
+    def close(self) -> None:
+        if self.log:
+            self.log.close()
+
+    def write_timestamp(
+        self,
+        event: str,
+        time_stamp: str,
+        date=None,
+        project=None,
+        tags=(),
+        day_total=None,
+    ) -> None:
+        # the timestamp and the new day total are one append, one fsync
+        date_ = date or self.date_today
+        row_id = super()._insert(date_, event, time_stamp, project=project, tags=tags)
+        lines = [
+            self._line(INSERT, row_id, date_, event, time_stamp, *self._labels(row_id))
+        ]
+        if day_total is not None:
+            super().write_day_total(date_, day_total)
+            lines.append(self._line(DAY_TOTAL, date_, day_total))
+        self._append(lines)
+
+    def write_timestamps(self, rows: list[tuple[str, str, str]]) -> None:
+        # one write for the whole batch, so it is appended completely or not at all
+        lines = []
+        for event, time_stamp, date_ in rows:
+            row_id = super()._insert(date_, event, time_stamp)
+            lines.append(self._line(INSERT, row_id, date_, event, time_stamp))
+        self._append(lines)
+
+    def delete_rows(self, row_ids: list[int]) -> int:
+        deleted = []
+        for row_id in set(row_ids):
+            if super()._delete(row_id):
+                deleted.append(row_id)
+        self._append([self._line(DELETE, row_id) for row_id in deleted])
+        return len(deleted)
+
+    def write_checkpoint(self, period: str, balance: int) -> None:
+        super().write_checkpoint(period, balance)
+        self._append([self._line(CHECKPOINT, period, balance, targets_version())])
+
+    def write_day_total(self, date: str, seconds: int) -> None:
+        super().write_day_total(date, seconds)
+        self._append([self._line(DAY_TOTAL, date, seconds)])
+
+    def compact(self) -> None:
+        lines = [
+            self._line(INSERT, row_id, *row, *self._labels(row_id))
+            for row_id, row in sorted(self.rows.items())
+        ]
+        lines += [
+            self._line(CHECKPOINT, period, balance, targets_version())
+            for period, balance in sorted(self.checkpoints.items())
+        ]
+        lines += [
+            self._line(DAY_TOTAL, date_, seconds)
+            for date_, seconds in sorted(self.day_totals.items())
+        ]
+        if self.log:
+            self.log.close()
+        compacted = f"{self.filename}.compact"
+        with open(compacted, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(compacted, self.filename)
+        self.lines, self.torn = len(lines), None
+        self.log = open(self.filename, "a", encoding="utf-8")
+
+    def _insert(
+        self,
+        date_: str,
+        event: str,
+        time_stamp: str,
+        row_id=None,
+        project=None,
+        tags=(),
+    ) -> int:
+        row_id = super()._insert(date_, event, time_stamp, row_id, project, tags)
+        line = self._line(
+            INSERT, row_id, date_, event, time_stamp, *self._labels(row_id)
+        )
+        self._append([line])
+        return row_id
+
+    def _labels(self, row_id: int) -> tuple:
+        if row_id not in self.labels:
+            return ()
+        project, tags = self.labels[row_id]
+        return project, ",".join(tags)
+
+    def _delete(self, row_id: int) -> bool:
+        deleted = super()._delete(row_id)
+        if deleted:
+            self._append([self._line(DELETE, row_id)])
+        return deleted
+
+    def _append(self, lines: list[str]) -> None:
+        if not lines:
+            return
+        if not self.log and self._open_log():
+            # the compacted file already holds these changes
+            return
+        self.log.write("".join(lines))
+        self.log.flush()
+        os.fsync(self.log.fileno())
+
+    def _open_log(self) -> bool:
+        # on the first write only, so that readers like the notify daemon never rewrite the file
+        entries = len(self.rows) + len(self.checkpoints) + len(self.day_totals)
+        if self.lines > max(Log.COMPACT_MIN, Log.COMPACT_FACTOR * entries):
+            # deleted rows and replaced totals would be replayed by every later command
+            self.compact()
+            return True
+        if self.torn is not None:
+            # the next line would be glued onto the fragment
+            os.truncate(self.filename, self.torn)
+            self.torn = None
+        self.log = open(self.filename, "a", encoding="utf-8")
+        return False
+
+    @staticmethod
+    def _line(op: str, *fields) -> str:
+        return "\t".join((op, *map(str, fields))) + "\n"
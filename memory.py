@@ -0,0 +1,293 @@
+from bisect import insort
+from datetime import date, timedelta
+from typing import Any, Iterable, Iterator
+from codec import (
+    EventRecord,
+    calendar_day,
+    date_of,
+    format_date,
+    parse_date,
+    parse_datetime,
+)
+from constants import Event, Period
+
+
+class MemoryDatabase:
+
+    def __init__(self, filename: str = ":memory:"):
+        self.filename = filename
+        self.rows: dict[int, tuple[str, str, str]] = {}
+        # rowids per date, kept sorted by time for the per day queries
+        self.days: dict[str, list[tuple[str, int]]] = {}
+        self.checkpoints: dict[str, int] = {}
+        # worktime of the finished sessions per date, dropped on every change of the date
+        self.day_totals: dict[str, int] = {}
+        # project and tags of labelled timestamps
+        self.labels: dict[int, tuple[str, tuple[str, ...]]] = {}
+        self.last_rowid = 0
+        self.date_today = format_date(date.today())
+
+    def close(self) -> None:
+        pass
+
+    def write_timestamp(
+        self,
+        event: str,
+        time_stamp: str,
+        date=None,
+        project=None,
+        tags=(),
+        day_total=None,
+    ) -> None:
+        date_ = date or self.date_today
+        self._insert(date_, event, time_stamp, project=project, tags=tags)
+        if day_total is not None:
+            self.write_day_total(date_, day_total)
+
+    def write_timestamps(self, rows: list[tuple[str, str, str]]) -> None:
+        for event, time_stamp, date_ in rows:
+            self._insert(date_, event, time_stamp)
+
+    def get_times_by(self, event: str, ascending: bool = True) -> list[EventRecord]:
+        times = [
+            EventRecord(row_id, time_stamp, event)
+            for time_stamp, row_id in self.days.get(self.date_today, [])
+            if self.rows[row_id][1] == event
+        ]
+        return times if ascending else times[::-1]
+
+    def get_last_event(self) -> tuple | None:
+        day = self.days.get(self.date_today)
+        if not day:
+            return None
+        return (self.rows[day[-1][1]][1],)
+
+    def get_data_by_date(self, date: str) -> list[EventRecord]:
+        return [
+            EventRecord(row_id, time_stamp, self.rows[row_id][1])
+            for time_stamp, row_id in self.days.get(date, [])
+        ]
+
+    def get_data_between(self, start: str, end: str) -> list[EventRecord]:
+        return sorted(
+            (
+                EventRecord(row_id, time_stamp, event)
+                for row_id, (date_, event, time_stamp) in self.rows.items()
+                if start <= date_ <= end
+            ),
+            key=lambda record: record.time,
+        )
+
+    def get_rows_by_id(self, row_ids: list[int]) -> list[EventRecord]:
+        return sorted(
+            (
+                EventRecord(row_id, self.rows[row_id][2], self.rows[row_id][1])
+                for row_id in set(row_ids)
+                if row_id in self.rows
+            ),
+            key=lambda record: record.time,
+        )
+
+    def delete_row(self, row_id: int) -> bool:
+        return self._delete(row_id)
+
+    def delete_rows(self, row_ids: list[int]) -> int:
+        return sum(self._delete(row_id) for row_id in set(row_ids))
+
+    def delete_row_batches(self, batches: Iterable[list[int]]) -> int:
+        return sum(self.delete_rows(row_ids) for row_ids in batches)
+
+    def iter_timestamps(self) -> Iterator[Any]:
+        for date_ in sorted(self.days):
+            for time_stamp, row_id in list(self.days.get(date_, [])):
+                yield row_id, date_, self.rows[row_id][1], time_stamp
+
+    def get_timestamp_page(
+        self, start: str, end: str, limit: int, after: int | None = None
+    ) -> list[Any]:
+        key = None
+        if after is not None:
+            if after not in self.rows:
+                return []
+            key = (self.rows[after][0], self.rows[after][2], after)
+        page = []
+        for date_ in sorted(self.days):
+            if not start <= date_ <= end or (key and date_ < key[0]):
+                continue
+            for time_stamp, row_id in self.days[date_]:
+                if key and (date_, time_stamp, row_id) <= key:
+                    continue
+                page.append((row_id, date_, time_stamp, self.rows[row_id][1]))
+                if len(page) == limit:
+                    return page
+        return page
+
+    def get_dates_between(self, start: str, end: str) -> list[Any]:
+        return [(date_,) for date_ in sorted(self.days) if start <= date_ <= end]
+
+    def get_project_totals(
+        self, start: str, end: str, project=None, tag=None
+    ) -> list[Any]:
+        totals: dict[str, int] = {}
+        for session in self._sessions(start, end, tag):
+            if session[4] and project in (None, session[5]):
+                totals[session[5]] = totals.get(session[5], 0) + session[6]
+        return sorted(totals.items())
+
+    def get_daily_totals(
+        self, start: str, end: str, project=None, tag=None
+    ) -> list[Any]:
+        totals: dict[str, int] = {}
+        for session in self._sessions(start, end, tag):
+            if session[4] and project in (None, session[5]):
+                totals[session[0]] = totals.get(session[0], 0) + session[6]
+        return sorted(totals.items())
+
+    def get_session_data(self, date: str, project: str) -> list[EventRecord]:
+        rows = []
+        for _, start_id, start, stop_id, stop, project_, _ in self._sessions(
+            date, date
+        ):
+            if project_ == project:
+                rows.append(EventRecord(start_id, start, "start"))
+                if stop:
+                    rows.append(EventRecord(stop_id, stop, "stop"))
+        return sorted(rows, key=lambda record: record.time)
+
+    def get_calendar_span(self, period: str, date: str) -> tuple[str, str]:
+        index = self._period_index(period)
+        day = parse_date(date)
+        value = calendar_day(day)[index]
+        first = last = day
+        while calendar_day(first - timedelta(days=1))[index] == value:
+            first -= timedelta(days=1)
+        while calendar_day(last + timedelta(days=1))[index] == value:
+            last += timedelta(days=1)
+        return format_date(first), format_date(last)
+
+    def get_calendar_totals(
+        self, start: str, end: str, period: str, project=None, tag=None, now=None
+    ) -> list[Any]:
+        index = self._period_index(period)
+        totals: dict[str, list[int]] = {}
+        day = parse_date(start)
+        while day <= parse_date(end):
+            row = calendar_day(day)
+            totals.setdefault(row[index], [0, 0, 0])[2] += row[7]
+            day += timedelta(days=1)
+        worked: dict[str, int] = {}
+        for date_, _, start_time, _, stop_time, project_, seconds in self._sessions(
+            start, end, tag
+        ):
+            if project not in (None, project_):
+                continue
+            if not stop_time:
+                if not now or date_ != date_of(now):
+                    continue
+                seconds = int(
+                    (parse_datetime(now) - parse_datetime(start_time)).total_seconds()
+                )
+            worked[date_] = worked.get(date_, 0) + seconds
+        for date_, seconds in worked.items():
+            total = totals[calendar_day(parse_date(date_))[index]]
+            total[0] += 1
+            total[1] += seconds
+        return [(key, *total) for key, total in sorted(totals.items())]
+
+    def get_last_time(self, event: str) -> tuple | None:
+        for time_stamp, row_id in reversed(self.days.get(self.date_today, [])):
+            if self.rows[row_id][1] == event:
+                return (time_stamp,)
+        return None
+
+    def get_day_total(self, date: str) -> int | None:
+        return self.day_totals.get(date)
+
+    def write_day_total(self, date: str, seconds: int) -> None:
+        self.day_totals[date] = seconds
+
+    def get_last_checkpoint(self) -> tuple | None:
+        if not self.checkpoints:
+            return None
+        period = max(self.checkpoints)
+        return period, self.checkpoints[period]
+
+    def write_checkpoint(self, period: str, balance: int) -> None:
+        self.checkpoints[period] = balance
+
+    @staticmethod
+    def _period_index(period: str) -> int:
+        if period not in Period.ALL:
+            raise ValueError(f"Unknown period: {period}")
+        # calendar_day starts with the periods
+        return Period.ALL.index(period)
+
+    def _sessions(self, start: str, end: str, tag=None):
+        # same pairing as the SESSIONS query of the sqlite engine
+        for date_ in sorted(self.days):
+            if not start <= date_ <= end:
+                continue
+            times = {"start": [], "stop": []}
+            for time_stamp, row_id in self.days[date_]:
+                times[self.rows[row_id][1]].append((time_stamp, row_id))
+            stops = times["stop"]
+            for index, (start_time, start_id) in enumerate(times["start"]):
+                project, tags = self.labels.get(start_id, ("", ()))
+                if tag is not None and tag not in tags:
+                    continue
+                stop_time, stop_id = (
+                    stops[index] if index < len(stops) else (None, None)
+                )
+                seconds = None
+                if stop_time:
+                    seconds = int(
+                        (
+                            parse_datetime(stop_time) - parse_datetime(start_time)
+                        ).total_seconds()
+                    )
+                yield date_, start_id, start_time, stop_id, stop_time, project, seconds
+
+    def _insert(
+        self,
+        date_: str,
+        event: str,
+        time_stamp: str,
+        row_id=None,
+        project=None,
+        tags=(),
+    ) -> int:
+        self.last_rowid = max(self.last_rowid, row_id or self.last_rowid + 1)
+        row_id = row_id or self.last_rowid
+        self.rows[row_id] = (date_, event, time_stamp)
+        if project or tags:
+            self.labels[row_id] = (project or "", tuple(dict.fromkeys(tags)))
+        day = self.days.setdefault(date_, [])
+        appended = event == Event.START and (not day or day[-1][0] < time_stamp)
+        insort(day, (time_stamp, row_id))
+        # like the day_total_insert trigger, a start after the last row closes no session
+        if not appended or sum(self._balance(id_) for _, id_ in day) <= 0:
+            self.day_totals.pop(date_, None)
+        self._invalidate_checkpoints(date_)
+        return row_id
+
+    def _balance(self, row_id: int) -> int:
+        return 1 if self.rows[row_id][1] == Event.START else -1
+
+    def _delete(self, row_id: int) -> bool:
+        row = self.rows.pop(row_id, None)
+        if not row:
+            return False
+        self.labels.pop(row_id, None)
+        date_, _, time_stamp = row
+        day = self.days[date_]
+        day.remove((time_stamp, row_id))
+        if not day:
+            del self.days[date_]
+        self.day_totals.pop(date_, None)
+        self._invalidate_checkpoints(date_)
+        return True
+
+    def _invalidate_checkpoints(self, date_: str) -> None:
+        period = date_[:7]
+        for stale in [p for p in self.checkpoints if p >= period]:
+            del self.checkpoints[stale]
@@ -0,0 +1,154 @@
+import fcntl
+import os
+import sqlite3
+import time
+from sqlite3 import Connection
+from typing import Callable, Optional
+from constants import Metrics
+
+COMMAND_SECONDS = "ptymer_command_seconds"
+QUERIES = "ptymer_queries_total"
+DATABASE_BYTES = "ptymer_database_bytes"
+ROWS = "ptymer_rows"
+ROWS_UPDATED = "ptymer_rows_updated_seconds"
+
+# name, type, help and the sample names of each family, in the order of the file
+FAMILIES = (
+    (
+        COMMAND_SECONDS,
+        "histogram",
+        "Latency of the ptymer commands in seconds.",
+        (
+            f"{COMMAND_SECONDS}_bucket",
+            f"{COMMAND_SECONDS}_sum",
+            f"{COMMAND_SECONDS}_count",
+        ),
+    ),
+    (QUERIES, "counter", "SQL statements run by the ptymer commands.", (QUERIES,)),
+    (DATABASE_BYTES, "gauge", "Size of the database file in bytes.", (DATABASE_BYTES,)),
+    (ROWS, "gauge", "Rows per table of the database.", (ROWS,)),
+    (
+        ROWS_UPDATED,
+        "gauge",
+        "Unix time the rows per table were counted.",
+        (ROWS_UPDATED,),
+    ),
+)
+
+
+def parse_samples(text: str) -> dict[str, float]:
+    # samples of a file written by format_samples, keyed by name and labels
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            key, value = line.rsplit(" ", 1)
+            samples[key] = float(value)
+    return samples
+
+
+def format_samples(samples: dict[str, float]) -> str:
+    lines = []
+    for name, kind, help_, sample_names in FAMILIES:
+        family = [
+            (key, value)
+            for key, value in samples.items()
+            if key.split("{", 1)[0] in sample_names
+        ]
+        if not family:
+            continue
+        lines.append(f"# HELP {name} {help_}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(f"{key} {_format_value(value)}" for key, value in family)
+    return "\n".join(lines) + "\n"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _labels(**labels: str) -> str:
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels.items()) + "}"
+
+
+class Recorder:
+    # collects the queries of one command and merges them with its latency into the metrics file
+
+    def __init__(
+        self,
+        filename: str,
+        buckets: tuple[float, ...] = Metrics.BUCKETS,
+        rows_seconds: float = Metrics.ROWS_SECONDS,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.filename = filename
+        self.buckets = buckets
+        self.rows_seconds = rows_seconds
+        self.clock = clock
+        self.queries: dict[str, int] = {}
+        self.database: Optional[str] = None
+
+    def watch(self, con: Connection, database: str) -> None:
+        # the trace callback only exists while metrics are enabled, so disabled runs pay nothing per query
+        self.database = database
+        con.set_trace_callback(self.trace)
+
+    def trace(self, statement: str) -> None:
+        words = statement.split(None, 1)
+        kind = words[0].upper() if words else ""
+        self.queries[kind] = self.queries.get(kind, 0) + 1
+
+    def record(self, command: str, seconds: Optional[float]) -> None:
+        with open(self.filename + ".lock", "w") as lock:
+            # commands run in parallel processes, each one adds its values to the file
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                with open(self.filename) as f:
+                    samples = parse_samples(f.read())
+            except FileNotFoundError:
+                samples = {}
+            if seconds is not None:
+                self._add_latency(samples, command, seconds)
+            for kind, count in self.queries.items():
+                key = QUERIES + _labels(command=command, kind=kind)
+                samples[key] = samples.get(key, 0) + count
+            if self.database:
+                self._set_database(samples, self.database)
+            temp = self.filename + ".tmp"
+            with open(temp, "w") as f:
+                f.write(format_samples(samples))
+            # the node exporter never reads a half written file
+            os.replace(temp, self.filename)
+        self.queries = {}
+
+    def _add_latency(
+        self, samples: dict[str, float], command: str, seconds: float
+    ) -> None:
+        for bucket in self.buckets + (float("inf"),):
+            le = "+Inf" if bucket == float("inf") else f"{bucket:g}"
+            key = f"{COMMAND_SECONDS}_bucket" + _labels(command=command, le=le)
+            samples[key] = samples.get(key, 0) + (seconds <= bucket)
+        for suffix, value in (("_sum", seconds), ("_count", 1)):
+            key = COMMAND_SECONDS + suffix + _labels(command=command)
+            samples[key] = samples.get(key, 0) + value
+
+    def _set_database(self, samples: dict[str, float], database: str) -> None:
+        if not os.path.isfile(database):
+            return
+        samples[DATABASE_BYTES] = os.path.getsize(database)
+        now = self.clock()
+        if now - samples.get(ROWS_UPDATED, 0) < self.rows_seconds:
+            return
+        samples[ROWS_UPDATED] = int(now)
+        con = sqlite3.connect(f"file:{database}?mode=ro", uri=True)
+        try:
+            tables = con.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY name"
+            ).fetchall()
+            for (table,) in tables:
+                (count,) = con.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()
+                samples[ROWS + _labels(table=table)] = count
+        finally:
+            con.close()
+
+
+recorder = Recorder(Metrics.FILE) if Metrics.FILE else None
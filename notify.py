@@ -0,0 +1,164 @@
+import os
+import subprocess
+import time
+from datetime import datetime, timedelta
+from shutil import which
+from typing import Callable, NamedTuple, Optional, Protocol
+from constants import Event, Notify
+from codec import calendar_day, format_date, parse_date, parse_datetime
+from rich import print
+from storage import open_storage
+from timer import Timer
+
+
+class Notifier(Protocol):
+
+    def notify(self, title: str, message: str) -> None: ...
+
+
+class ConsoleNotifier:
+
+    def notify(self, title: str, message: str) -> None:
+        print(f"\a[bold]{title}[/bold] {message}")
+
+
+class DesktopNotifier:
+
+    def notify(self, title: str, message: str) -> None:
+        subprocess.run(
+            ["notify-send", "--app-name=ptymer", title, message], check=False
+        )
+
+
+class Alert(NamedTuple):
+    time: datetime
+    key: tuple
+    title: str
+    message: str
+
+
+def get_notifier() -> Notifier:
+    if which("notify-send"):
+        return DesktopNotifier()
+    return ConsoleNotifier()
+
+
+def calc_alerts(timer: Timer, now: datetime, break_after: timedelta) -> list[Alert]:
+    # moments the running session reaches the day's target or needs a break, sorted by time
+    last_start = timer.db.get_last_time(Event.START)
+    if timer.check_state_allowed(Event.START) or not last_start:
+        return []
+    day = parse_date(timer.db.date_today)
+    worktime = timer.calc_worktime_at(now)
+    started = parse_datetime(last_start[0])
+    alerts = []
+    target = timedelta(seconds=calendar_day(day)[-1])
+    if target:
+        alerts.append(
+            Alert(
+                now + max(target - worktime, timedelta()),
+                ("target", day),
+                "Work time is over",
+                f"You reached today's target of {target} hours.",
+            )
+        )
+    if break_after:
+        alerts.append(
+            Alert(
+                max(started + break_after, now),
+                ("break", last_start[0]),
+                "Time for a break",
+                f"You are working for {break_after} hours without a break.",
+            )
+        )
+    return sorted(alerts)
+
+
+class FileWatcher:
+    # cheap change check by size and modification time, the data is only read after a change
+
+    def __init__(
+        self,
+        filename: str,
+        interval: float = Notify.WATCH_SECONDS,
+        clock: Callable[[], datetime] = datetime.now,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.filename = filename
+        self.interval = interval
+        self.clock = clock
+        self.sleep = sleep
+        self.state = self._stat()
+
+    def mark(self) -> None:
+        self.state = self._stat()
+
+    def wait(self, deadline: Optional[datetime]) -> bool:
+        # True if the file changed before the deadline
+        while deadline is None or self.clock() < deadline:
+            remaining = (deadline - self.clock()).total_seconds() if deadline else None
+            self.sleep(
+                self.interval if remaining is None else min(self.interval, remaining)
+            )
+            if self._stat() != self.state:
+                return True
+        return False
+
+    def _stat(self) -> tuple:
+        # in WAL mode the writes go to the -wal file, the database itself only changes on a checkpoint
+        return tuple(map(_stat, (self.filename, self.filename + "-wal")))
+
+
+def _stat(filename: str) -> tuple | None:
+    try:
+        stat = os.stat(filename)
+    except FileNotFoundError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class NotifyDaemon:
+
+    def __init__(
+        self,
+        filename: str,
+        notifier: Notifier,
+        break_after: timedelta = timedelta(minutes=Notify.BREAK_AFTER),
+        watcher: Optional[FileWatcher] = None,
+        clock: Callable[[], datetime] = datetime.now,
+    ):
+        self.filename = filename
+        self.notifier = notifier
+        self.break_after = break_after
+        self.watcher = watcher or FileWatcher(filename, clock=clock)
+        self.clock = clock
+        self.sent: set[tuple] = set()
+
+    def run(self, cycles: Optional[int] = None) -> None:
+        while cycles is None or cycles > 0:
+            self.step()
+            if cycles is not None:
+                cycles -= 1
+
+    def step(self) -> None:
+        now = self.clock()
+        alerts = [alert for alert in self.schedule(now) if alert.key not in self.sent]
+        for alert in alerts:
+            if alert.time <= now:
+                self.notifier.notify(alert.title, alert.message)
+                self.sent.add(alert.key)
+        pending = [alert.time for alert in alerts if alert.time > now]
+        # the day changes at midnight even without new timestamps
+        midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+        self.watcher.wait(min(pending + [midnight]))
+
+    def schedule(self, now: datetime) -> list[Alert]:
+        self.watcher.mark()
+        if not os.path.isfile(self.filename):
+            return []
+        db = open_storage(self.filename)
+        db.date_today = format_date(now.date())
+        try:
+            return calc_alerts(Timer(db), now, self.break_after)
+        finally:
+            db.close()
@@ -0,0 +1,180 @@
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from typing import Callable, Iterable, Iterator, NamedTuple, Optional
+from codec import TimeStamp, format_date, parse_datetime
+from constants import Event, File, Period
+from storage import Storage, open_storage
+from timer import Timer
+
+# the coarser period of each report and the one it is grouped by
+GROUPS = {
+    Period.WEEK: Period.DATE,
+    Period.MONTH: Period.WEEK,
+    Period.YEAR: Period.MONTH,
+}
+
+
+class ClientError(Exception):
+    pass
+
+
+class Timestamp(NamedTuple):
+    id: int
+    time: datetime
+    event: str
+
+
+class Status(NamedTuple):
+    date: date
+    running: bool
+    worktime: timedelta
+    pausetime: Optional[timedelta]
+
+
+class DayTotal(NamedTuple):
+    date: date
+    worktime: timedelta
+
+
+class ProjectTotal(NamedTuple):
+    project: str
+    worktime: timedelta
+
+
+class PeriodTotal(NamedTuple):
+    key: str
+    days: int
+    worktime: timedelta
+    target: timedelta
+
+
+class Client:
+    # in-process access to the timestamps for scripts and tools, without typer, rich or printing.
+    # Every call takes explicit dates and times; the clock is only asked when they are left out.
+
+    def __init__(
+        self,
+        filename: str = File.NAME,
+        engine: str = File.ENGINE,
+        user: str = File.USER,
+        clock: Callable[[], datetime] = datetime.now,
+    ):
+        self.db: Storage = open_storage(filename, engine, user)
+        self.timer = Timer(self.db)
+        self.clock = clock
+
+    def __enter__(self) -> "Client":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.db.close()
+
+    def start(
+        self, at: Optional[datetime] = None, project=None, tags: Iterable[str] = ()
+    ) -> datetime:
+        return self._create(Event.START, at, project, list(tags))
+
+    def stop(self, at: Optional[datetime] = None) -> datetime:
+        return self._create(Event.STOP, at)
+
+    def status(self, day: Optional[date] = None) -> Status:
+        now = self.clock()
+        day = day or now.date()
+        with self._on(day):
+            if not self.db.get_last_event():
+                return Status(day, False, timedelta(), None)
+            running = not self.timer.check_state_allowed(Event.START)
+            if day < now.date():
+                # a start left open on an earlier day is dropped, like in the balance
+                worktime = self.timer.recalc_closed_worktime()
+            else:
+                worktime = self.timer.calc_worktime_at(now.replace(microsecond=0))
+            return Status(day, running, worktime, self.timer.calc_pausetime())
+
+    def add(self, entries: Iterable[tuple[datetime, str]]) -> int:
+        # all entries are checked first and written in one transaction
+        rows = []
+        for time_stamp, event in entries:
+            if event not in (Event.START, Event.STOP):
+                raise ClientError(f"Incorrect event: {event}")
+            value = TimeStamp.of(time_stamp.replace(microsecond=0))
+            rows.append((event, value.time, value.date))
+        if rows:
+            self.db.write_timestamps(rows)
+        return len(rows)
+
+    def delete(self, ids: Iterable[int]) -> int:
+        # all ids are removed in one transaction, unknown ids are skipped
+        ids = list(ids)
+        return self.db.delete_rows(ids) if ids else 0
+
+    def timestamps(self, day: Optional[date] = None) -> list[Timestamp]:
+        day = day or self.clock().date()
+        return [
+            Timestamp(record.id, record.value, record.event)
+            for record in self.db.get_data_by_date(format_date(day))
+        ]
+
+    def report(self, start: date, end: date, project=None, tag=None) -> list[DayTotal]:
+        if project is None and tag is None:
+            durations = self.timer.calc_range(start, end)
+        else:
+            durations = self.timer.calc_labelled_days(start, end, project, tag)
+        return [DayTotal(*duration) for duration in durations]
+
+    def projects(self, start: date, end: date, tag=None) -> list[ProjectTotal]:
+        return [
+            ProjectTotal(*total)
+            for total in self.timer.calc_project_totals(start, end, None, tag)
+        ]
+
+    def period(
+        self, period: str, day: Optional[date] = None, project=None, tag=None
+    ) -> list[PeriodTotal]:
+        # totals of the week, month or year around the day, per day, week or month
+        if period not in GROUPS:
+            raise ClientError(f"Unknown period: {period}")
+        day = day or self.clock().date()
+        return [
+            PeriodTotal(*total)
+            for total in self.timer.calc_period(
+                period, GROUPS[period], day, project, tag
+            )
+        ]
+
+    def balance(self) -> timedelta:
+        return self.timer.calc_balance()
+
+    def _create(
+        self, event: str, at: Optional[datetime], project=None, tags=()
+    ) -> datetime:
+        at = (at or self.clock()).replace(microsecond=0)
+        with self._on(at.date()):
+            if not self.timer.check_state_allowed(event):
+                raise ClientError(
+                    f"Session already {'running' if event == Event.START else 'stopped'}"
+                )
+            # explicit times may lie before the other event, the clock never does
+            previous = self.db.get_last_time(
+                Event.STOP if event == Event.START else Event.START
+            )
+            if previous and parse_datetime(previous[0]) >= at:
+                raise ClientError(f"Timestamp {at} is not after {previous[0]}")
+            try:
+                self.timer.create_timestamp(event, project=project, tags=tags, at=at)
+            except Exception as e:
+                raise ClientError(str(e)) from e
+        return at
+
+    @contextmanager
+    def _on(self, day: date) -> Iterator[None]:
+        # the storage answers for its date_today, like Timer.calc_range does
+        today = self.db.date_today
+        self.db.date_today = format_date(day)
+        try:
+            yield
+        finally:
+            self.db.date_today = today
@@ -0,0 +1,205 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from threading import Lock
+from urllib.parse import parse_qs, urlsplit
+from codec import format_date, parse_date
+from constants import Event
+from database import Database
+from timer import Timer
+
+
+class ApiError(Exception):
+    pass
+
+
+class Api:
+    # all requests share one connection, so they take turns on it.
+    # The ETag is the changelog position, it changes with every written or imported timestamp.
+
+    def __init__(self, db: Database):
+        self.db = db
+        self.timer = Timer(db)
+        self.lock = Lock()
+        self.routes = {
+            "/state": (self.state, False),
+            "/today": (self.today, True),
+            "/week": (self.week, True),
+            "/range": (self.range, True),
+            "/projects": (self.projects, True),
+            "/timestamps": (self.timestamps, False),
+        }
+
+    def handle(self, path: str, query: dict, etag: str | None) -> tuple:
+        if path not in self.routes:
+            raise ApiError(f"Unknown endpoint {path}")
+        route, clock_dependent = self.routes[path]
+        with self.lock:
+            self.db.date_today = format_date(date.today())
+            version = f'W/"{self.db.get_last_seq()}-{self.db.date_today}"'
+            if clock_dependent and self._running():
+                # the worktime of a running session changes every second
+                version = None
+            if version and version == etag:
+                return HTTPStatus.NOT_MODIFIED, None, version
+            return HTTPStatus.OK, route(query), version
+
+    def state(self, query: dict) -> dict:
+        last_event = self.db.get_last_event()
+        return {
+            "date": self.db.date_today,
+            "running": self._running(),
+            "last_event": last_event[0] if last_event else None,
+        }
+
+    def today(self, query: dict) -> dict:
+        if not self.db.get_last_event():
+            return {"date": self.db.date_today, "worktime": 0, "pausetime": 0}
+        pausetime = self.timer.calc_pausetime()
+        return {
+            "date": self.db.date_today,
+            "running": self._running(),
+            "worktime": _seconds(self.timer.calc_worktime()),
+            "pausetime": _seconds(pausetime) if pausetime else 0,
+        }
+
+    def week(self, query: dict) -> dict:
+        offset = _get(query, "offset") or "0"
+        if not offset.isdigit():
+            raise ApiError(f"Incorrect offset {offset!r}")
+        return _days(self.timer.calc_week(_get(query, "project"), int(offset))[::-1])
+
+    def range(self, query: dict) -> dict:
+        start, end = self._dates(query)
+        project, tag = _get(query, "project"), _get(query, "tag")
+        if project is None and tag is None:
+            days = self.timer.calc_range(start, end)
+        else:
+            days = self.timer.calc_labelled_days(start, end, project, tag)
+        return {"from": format_date(start), "to": format_date(end), **_days(days)}
+
+    def projects(self, query: dict) -> dict:
+        start, end = self._dates(query)
+        totals = self.timer.calc_project_totals(start, end, tag=_get(query, "tag"))
+        return {
+            "from": format_date(start),
+            "to": format_date(end),
+            "projects": [
+                {"project": project, "worktime": _seconds(duration)}
+                for project, duration in totals
+            ],
+        }
+
+    def timestamps(self, query: dict) -> dict:
+        date_ = _get(query, "date") or self.db.date_today
+        _check_date(date_)
+        project = _get(query, "project")
+        if project is None:
+            entries = self.db.get_data_by_date(date_)
+        else:
+            entries = self.db.get_session_data(date_, project)
+        return {
+            "date": date_,
+            "timestamps": [
+                {"id": entry.id, "time": entry.time, "event": entry.event}
+                for entry in entries
+            ],
+        }
+
+    def _running(self) -> bool:
+        return not self.timer.check_state_allowed(Event.START)
+
+    def _dates(self, query: dict) -> tuple[date, date]:
+        start = _get(query, "from")
+        end = _get(query, "to") or self.db.date_today
+        if not start:
+            raise ApiError("Parameter from is required")
+        return _check_date(start), _check_date(end)
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # every connection holds a pool worker, so one request per connection and no waiting for a silent client
+    timeout = 5
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        try:
+            status, payload, etag = self.server.api.handle(
+                url.path, parse_qs(url.query), self.headers.get("If-None-Match")
+            )
+        except ApiError as e:
+            status, payload, etag = HTTPStatus.BAD_REQUEST, {"error": str(e)}, None
+        except Exception as e:
+            # e.g. a day with a stop but no start, the client still gets an answer it can parse
+            status, payload, etag = (
+                HTTPStatus.INTERNAL_SERVER_ERROR,
+                {"error": str(e)},
+                None,
+            )
+        body = b"" if payload is None else json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Connection", "close")
+        self.close_connection = True
+        if etag:
+            self.send_header("ETag", etag)
+        if payload is not None:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+class ApiServer(HTTPServer):
+    # like ThreadingHTTPServer, but with a fixed pool of worker threads
+
+    def __init__(self, address: tuple[str, int], db: Database, workers: int = 4):
+        super().__init__(address, ApiHandler)
+        self.api = Api(db)
+        self.pool = ThreadPoolExecutor(workers, thread_name_prefix="ptymer-api")
+
+    def process_request(self, request, client_address) -> None:
+        self.pool.submit(self._process_request, request, client_address)
+
+    def _process_request(self, request, client_address) -> None:
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _get(query: dict, name: str) -> str | None:
+    values = query.get(name)
+    return values[0] if values else None
+
+
+def _check_date(text: str) -> date:
+    try:
+        return parse_date(text)
+    except ValueError:
+        raise ApiError(f"Incorrect date {text!r}, use YYYY-MM-DD")
+
+
+def _seconds(duration) -> int:
+    return int(duration.total_seconds())
+
+
+def _days(days: list) -> dict:
+    return {
+        "days": [
+            {"date": format_date(date_), "worktime": _seconds(duration)}
+            for date_, duration in days
+        ],
+        "worktime": sum(_seconds(duration) for _, duration in days),
+    }
@@ -0,0 +1,90 @@
+from typing import Any, Iterable, Iterator, Protocol
+from codec import EventRecord
+from constants import File, Hooks
+from database import Database
+from logfile import LogDatabase
+from memory import MemoryDatabase
+
+
+class Storage(Protocol):
+    filename: str
+    date_today: str
+
+    def close(self) -> None: ...
+
+    def write_timestamp(
+        self,
+        event: str,
+        time_stamp: str,
+        date=None,
+        project=None,
+        tags=(),
+        day_total=None,
+    ) -> None: ...
+
+    def write_timestamps(self, rows: list[tuple[str, str, str]]) -> None: ...
+
+    def get_times_by(self, event: str, ascending: bool = True) -> list[EventRecord]: ...
+
+    def get_last_event(self) -> tuple | None: ...
+
+    def get_data_by_date(self, date: str) -> list[EventRecord]: ...
+
+    def get_data_between(self, start: str, end: str) -> list[EventRecord]: ...
+
+    def get_rows_by_id(self, row_ids: list[int]) -> list[EventRecord]: ...
+
+    def delete_row(self, row_id: int) -> bool: ...
+
+    def delete_rows(self, row_ids: list[int]) -> int: ...
+
+    def delete_row_batches(self, batches: Iterable[list[int]]) -> int: ...
+
+    def iter_timestamps(self) -> Iterator[Any]: ...
+
+    def get_timestamp_page(
+        self, start: str, end: str, limit: int, after: int | None = None
+    ) -> list[Any]: ...
+
+    def get_dates_between(self, start: str, end: str) -> list[Any]: ...
+
+    def get_project_totals(
+        self, start: str, end: str, project=None, tag=None
+    ) -> list[Any]: ...
+
+    def get_daily_totals(
+        self, start: str, end: str, project=None, tag=None
+    ) -> list[Any]: ...
+
+    def get_session_data(self, date: str, project: str) -> list[EventRecord]: ...
+
+    def get_calendar_span(self, period: str, date: str) -> tuple[str, str]: ...
+
+    def get_calendar_totals(
+        self, start: str, end: str, period: str, project=None, tag=None, now=None
+    ) -> list[Any]: ...
+
+    def get_last_time(self, event: str) -> tuple | None: ...
+
+    def get_day_total(self, date: str) -> int | None: ...
+
+    def write_day_total(self, date: str, seconds: int) -> None: ...
+
+    def get_last_checkpoint(self) -> tuple | None: ...
+
+    def write_checkpoint(self, period: str, balance: int) -> None: ...
+
+
+ENGINES = {"sqlite": Database, "memory": MemoryDatabase, "log": LogDatabase}
+
+
+def open_storage(
+    filename: str, engine: str = File.ENGINE, user: str = File.USER
+) -> Storage:
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown storage engine: {engine}")
+    if engine == "sqlite":
+        return Database(filename, user=user, outbox=bool(Hooks.URL))
+    if user:
+        raise ValueError(f"Multiple users are not supported by the {engine} engine")
+    return ENGINES[engine](filename)
@@ -0,0 +1,77 @@
+import gzip
+import json
+from uuid import uuid4
+from database import Database
+
+BUNDLE_VERSION = 1
+MACHINE_ID = "machine_id"
+EXPORT_SEQ = "export_seq"
+
+
+class BundleError(Exception):
+    pass
+
+
+def get_machine_id(db: Database) -> str:
+    machine_id = db.get_meta(MACHINE_ID)
+    if not machine_id:
+        machine_id = uuid4().hex
+        db.set_meta(MACHINE_ID, machine_id)
+    return machine_id
+
+
+def export_bundle(db: Database, file: str, full: bool = False) -> int:
+    # every user of a shared database exports their own changes
+    export_seq = f"{EXPORT_SEQ}:{db.user}" if db.user else EXPORT_SEQ
+    since = 0 if full else int(db.get_meta(export_seq) or 0)
+    changes = db.get_changes_since(since)
+    bundle = {
+        "version": BUNDLE_VERSION,
+        "origin": get_machine_id(db),
+        "changes": [list(change) for change in changes],
+    }
+    with gzip.open(file, "wt", encoding="utf-8") as f:
+        json.dump(bundle, f, separators=(",", ":"))
+    if changes:
+        db.set_meta(export_seq, str(changes[-1][0]))
+    return len(changes)
+
+
+def import_bundle(db: Database, file: str) -> int:
+    try:
+        with gzip.open(file, "rt", encoding="utf-8") as f:
+            bundle = json.load(f)
+    except (OSError, ValueError) as e:
+        raise BundleError(f"Couldn't read bundle {file}") from e
+    if not isinstance(bundle, dict):
+        raise BundleError(f"Malformed bundle {file}")
+    if bundle.get("version") != BUNDLE_VERSION:
+        raise BundleError(f"Unsupported bundle version {bundle.get('version')}")
+    origin = bundle.get("origin")
+    if (
+        not isinstance(origin, str)
+        or not isinstance(bundle.get("changes"), list)
+        or not all(map(_is_change, bundle["changes"]))
+    ):
+        raise BundleError(f"Malformed bundle {file}")
+    if origin == get_machine_id(db):
+        return 0
+    last_seq = db.get_sync_seq(origin)
+    changes = [change for change in bundle["changes"] if change[0] > last_seq]
+    if not changes:
+        return 0
+    return db.apply_changes(origin, changes)
+
+
+def _is_change(change) -> bool:
+    # [seq, op, date, event, time] as written by export_bundle
+    if not isinstance(change, list) or len(change) != 5:
+        return False
+    seq, op, date_, event, time_stamp = change
+    return (
+        type(seq) is int
+        and op in ("insert", "delete")
+        and event in ("start", "stop")
+        and isinstance(date_, str)
+        and isinstance(time_stamp, str)
+    )
@@ -1,8 +1,13 @@
 from unittest import TestCase
-from unittest.mock import patch
+from unittest.mock import MagicMock, call, patch
 
 from app import app
-from datetime import datetime, date
+from backup import BackupError, Snapshot
+from codec import EventRecord
+from database import Database
+from memory import MemoryDatabase
+from sync import BundleError
+from datetime import datetime, date, timedelta
 from typer.testing import CliRunner
 
 
@@ -121,7 +126,7 @@ class TestApp(TestCase):
         # given
         patch("app.Timer.check_state_allowed", return_value=True).start()
         patch("app.Timer.create_timestamp").start()
-        patch("app.Timer.calc_worktime", return_value="01:33:07").start()
+        patch("app.Timer.calc_closed_worktime", return_value="01:33:07").start()
         # when
         result = self.runner.invoke(app, ["stop"])
         # then
@@ -160,13 +165,16 @@ class TestApp(TestCase):
     def test_app_timestamps(self) -> None:
         # given
         date_ = "2024-01-01 17:00:00"
-        patch("app.Database.get_data_by_date", return_value=[(date_, "start")]).start()
+        patch(
+            "app.Database.get_data_by_date",
+            return_value=[EventRecord(1, date_, "start")],
+        ).start()
         output_day = patch("app.output_day").start()
         # when
         result = self.runner.invoke(app, ["timestamps", "2024-01-01"])
         # then
         self.assertEqual(0, result.exit_code)
-        output_day.assert_called_with([(date_, "start")])
+        output_day.assert_called_with([EventRecord(1, date_, "start")])
 
     def test_app_timestamps_no_db_file(self) -> None:
         # given
@@ -192,12 +200,15 @@ class TestApp(TestCase):
         today = patch("database.date", wraps=datetime).start()
         today.today.return_value = date(2024, 1, 1)
         date_ = "2024-01-01 17:00:00"
-        patch("app.Database.get_data_by_date", return_value=[(date_, "start")]).start()
+        patch(
+            "app.Database.get_data_by_date",
+            return_value=[EventRecord(1, date_, "start")],
+        ).start()
         # when
         result = self.runner.invoke(app, ["timestamps"])
         # then
         self.assertEqual(0, result.exit_code)
-        output_day.assert_called_with([(date_, "start")])
+        output_day.assert_called_with([EventRecord(1, date_, "start")])
 
     def test_app_timestamps_incorrect_date(self) -> None:
         # given
@@ -210,24 +221,101 @@ class TestApp(TestCase):
 
     def test_delete_deletes_successfully(self) -> None:
         # given
-        write_timestamp = patch("app.Database.delete_row").start()
+        patch(
+            "app.Database.get_rows_by_id",
+            return_value=[EventRecord(42, "2024-01-01 17:00:00", "start")],
+        ).start()
+        delete_rows = patch("app.Database.delete_rows", return_value=1).start()
         # when
         result = self.runner.invoke(app, ["delete", "42"])
         # then
         self.assertEqual(0, result.exit_code)
-        write_timestamp.assert_called_with(42)
+        delete_rows.assert_called_with([42])
         self.assertIn("Timestamp successfully removed", result.stdout)
 
     def test_delete_deletes_not_successfully(self) -> None:
         # given
-        write_timestamp = patch("app.Database.delete_row", return_value=False).start()
+        patch("app.Database.get_rows_by_id", return_value=[]).start()
+        delete_rows = patch("app.Database.delete_rows").start()
         # when
         result = self.runner.invoke(app, ["delete", "42"])
         # then
         self.assertEqual(0, result.exit_code)
-        write_timestamp.assert_called_with(42)
+        delete_rows.assert_not_called()
         self.assertIn("Removal of timestamp not possible", result.stdout)
 
+    def test_delete_multiple_rows_and_range(self) -> None:
+        # given
+        patch(
+            "app.Database.get_rows_by_id",
+            return_value=[
+                EventRecord(41, "2024-01-01 08:00:00", "start"),
+                EventRecord(42, "2024-01-01 17:00:00", "stop"),
+            ],
+        ).start()
+        get_data_between = patch(
+            "app.Database.get_data_between",
+            return_value=[
+                EventRecord(42, "2024-01-01 17:00:00", "stop"),
+                EventRecord(50, "2024-01-02 08:00:00", "start"),
+            ],
+        ).start()
+        delete_rows = patch("app.Database.delete_rows", return_value=3).start()
+        # when
+        result = self.runner.invoke(
+            app, ["delete", "41", "42", "--from", "2024-01-01", "--to", "2024-01-02"]
+        )
+        # then
+        self.assertEqual(0, result.exit_code)
+        get_data_between.assert_called_with("2024-01-01", "2024-01-02")
+        delete_rows.assert_called_once_with([41, 42, 50])
+        self.assertIn("3 timestamps successfully removed", result.stdout)
+
+    def test_delete_dry_run(self) -> None:
+        # given
+        entries = [EventRecord(42, "2024-01-01 17:00:00", "start")]
+        patch("app.Database.get_data_between", return_value=entries).start()
+        delete_rows = patch("app.Database.delete_rows").start()
+        output_entries = patch("app.output_entries").start()
+        # when
+        result = self.runner.invoke(
+            app, ["delete", "--from", "2024-01-01", "--dry-run"]
+        )
+        # then
+        self.assertEqual(0, result.exit_code)
+        delete_rows.assert_not_called()
+        output_entries.assert_called_once_with([(42, "2024-01-01 17:00:00", "start")])
+        self.assertIn("Dry run, nothing changed.", result.stdout)
+
+    def test_delete_unknown_ids_in_file(self) -> None:
+        # given
+        patch("app.read_lines", return_value=["41", "42"]).start()
+        patch(
+            "app.Database.get_rows_by_id",
+            return_value=[EventRecord(41, "2024-01-01 08:00:00", "start")],
+        ).start()
+        delete_rows = patch("app.Database.delete_rows").start()
+        # when
+        result = self.runner.invoke(app, ["delete", "--file", "ids.txt"])
+        # then
+        self.assertEqual(0, result.exit_code)
+        delete_rows.assert_not_called()
+        self.assertIn("unknown ids: 42", result.stdout)
+
+    def test_delete_without_rows(self) -> None:
+        # when
+        result = self.runner.invoke(app, ["delete"])
+        # then
+        self.assertEqual(0, result.exit_code)
+        self.assertIn("No timestamps to remove given.", result.stdout)
+
+    def test_delete_incorrect_date(self) -> None:
+        # when
+        result = self.runner.invoke(app, ["delete", "--from", "20240101"])
+        # then
+        self.assertEqual(0, result.exit_code)
+        self.assertIn("Incorrect date format. Use: YYYY-MM-DD", result.stdout)
+
     def test_delete_deletes_no_database(self) -> None:
         # given
         self.db_file_existing.return_value = False
@@ -239,17 +327,19 @@ class TestApp(TestCase):
 
     def test_date_time_is_successful(self) -> None:
         # given
-        write_timestamp = patch("app.Database.write_timestamp").start()
+        write_timestamps = patch("app.Database.write_timestamps").start()
         # when
         result = self.runner.invoke(app, ["add", "2024-01-01 22:23:42", "start"])
         # then
         self.assertEqual(0, result.exit_code)
-        write_timestamp.assert_called_with("start", "2024-01-01 22:23:42", "2024-01-01")
+        write_timestamps.assert_called_with(
+            [("start", "2024-01-01 22:23:42", "2024-01-01")]
+        )
         self.assertIn("Timestamp successfully added", result.stdout)
 
     def test_date_time_incorrect_format(self) -> None:
         # given
-        write_timestamp = patch("app.Database.write_timestamp").start()
+        write_timestamp = patch("app.Database.write_timestamps").start()
         # when
         result = self.runner.invoke(app, ["add", "2024+01+01 22:23:42", "start"])
         # then
@@ -261,7 +351,7 @@ class TestApp(TestCase):
 
     def test_date_time_incorrect_event(self) -> None:
         # given
-        write_timestamp = patch("app.Database.write_timestamp").start()
+        write_timestamp = patch("app.Database.write_timestamps").start()
         # when
         result = self.runner.invoke(app, ["add", "2024-01-01 22:23:42", "woop"])
         # then
@@ -277,3 +367,551 @@ class TestApp(TestCase):
         # then
         self.assertEqual(0, result.exit_code)
         self.assertIn("No data to show", result.stdout)
+
+    def test_add_multiple_timestamps(self) -> None:
+        # given
+        write_timestamps = patch("app.Database.write_timestamps").start()
+        patch("app.read_lines", return_value=["2024-01-02 17:00:00 stop"]).start()
+        # when
+        result = self.runner.invoke(
+            app, ["add", "2024-01-02 08:00:00", "start", "--file", "entries.txt"]
+        )
+        # then
+        self.assertEqual(0, result.exit_code)
+        write_timestamps.assert_called_once_with(
+            [
+                ("start", "2024-01-02 08:00:00", "2024-01-02"),
+                ("stop", "2024-01-02 17:00:00", "2024-01-02"),
+            ]
+        )
+        self.assertIn("2 timestamps successfully added", result.stdout)
+
+    def test_add_rejects_all_on_invalid_entry(self) -> None:
+        # given
+        write_timestamps = patch("app.Database.write_timestamps").start()
+        # when
+        result = self.runner.invoke(
+            app, ["add", "2024-01-02 08:00:00", "start", "2024-01-02", "stop"]
+        )
+        # then
+        self.assertEqual(0, result.exit_code)
+        write_timestamps.assert_not_called()
+        self.assertIn("Incorrect timestamp format", result.stdout)
+
+    def test_add_without_event(self) -> None:
+        # when
+        result = self.runner.invoke(app, ["add", "2024-01-02 08:00:00"])
+        # then
+        self.assertEqual(0, result.exit_code)
+        self.assertIn("Timestamps need to be given with an event", result.stdout)
+
+    def test_add_dry_run(self) -> None:
+        # given
+        write_timestamps = patch("app.Database.write_timestamps").start()
+        output_entries = patch("app.output_entries").start()
+        # when
+        result = self.runner.invoke(
+            app, ["add", "2024-01-02 08:00:00", "start", "--dry-run"]
+        )
+        # then
+        self.assertEqual(0, result.exit_code)
+        write_timestamps.assert_not_called()
+        output_entries.assert_called_once_with(
+            [("new", "2024-01-02 08:00:00", "start")]
+        )
+        self.assertIn("Dry run, nothing changed.", result.stdout)
+
+    def test_balance(self) -> None:
+        # given
+        patch("app.Timer.calc_balance", return_value=timedelta(hours=-2)).start()
+        # when
+        result = self.runner.invoke(app, ["balance"])
+        # then
+        self.assertEqual(0, result.exit_code)
+        self.assertIn("Overtime balance: -2:00:00 hours", result.stdout)
+
+    def test_balance_without_database(self) -> None:
+        # given
+        self.db_file_existing.return_value = False
+        # when
+        result = self.runner.invoke(app, ["balance"])
+        # then
+        self.assertEqual(0, result.exit_code)
+        self.assertIn("No data to show", result.stdout)
+
+    def test_sync_export(self) -> None:
+        # given
+        export_bundle = patch("app.export_bundle", return_value=3).start()
+        # when
+        result = self.runner.invoke(app, ["sync", "export", "bundle.gz", "--full"])
+        # then
+        self.assertEqual(0, result.exit_code)
+        export_bundle.assert_called_once()
+        self.assertEqual(("bundle.gz", True), export_bundle.call_args.args[1:])
+        self.assertIn("Exported 3 change(s) to bundle.gz.", result.stdout)
+
+    def test_sync_export_without_database(self) -> None:
+        # given
+        self.db_file_existing.return_value = False
+        # when
+        result = self.runner.invoke(app, ["sync", "export", "bundle.gz"])
+        # then
+        self.assertEqual(0, result.exit_code)
+        self.assertIn("No data to show", result.stdout)
+
+    def test_sync_import(self) -> None:
+        # given
+        patch("app.import_bundle", return_value=2).start()
+        # when
+        result = self.runner.invoke(app, ["sync", "import", "bundle.gz"])
+        # then
+        self.assertEqual(0, result.exit_code)
+        self.assertIn("Applied 2 change(s) from bundle.gz.", result.stdout)
+
+    def test_sync_import_invalid_bundle(self) -> None:
+        # given
+        patch("app.import_bundle", side_effect=BundleError("broken")).start()
+        # when
+        result = self.runner.invoke(app, ["sync", "import", "bundle.gz"])
+        # then
+        self.assertEqual(0, result.exit_code)
+        self.assertIn("broken", result.stdout)
+
+    def test_backup(self) -> None:
+        # given
+        patch("app.open_storage", return_value=MagicMock(spec=Database)).start()
+        backup_database = patch(
+            "backup.backup_database",
+            return_value=Snapshot(
+                "backups/ptymer-1.db.gz", 12, ["backups/ptymer-0.db.gz"]
+            ),
+        ).start()
+        # when
+        result = self.runner.invoke(app, ["backup", "--keep", "3"])
+        # then
+        self.assertEqual(0, result.exit_code)
+        self.assertEqual(("backups", 3), backup_database.call_args.args[1:])
+        self.assertIn(
+            "Snapshot backups/ptymer-1.db.gz written, 12 pages checked.", result.stdout
+        )
+        self.assertIn("Removed 1 old snapshot(s).", result.stdout)
+
+    def test_backup_without_changes(self) -> None:
+        # given
+        patch("app.open_storage", return_value=MagicMock(spec=Database)).start()
+        patch("backup.backup_database", return_value=Snapshot(None, 0, [])).start()
+        # when
+        result = self.runner.invoke(app, ["backup"])
+        # then
+        self.assertEqual(0, result.exit_code)
+        self.assertIn("No changes since the latest snapshot.", result.stdout)
+
+    def test_backup_failed(self) -> None:
+        # given
+        patch("app.open_storage", return_value=MagicMock(spec=Database)).start()
+        patch(
+            "backup.backup_database",
+            side_effect=BackupError("Integrity check of the snapshot failed"),
+        ).start()
+        # when
+        result = self.runner.invoke(app, ["backup"])
+        # then
+        self.assertEqual(0, result.exit_code)
+        self.assertIn("Integrity check of the snapshot failed", result.stdout)
+
+    def test_backup_other_engine(self) -> None:
+        # given
+        patch("app.open_storage", return_value=MagicMock(spec=MemoryDatabase)).start()
+        backup_database = patch("backup.backup_database").start()
+        # when
+        result = self.runner.invoke(app, ["backup"])
+        # then
+        self.assertEqual(0, result.exit_code)
+        backup_database.assert_not_called()
+        self.assertIn("only supported by the sqlite engine", result.stdout)
+
+    def test_hooks_once(self) -> None:
+        # given
+        patch("app.Database").start()
+        worker = patch("hooks.HookWorker").start()
+        worker.return_value.drain.return_value = 3
+        # when
+        result = self.runner.invoke(
+            app, ["hooks", "--url", "http://127.0.0.1:9000/events", "--once"]
+        )
+        # then
+        self.assertEqual(0, result.exit_code)
+        self.assertEqual("http://127.0.0.1:9000/events", worker.call_args.args[1])
+        worker.return_value.run.assert_not_called()
+        self.assertIn("Delivered 3 event(s).", result.stdout)
+
+    def test_hooks_run(self) -> None:
+        # given
+        database = patch("app.Database").start()
+        worker = patch("hooks.HookWorker").start()
+        worker.return_value.run.side_effect = KeyboardInterrupt
+        # when
+        result = self.runner.invoke(
+            app, ["hooks", "--url", "http://127.0.0.1:9000/events"]
+        )
+        # then
+        self.assertEqual(0, result.exit_code)
+        worker.return_value.run.assert_called_once()
+        database.return_value.close.assert_called_once()
+
+    def test_hooks_without_url(self) -> None:
+        # given
+        worker = patch("hooks.HookWorker").start()
+        # when
+        result = self.runner.invoke(app, ["hooks"])
+        # then
+        self.assertEqual(0, result.exit_code)
+        worker.assert_not_called()
+        self.assertIn("No hook endpoint", result.stdout)
+
+    def test_week_with_offset(self) -> None:
+        # given
+        calc_week = patch("app.Timer.calc_week", return_value=[]).start()
+        # when
+        result = self.runner.invoke(app, ["week", "--offset", "2"])
+        # then
+        self.assertEqual(0, result.exit_code)
+        calc_week.assert_called_once_with(None, 2)
+
+    def test_month(self) -> None:
+        # given
+        periods = [("2024-W01", 1, timedelta(hours=8), timedelta(hours=40))]
+        calc_month = patch("app.Timer.calc_month", return_value=periods).start()
+        output_periods = patch("app.output_periods").start()
+        # when
+        result = self.runner.invoke(app, ["month", "--offset", "1", "--tag", "dev"])
+        # then
+        self.assertEqual(0, result.exit_code)
+        calc_month.assert_called_once_with(1, None, "dev")
+        output_periods.assert_called_once_with(periods, "Week")
+
+    def test_year_without_data(self) -> None:
+        # given
+        periods = [("2024-01", 0, timedelta(), timedelta(hours=160))]
+        patch("app.Timer.calc_year", return_value=periods).start()
+        # when
+        result = self.runner.invoke(app, ["year"])
+        # then
+        self.assertEqual(0, result.exit_code)
+        self.assertIn("No data to show", result.stdout)
+
+    def test_year_without_database(self) -> None:
+        # given
+        self.db_file_existing.return_value = False
+        # when
+        result = self.runner.invoke(app, ["year"])
+        # then
+        self.assertEqual(0, result.exit_code)
+        self.assertIn("No data to show", result.stdout)
+
+    def test_metrics(self) -> None:
+        # given
+        recorder = patch("app.recorder").start()
+        patch("app.perf_counter", side_effect=[10.0, 10.25]).start()
+        patch("app.Timer.calc_week", return_value=[]).start()
+        # when
+        result = self.runner.invoke(app, ["week"])
+        # then
+        self.assertEqual(0, result.exit_code)
+        recorder.record.assert_called_once_with("week", 0.25)
+
+    def test_metrics_of_long_running_command(self) -> None:
+        # given
+        recorder = patch("app.recorder").start()
+        patch("app.perf_counter", return_value=10.0).start()
+        # when
+        result = self.runner.invoke(app, ["hooks"])
+        # then
+        self.assertEqual(0, result.exit_code)
+        recorder.record.assert_called_once_with("hooks", None)
+
+    def test_doctor(self) -> None:
+        # given
+        open_storage = patch("app.open_storage").start()
+        db = open_storage.return_value
+        db.date_today = "2024-01-05"
+        db.iter_timestamps.return_value = [
+            (1, "2024-01-01", "stop", "2024-01-01 07:00:00"),
+            (2, "2024-01-01", "start", "2024-01-01 08:00:00"),
+        ]
+        # when
+        result = self.runner.invoke(app, ["doctor"])
+        # then
+        self.assertEqual(0, result.exit_code)
+        self.assertIn(
+            "2024-01-01 #1 2024-01-01 07:00:00: stop without start", result.stdout
+        )
+        self.assertIn("2 issue(s) found, 1 can be fixed with --fix.", result.stdout)
+        db.delete_row_batches.assert_not_called()
+
+    def test_doctor_fix(self) -> None:
+        # given
+        open_storage = patch("app.open_storage").start()
+        db = open_storage.return_value
+        db.date_today = "2024-01-05"
+        db.iter_timestamps.return_value = [
+            (1, "2024-01-01", "stop", "2024-01-01 07:00:00"),
+        ]
+        db.delete_row_batches.side_effect = lambda batches: len(list(batches))
+        # when
+        result = self.runner.invoke(app, ["doctor", "--fix"])
+        # then
+        self.assertEqual(0, result.exit_code)
+        self.assertIn("Removed 1 timestamp(s).", result.stdout)
+
+    def test_doctor_without_issues(self) -> None:
+        # given
+        open_storage = patch("app.open_storage").start()
+        open_storage.return_value.iter_timestamps.return_value = []
+        # when
+        result = self.runner.invoke(app, ["doctor"])
+        # then
+        self.assertEqual(0, result.exit_code)
+        self.assertIn("No inconsistencies found.", result.stdout)
+
+    def test_notify(self) -> None:
+        # given
+        daemon = patch("notify.NotifyDaemon").start()
+        daemon.return_value.run.side_effect = KeyboardInterrupt
+        notifier = patch("notify.get_notifier").start()
+        # when
+        result = self.runner.invoke(app, ["notify", "--break-after", "90"])
+        # then
+        self.assertEqual(0, result.exit_code)
+        daemon.assert_called_once_with(
+            "ptymer.db", notifier.return_value, timedelta(minutes=90)
+        )
+        self.assertIn("Watching ptymer.db", result.stdout)
+
+    def test_serve(self) -> None:
+        # given
+        patch("app.Database").start()
+        server = patch("server.ApiServer").start()
+        server.return_value.server_port = 8080
+        server.return_value.serve_forever.side_effect = KeyboardInterrupt
+        # when
+        result = self.runner.invoke(app, ["serve", "--port", "8080", "--workers", "2"])
+        # then
+        self.assertEqual(0, result.exit_code)
+        self.assertEqual(("127.0.0.1", 8080), server.call_args.args[0])
+        self.assertEqual(2, server.call_args.args[2])
+        self.assertIn("Serving on http://127.0.0.1:8080", result.stdout)
+        server.return_value.server_close.assert_called_once()
+
+    def test_serve_with_other_engine(self) -> None:
+        # given
+        patch("app.File.ENGINE", "log").start()
+        server = patch("server.ApiServer").start()
+        # when
+        result = self.runner.invoke(app, ["serve"])
+        # then
+        self.assertEqual(0, result.exit_code)
+        self.assertIn("only supported by the sqlite engine", result.stdout)
+        server.assert_not_called()
+
+    def test_archive(self) -> None:
+        # given
+        update_archive = patch("app.update_archive").start()
+        update_archive.return_value.days = [1, 2, 3]
+        update_archive.return_value.until = date(2024, 1, 1)
+        # when
+        result = self.runner.invoke(app, ["archive"])
+        # then
+        self.assertEqual(0, result.exit_code)
+        self.assertIn("Archived 3 days until 2024-01-01.", result.stdout)
+        update_archive.return_value.close.assert_called_once()
+
+    def test_archive_without_database(self) -> None:
+        # given
+        self.db_file_existing.return_value = False
+        # when
+        result = self.runner.invoke(app, ["archive"])
+        # then
+        self.assertEqual(0, result.exit_code)
+        self.assertIn("No data to show", result.stdout)
+
+    def test_report(self) -> None:
+        # given
+        durations = [(date(2024, 1, 1), timedelta(hours=8))]
+        calc_range = patch("app.Timer.calc_range", return_value=durations).start()
+        patch("app.archive_file_existing", return_value=False).start()
+        output_report = patch("app.output_report").start()
+        # when
+        result = self.runner.invoke(app, ["report", "2024-01-01", "2024-01-31"])
+        # then
+        self.assertEqual(0, result.exit_code)
+        calc_range.assert_called_once_with(date(2024, 1, 1), date(2024, 1, 31), None)
+        output_report.assert_called_once_with(durations)
+
+    def test_report_with_archive(self) -> None:
+        # given
+        calc_range = patch("app.Timer.calc_range", return_value=[]).start()
+        patch("app.archive_file_existing", return_value=True).start()
+        update_archive = patch("app.update_archive").start()
+        # when
+        result = self.runner.invoke(app, ["report", "2024-01-01", "2024-01-31"])
+        # then
+        self.assertEqual(0, result.exit_code)
+        calc_range.assert_called_once_with(
+            date(2024, 1, 1), date(2024, 1, 31), update_archive.return_value
+        )
+        self.assertIn("No data to show", result.stdout)
+
+    def test_report_incorrect_date(self) -> None:
+        # when
+        result = self.runner.invoke(app, ["report", "2024-01-01", "01.02.2024"])
+        # then
+        self.assertEqual(0, result.exit_code)
+        self.assertIn("Incorrect date format. Use: YYYY-MM-DD", result.stdout)
+
+    def test_start_with_project(self) -> None:
+        # given
+        patch("app.Timer.check_state_allowed", return_value=True).start()
+        create_timestamp = patch("app.Timer.create_timestamp").start()
+        # when
+        result = self.runner.invoke(
+            app, ["start", "--project", "acme", "--tag", "dev", "--tag", "call"]
+        )
+        # then
+        self.assertEqual(0, result.exit_code)
+        create_timestamp.assert_called_once_with("start", 0, "acme", ["dev", "call"])
+
+    def test_start_with_invalid_tag(self) -> None:
+        # given
+        create_timestamp = patch("app.Timer.create_timestamp").start()
+        # when
+        result = self.runner.invoke(app, ["start", "--tag", "a,b"])
+        # then
+        self.assertEqual(0, result.exit_code)
+        create_timestamp.assert_not_called()
+        self.assertIn("Project and tag names must not be empty", result.stdout)
+
+    def test_week_for_project(self) -> None:
+        # given
+        calc_week = patch("app.Timer.calc_week", return_value=[]).start()
+        # when
+        result = self.runner.invoke(app, ["week", "--project", "acme"])
+        # then
+        self.assertEqual(0, result.exit_code)
+        calc_week.assert_called_once_with("acme", 0)
+
+    def test_timestamps_for_project(self) -> None:
+        # given
+        entries = [(1, "2024-01-01 08:00:00", "start")]
+        get_session_data = patch(
+            "app.Database.get_session_data", return_value=entries
+        ).start()
+        output_day = patch("app.output_day").start()
+        # when
+        result = self.runner.invoke(
+            app, ["timestamps", "2024-01-01", "--project", "acme"]
+        )
+        # then
+        self.assertEqual(0, result.exit_code)
+        get_session_data.assert_called_once_with("2024-01-01", "acme")
+        output_day.assert_called_once_with(entries)
+
+    def test_timestamps_page(self) -> None:
+        # given
+        open_storage = patch("app.open_storage").start()
+        get_timestamp_page = open_storage.return_value.get_timestamp_page
+        get_timestamp_page.return_value = [
+            (3, "2024-01-02", "2024-01-02 08:00:00", "start"),
+            (4, "2024-01-02", "2024-01-02 12:00:00", "stop"),
+            (5, "2024-01-03", "2024-01-03 08:00:00", "start"),
+        ]
+        output_entries = patch("app.output_entries").start()
+        # when
+        result = self.runner.invoke(
+            app,
+            ["timestamps", "--from", "2024-01-01", "--to", "2024-01-31"]
+            + ["--limit", "2", "--after", "2"],
+        )
+        # then
+        self.assertEqual(0, result.exit_code)
+        get_timestamp_page.assert_called_once_with("2024-01-01", "2024-01-31", 3, 2)
+        output_entries.assert_called_once_with(
+            [(3, "2024-01-02 08:00:00", "start"), (4, "2024-01-02 12:00:00", "stop")]
+        )
+        self.assertIn("More timestamps with: --after 4", result.stdout)
+
+    def test_timestamps_pages(self) -> None:
+        # given
+        patch("app.Page.SIZE", 1).start()
+        open_storage = patch("app.open_storage").start()
+        get_timestamp_page = open_storage.return_value.get_timestamp_page
+        get_timestamp_page.side_effect = [
+            [
+                (1, "2024-01-01", "2024-01-01 08:00:00", "start"),
+                (2, "2024-01-01", "2024-01-01 12:00:00", "stop"),
+            ],
+            [(2, "2024-01-01", "2024-01-01 12:00:00", "stop")],
+        ]
+        output_entries = patch("app.output_entries").start()
+        # when
+        result = self.runner.invoke(
+            app, ["timestamps", "--from", "2024-01-01", "--to", "2024-01-01"]
+        )
+        # then
+        self.assertEqual(0, result.exit_code)
+        get_timestamp_page.assert_has_calls(
+            [
+                call("2024-01-01", "2024-01-01", 2, None),
+                call("2024-01-01", "2024-01-01", 2, 1),
+            ]
+        )
+        self.assertEqual(2, output_entries.call_count)
+        self.assertNotIn("More timestamps", result.stdout)
+
+    def test_timestamps_page_with_project(self) -> None:
+        # given
+        open_storage = patch("app.open_storage").start()
+        # when
+        result = self.runner.invoke(
+            app, ["timestamps", "--from", "2024-01-01", "--project", "acme"]
+        )
+        # then
+        self.assertEqual(0, result.exit_code)
+        open_storage.assert_not_called()
+        self.assertIn("--project can't be combined with --from.", result.stdout)
+
+    def test_report_by_project(self) -> None:
+        # given
+        totals = [("acme", timedelta(hours=8))]
+        calc_project_totals = patch(
+            "app.Timer.calc_project_totals", return_value=totals
+        ).start()
+        output_projects = patch("app.output_projects").start()
+        # when
+        result = self.runner.invoke(
+            app, ["report", "2024-01-01", "2024-01-31", "--by-project", "--tag", "dev"]
+        )
+        # then
+        self.assertEqual(0, result.exit_code)
+        calc_project_totals.assert_called_once_with(
+            date(2024, 1, 1), date(2024, 1, 31), None, "dev"
+        )
+        output_projects.assert_called_once_with(totals)
+
+    def test_report_for_project(self) -> None:
+        # given
+        durations = [(date(2024, 1, 1), timedelta(hours=8))]
+        calc_labelled_days = patch(
+            "app.Timer.calc_labelled_days", return_value=durations
+        ).start()
+        output_report = patch("app.output_report").start()
+        # when
+        result = self.runner.invoke(
+            app, ["report", "2024-01-01", "2024-01-31", "--project", "acme"]
+        )
+        # then
+        self.assertEqual(0, result.exit_code)
+        calc_labelled_days.assert_called_once_with(
+            date(2024, 1, 1), date(2024, 1, 31), "acme", None
+        )
+        output_report.assert_called_once_with(durations)
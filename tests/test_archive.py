@@ -0,0 +1,167 @@
+from datetime import date, timedelta
+from os import path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+from archive import Archive, _columns, update_archive
+from database import Database
+from sync import export_bundle, import_bundle
+from timer import Timer
+
+
+class TestArchive(TestCase):
+
+    def setUp(self) -> None:
+        self.directory = TemporaryDirectory()
+        self.db = Database(path.join(self.directory.name, "ptymer.db"))
+        self.db.date_today = "2024-01-05"
+        self.filename = path.join(self.directory.name, "ptymer.col")
+        self.db.write_timestamps(
+            [
+                ("start", "2024-01-01 08:00:00", "2024-01-01"),
+                ("stop", "2024-01-01 12:00:00", "2024-01-01"),
+                ("start", "2024-01-01 13:00:00", "2024-01-01"),
+                ("stop", "2024-01-01 17:30:00", "2024-01-01"),
+                ("start", "2024-01-03 09:00:00", "2024-01-03"),
+                ("stop", "2024-01-03 10:00:00", "2024-01-03"),
+                ("start", "2024-01-05 08:00:00", "2024-01-05"),
+            ]
+        )
+
+    def tearDown(self) -> None:
+        self.db.close()
+        self.directory.cleanup()
+
+    def test_update_archive(self) -> None:
+        # when
+        archive = update_archive(self.db, self.filename)
+        # then
+        self.assertEqual(date(2024, 1, 5), archive.until)
+        self.assertEqual(
+            [
+                (date(2024, 1, 1), timedelta(hours=8, minutes=30)),
+                (date(2024, 1, 3), timedelta(hours=1)),
+            ],
+            archive.calc_days(date(2024, 1, 1), date(2024, 1, 31)),
+        )
+        archive.close()
+
+    def test_calc_total(self) -> None:
+        # given
+        archive = update_archive(self.db, self.filename)
+        for start, end, expected in (
+            (date(2024, 1, 1), date(2024, 1, 3), timedelta(hours=9, minutes=30)),
+            (date(2024, 1, 2), date(2024, 1, 3), timedelta(hours=1)),
+            (date(2024, 1, 2), date(2024, 1, 2), timedelta()),
+            (date(2023, 1, 1), date(2023, 12, 31), timedelta()),
+        ):
+            with self.subTest(f"{start} {end}"):
+                # when
+                result = archive.calc_total(start, end)
+                # then
+                self.assertEqual(expected, result)
+        archive.close()
+
+    def test_unchanged_archive_is_reused(self) -> None:
+        # given
+        update_archive(self.db, self.filename).close()
+        write = patch("archive._write").start()
+        self.addCleanup(patch.stopall)
+        # when
+        archive = update_archive(self.db, self.filename)
+        # then
+        write.assert_not_called()
+        archive.close()
+
+    def test_new_days_are_appended(self) -> None:
+        # given
+        update_archive(self.db, self.filename).close()
+        self.db.write_timestamp("stop", "2024-01-05 16:00:00")
+        self.db.date_today = "2024-01-08"
+        columns = patch("archive._columns", wraps=_columns).start()
+        self.addCleanup(patch.stopall)
+        # when
+        archive = update_archive(self.db, self.filename)
+        # then
+        columns.assert_called_once()
+        self.assertEqual(date(2024, 1, 8), archive.until)
+        self.assertEqual(
+            timedelta(hours=17, minutes=30),
+            archive.calc_total(date(2024, 1, 1), date(2024, 1, 7)),
+        )
+        archive.close()
+
+    def test_change_of_archived_day_rebuilds(self) -> None:
+        # given
+        update_archive(self.db, self.filename).close()
+        self.db.delete_rows([5, 6])
+        columns = patch("archive._columns").start()
+        self.addCleanup(patch.stopall)
+        # when
+        archive = update_archive(self.db, self.filename)
+        # then
+        columns.assert_not_called()
+        self.assertEqual(
+            [(date(2024, 1, 1), timedelta(hours=8, minutes=30))],
+            archive.calc_days(date(2024, 1, 1), date(2024, 1, 4)),
+        )
+        archive.close()
+
+    def test_imported_day_is_archived(self) -> None:
+        # given
+        update_archive(self.db, self.filename).close()
+        laptop = Database(path.join(self.directory.name, "laptop.db"))
+        laptop.write_timestamps(
+            [
+                ("start", "2024-01-02 08:00:00", "2024-01-02"),
+                ("stop", "2024-01-02 10:00:00", "2024-01-02"),
+            ]
+        )
+        bundle = path.join(self.directory.name, "bundle.gz")
+        export_bundle(laptop, bundle)
+        laptop.close()
+        import_bundle(self.db, bundle)
+        # when
+        archive = update_archive(self.db, self.filename)
+        # then
+        self.assertEqual(
+            [(date(2024, 1, 2), timedelta(hours=2))],
+            archive.calc_days(date(2024, 1, 2), date(2024, 1, 2)),
+        )
+        archive.close()
+
+    def test_range_is_the_same_with_and_without_archive(self) -> None:
+        # given
+        self.db.write_timestamps(
+            [
+                ("start", "2024-01-03 11:00:00", "2024-01-03"),
+                ("stop", "2024-01-04 09:00:00", "2024-01-04"),
+            ]
+        )
+        archive = update_archive(self.db, self.filename)
+        timer = Timer(self.db)
+        # when
+        archived = timer.calc_range(date(2024, 1, 1), date(2024, 1, 5), archive)
+        result = timer.calc_range(date(2024, 1, 1), date(2024, 1, 5))
+        # then
+        self.assertEqual(archived, result)
+        self.assertEqual((date(2024, 1, 3), timedelta(hours=1)), result[1])
+        archive.close()
+
+    def test_empty_archive(self) -> None:
+        # given
+        self.db.delete_rows(list(range(1, 8)))
+        # when
+        archive = update_archive(self.db, self.filename)
+        # then
+        self.assertEqual([], archive.calc_days(date.min, date.max))
+        self.assertEqual(timedelta(), archive.calc_total(date.min, date.max))
+        archive.close()
+
+    def test_invalid_file(self) -> None:
+        # given
+        with open(self.filename, "wb") as f:
+            f.write(b"\0" * 64)
+        # when / then
+        with self.assertRaises(ValueError):
+            Archive(self.filename)
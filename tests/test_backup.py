@@ -0,0 +1,196 @@
+import gzip
+import sqlite3
+from datetime import datetime
+from os import listdir, path
+from tempfile import TemporaryDirectory
+from threading import Event, Thread
+from time import perf_counter, sleep
+from unittest import TestCase
+from unittest.mock import patch
+from backup import BackupError, backup_database, list_snapshots
+from database import Database
+from sync import export_bundle, import_bundle
+
+connect = sqlite3.connect
+
+
+class CorruptConnection(sqlite3.Connection):
+
+    def execute(self, sql, *args):
+        if sql.startswith("PRAGMA integrity_check"):
+            return connect(":memory:").execute("SELECT 'page 2 is never used'")
+        return super().execute(sql, *args)
+
+
+class TestBackup(TestCase):
+
+    def setUp(self) -> None:
+        self.directory = TemporaryDirectory()
+        self.backups = path.join(self.directory.name, "backups")
+        self.db = Database(path.join(self.directory.name, "ptymer.db"))
+        self.db.write_timestamps(
+            [
+                ("start", "2024-01-01 08:00:00", "2024-01-01"),
+                ("stop", "2024-01-01 12:00:00", "2024-01-01"),
+            ]
+        )
+
+    def tearDown(self) -> None:
+        self.db.close()
+        self.directory.cleanup()
+
+    def restore(self, file: str) -> list[tuple]:
+        restored = path.join(self.directory.name, "restored.db")
+        with gzip.open(file, "rb") as f, open(restored, "wb") as target:
+            target.write(f.read())
+        con = connect(restored)
+        try:
+            return con.execute("SELECT date, event, time FROM timestamp").fetchall()
+        finally:
+            con.close()
+
+    def test_backup(self) -> None:
+        # when
+        result = backup_database(self.db, self.backups, now=datetime(2024, 1, 2, 8))
+        # then
+        self.assertEqual(
+            path.join(self.backups, "ptymer-20240102-080000-2.db.gz"), result.file
+        )
+        self.assertGreater(result.pages, 0)
+        self.assertEqual([], result.removed)
+        self.assertEqual(["ptymer-20240102-080000-2.db.gz"], listdir(self.backups))
+        self.assertEqual(
+            [
+                ("2024-01-01", "start", "2024-01-01 08:00:00"),
+                ("2024-01-01", "stop", "2024-01-01 12:00:00"),
+            ],
+            self.restore(result.file),
+        )
+
+    def test_backup_without_changes(self) -> None:
+        # given
+        backup_database(self.db, self.backups, now=datetime(2024, 1, 2, 8))
+        # when
+        result = backup_database(self.db, self.backups, now=datetime(2024, 1, 2, 9))
+        # then
+        self.assertIsNone(result.file)
+        self.assertEqual(1, len(list_snapshots(self.backups)))
+
+    def test_backup_after_sync_import(self) -> None:
+        # given
+        backup_database(self.db, self.backups, now=datetime(2024, 1, 2, 8))
+        laptop = Database(path.join(self.directory.name, "laptop.db"))
+        laptop.write_timestamp("start", "2024-01-02 08:00:00", "2024-01-02")
+        bundle = path.join(self.directory.name, "bundle.gz")
+        export_bundle(laptop, bundle)
+        laptop.close()
+        import_bundle(self.db, bundle)
+        # when
+        result = backup_database(self.db, self.backups, now=datetime(2024, 1, 2, 9))
+        # then
+        self.assertIsNotNone(result.file)
+        self.assertEqual(3, len(self.restore(result.file)))
+
+    def test_rotation(self) -> None:
+        # given
+        for hour in range(3):
+            self.db.write_timestamp(
+                "start", f"2024-01-03 {hour:02}:00:00", "2024-01-03"
+            )
+            backup_database(self.db, self.backups, now=datetime(2024, 1, 3, hour))
+        self.db.write_timestamp("stop", "2024-01-03 09:00:00", "2024-01-03")
+        # when
+        result = backup_database(
+            self.db, self.backups, keep=2, now=datetime(2024, 1, 3, 9)
+        )
+        # then
+        self.assertEqual(
+            [
+                path.join(self.backups, "ptymer-20240103-000000-3.db.gz"),
+                path.join(self.backups, "ptymer-20240103-010000-4.db.gz"),
+            ],
+            result.removed,
+        )
+        self.assertEqual(
+            ["ptymer-20240103-020000-5.db.gz", "ptymer-20240103-090000-6.db.gz"],
+            sorted(listdir(self.backups)),
+        )
+
+    def test_failed_integrity_check(self) -> None:
+        # given
+        patch(
+            "backup.sqlite3.connect",
+            lambda file: connect(file, factory=CorruptConnection),
+        ).start()
+        self.addCleanup(patch.stopall)
+        # when / then
+        with self.assertRaises(BackupError):
+            backup_database(self.db, self.backups)
+        self.assertEqual([], listdir(self.backups))
+
+    def write_during(self, backup, user: str = "", interval: float = 0.1) -> tuple:
+        # writes from a connection of its own, like a second ptymer process, while the backup runs
+        self.db.write_timestamps(
+            [
+                ("start", f"2023-01-01 {n % 24:02}:00:00", f"2023-01-{n % 28 + 1:02}")
+                for n in range(20000)
+            ]
+        )
+        latencies: list[float] = []
+        stopped = Event()
+
+        def write() -> None:
+            writer = Database(self.db.filename, user=user)
+            second = 0
+            while not stopped.is_set():
+                started = perf_counter()
+                writer.write_timestamp(
+                    "start", f"2024-02-01 08:00:{second:02}", "2024-02-01"
+                )
+                latencies.append(perf_counter() - started)
+                second = (second + 1) % 60
+                sleep(interval)
+            writer.close()
+
+        thread = Thread(target=write)
+        thread.start()
+        try:
+            return backup(), latencies
+        finally:
+            stopped.set()
+            thread.join()
+
+    def test_writes_during_backup(self) -> None:
+        # when
+        result, latencies = self.write_during(
+            lambda: backup_database(self.db, self.backups, pages=64, pause=0.001)
+        )
+        # then
+        self.assertIsNotNone(result.file)
+        self.assertTrue(latencies)
+        # the writer never waits for the whole copy, only for one step
+        self.assertLess(max(latencies), 0.5)
+
+    def test_writes_during_backup_in_wal_mode(self) -> None:
+        # given
+        self.db.close()
+        self.db = Database(self.db.filename, user="alice")
+        # when
+        result, latencies = self.write_during(
+            lambda: backup_database(self.db, self.backups), "alice", 0.005
+        )
+        # then
+        self.assertIsNotNone(result.file)
+        self.assertTrue(latencies)
+        self.assertLess(max(latencies), 0.5)
+
+    def test_backup_gives_up_after_restarts(self) -> None:
+        # when / then
+        with self.assertRaises(BackupError):
+            self.write_during(
+                lambda: backup_database(
+                    self.db, self.backups, pages=1, pause=0.01, restarts=2
+                ),
+                interval=0.001,
+            )
+        self.assertEqual([], listdir(self.backups))
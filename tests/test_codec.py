@@ -0,0 +1,182 @@
+import sqlite3
+from unittest import TestCase
+from unittest.mock import patch
+from codec import (
+    EventRecord,
+    TimeStamp,
+    calendar_day,
+    days_of_year,
+    date_of,
+    event_record,
+    format_date,
+    format_datetime,
+    format_time,
+    is_valid,
+    parse_date,
+    parse_datetime,
+    time_of,
+    to_epoch,
+    to_day,
+    from_day,
+)
+from datetime import date, datetime
+
+
+class TestCodec(TestCase):
+
+    def test_event_record(self) -> None:
+        # given
+        con = sqlite3.connect(":memory:")
+        cur = con.cursor()
+        cur.row_factory = event_record
+        # when
+        (record,) = cur.execute("SELECT 42, '2024-01-01 17:03:42', 'start'").fetchall()
+        # then
+        self.assertEqual(EventRecord(42, "2024-01-01 17:03:42", "start"), record)
+        self.assertEqual((42, "start"), (record.id, record.event))
+        self.assertFalse(hasattr(record, "__dict__"))
+        con.close()
+
+    def test_event_record_parses_once(self) -> None:
+        # given
+        record = EventRecord(42, "2024-01-01 17:03:42", "start")
+        parse = patch("codec.parse_datetime", wraps=parse_datetime).start()
+        self.addCleanup(patch.stopall)
+        # when
+        first, second = record.value, record.value
+        # then
+        self.assertEqual(datetime(2024, 1, 1, 17, 3, 42), first)
+        self.assertIs(first, second)
+        parse.assert_called_once_with("2024-01-01 17:03:42")
+
+    def test_parse_datetime(self) -> None:
+        # when
+        result = parse_datetime("2024-01-01 17:03:42")
+        # then
+        self.assertEqual(datetime(2024, 1, 1, 17, 3, 42), result)
+
+    def test_parse_datetime_rejects_other_formats(self) -> None:
+        for text in (
+            "2024-01-01T17:03:42",
+            "2024-01-01 17:03",
+            "20240101 17:03:42",
+            "2024-13-01 17:03:42",
+            "2024+01+01 17:03:42",
+        ):
+            with self.subTest(text):
+                # when / then
+                with self.assertRaises(ValueError):
+                    parse_datetime(text)
+
+    def test_parse_date(self) -> None:
+        # when
+        result = parse_date("2024-02-29")
+        # then
+        self.assertEqual(date(2024, 2, 29), result)
+
+    def test_parse_date_rejects_other_formats(self) -> None:
+        for text in ("20240101", "2024-02-30", "2024-01-01 17:00:00"):
+            with self.subTest(text):
+                # when / then
+                with self.assertRaises(ValueError):
+                    parse_date(text)
+
+    def test_format_datetime_drops_microseconds(self) -> None:
+        # when
+        result = format_datetime(datetime(2024, 1, 1, 8, 5, 3, 123456))
+        # then
+        self.assertEqual("2024-01-01 08:05:03", result)
+
+    def test_format_date(self) -> None:
+        # when
+        result = format_date(date(2024, 1, 2))
+        # then
+        self.assertEqual("2024-01-02", result)
+
+    def test_format_time(self) -> None:
+        # when
+        result = format_time(datetime(2024, 1, 1, 8, 5, 3, 123456))
+        # then
+        self.assertEqual("08:05:03", result)
+
+    def test_date_and_time_of(self) -> None:
+        # given
+        text = "2024-01-01 23:42:05"
+        # when / then
+        self.assertEqual("2024-01-01", date_of(text))
+        self.assertEqual("23:42:05", time_of(text))
+
+    def test_is_valid(self) -> None:
+        for text, format, expected in (
+            ("2024-01-01", "%Y-%m-%d", True),
+            ("20240101", "%Y-%m-%d", False),
+            ("2024-01-01 22:23:42", "%Y-%m-%d %H:%M:%S", True),
+            ("2024-01-01", "%Y-%m-%d %H:%M:%S", False),
+            ("22:23:42", "%H:%M:%S", True),
+        ):
+            with self.subTest(text):
+                # when
+                result = is_valid(text, format)
+                # then
+                self.assertEqual(expected, result)
+
+    def test_time_stamp(self) -> None:
+        # given
+        value = datetime(2024, 1, 1, 22, 23, 42)
+        # when
+        parsed = TimeStamp.parse("2024-01-01 22:23:42")
+        created = TimeStamp.of(value)
+        # then
+        self.assertEqual(TimeStamp("2024-01-01", "2024-01-01 22:23:42", value), parsed)
+        self.assertEqual(parsed, created)
+
+    def test_to_epoch(self) -> None:
+        for value in (
+            datetime(1970, 1, 1),
+            datetime(2024, 1, 1, 17, 3, 42),
+            datetime(1969, 12, 31, 23, 59, 59),
+        ):
+            with self.subTest(value):
+                # when
+                result = to_epoch(value)
+                # then
+                self.assertEqual(
+                    int((value - datetime(1970, 1, 1)).total_seconds()), result
+                )
+
+    def test_day_round_trip(self) -> None:
+        # when
+        day = to_day(date(2024, 1, 1))
+        # then
+        self.assertEqual(19723, day)
+        self.assertEqual(date(2024, 1, 1), from_day(day))
+
+    def test_calendar_day(self) -> None:
+        for value, expected in (
+            (
+                date(2024, 1, 1),
+                ("2024-01-01", "2024-W01", "2024-01", "2024-Q1", "2024", 1, 1, 28800),
+            ),
+            (
+                date(2021, 1, 2),
+                ("2021-01-02", "2020-W53", "2021-01", "2021-Q1", "2021", 6, 0, 0),
+            ),
+            (
+                date(2024, 12, 30),
+                ("2024-12-30", "2025-W01", "2024-12", "2024-Q4", "2024", 1, 1, 28800),
+            ),
+        ):
+            with self.subTest(value):
+                # when
+                result = calendar_day(value)
+                # then
+                self.assertEqual(expected, result)
+
+    def test_days_of_year(self) -> None:
+        # when
+        result = days_of_year(2024)
+        # then
+        self.assertEqual(366, len(result))
+        self.assertEqual(
+            (date(2024, 1, 1), date(2024, 12, 31)), (result[0], result[-1])
+        )
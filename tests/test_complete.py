@@ -0,0 +1,125 @@
+import subprocess
+import sys
+from os import path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+from complete import complete_dates, complete_entries, complete_ids, load_index
+from database import Database
+
+
+class TestComplete(TestCase):
+
+    def setUp(self) -> None:
+        self.directory = TemporaryDirectory()
+        self.database = path.join(self.directory.name, "ptymer.db")
+        self.cache = path.join(self.directory.name, "ptymer.cmp")
+        self.db = Database(self.database)
+        self.db.write_timestamps(
+            [
+                ("start", "2024-01-01 08:00:00", "2024-01-01"),
+                ("stop", "2024-01-01 12:00:00", "2024-01-01"),
+                ("start", "2024-01-02 09:00:00", "2024-01-02"),
+            ]
+        )
+        patch("complete.File.NAME", self.database).start()
+        patch("complete.File.COMPLETION", self.cache).start()
+
+    def tearDown(self) -> None:
+        patch.stopall()
+        self.db.close()
+        self.directory.cleanup()
+
+    def test_complete_ids(self) -> None:
+        # when
+        result = complete_ids("")
+        # then
+        self.assertEqual(
+            [
+                ("3", "2024-01-02 09:00:00 start"),
+                ("2", "2024-01-01 12:00:00 stop"),
+                ("1", "2024-01-01 08:00:00 start"),
+            ],
+            result,
+        )
+
+    def test_complete_dates(self) -> None:
+        # when
+        result = complete_dates("2024-01-0")
+        # then
+        self.assertEqual(
+            [("2024-01-02", "1 timestamps"), ("2024-01-01", "2 timestamps")],
+            result,
+        )
+
+    def test_complete_entries(self) -> None:
+        # when
+        date_ = complete_entries(["add", "2024-01-01 08:00:00", "start"], "2024-01-02")
+        event = complete_entries(["add", "--dry-run", "2024-01-02 08:00:00"], "st")
+        # then
+        self.assertEqual([("2024-01-02", "1 timestamps")], date_)
+        self.assertEqual([("start", ""), ("stop", "")], event)
+
+    def test_index_is_cached(self) -> None:
+        # given
+        load_index(self.database, self.cache)
+        # when
+        with patch("complete.sqlite3.connect") as connect:
+            load_index(self.database, self.cache)
+        # then
+        connect.assert_not_called()
+
+    def test_index_follows_changes(self) -> None:
+        # given
+        load_index(self.database, self.cache)
+        self.db.write_timestamp("stop", "2024-01-02 10:00:00", "2024-01-02")
+        # when
+        result = load_index(self.database, self.cache)
+        # then
+        self.assertEqual([4, "2024-01-02 10:00:00", "stop"], result["ids"][0])
+
+    def test_index_per_user(self) -> None:
+        # when
+        result = load_index(self.database, self.cache, "alice")
+        # then
+        self.assertEqual(([], []), (result["ids"], result["dates"]))
+
+    def test_index_without_database(self) -> None:
+        # when
+        result = load_index(path.join(self.directory.name, "missing.db"), self.cache)
+        # then
+        self.assertEqual([], result["ids"])
+
+    def test_import_without_cli(self) -> None:
+        # when
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import sys, complete; print(sorted({'typer', 'rich', 'database'} & set(sys.modules)))",
+            ],
+            capture_output=True,
+            text=True,
+            cwd=path.dirname(path.dirname(path.abspath(__file__))),
+        )
+        # then
+        self.assertEqual("[]", result.stdout.strip())
+
+    def test_bash_falls_back_to_typer(self) -> None:
+        # given
+        root = path.dirname(path.dirname(path.abspath(__file__)))
+        script = (
+            f'source <("{sys.executable}" "{path.join(root, "complete.py")}" bash); '
+            "COMP_WORDS=(app.py sh); COMP_CWORD=1; "
+            f'_ptymer_completion "{path.join(root, "app.py")}"; '
+            'printf "%s\\n" "${COMPREPLY[@]}"'
+        )
+        # when
+        result = subprocess.run(
+            ["bash", "-c", script],
+            capture_output=True,
+            text=True,
+            cwd=self.directory.name,
+        )
+        # then
+        self.assertEqual("show", result.stdout.strip())
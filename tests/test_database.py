@@ -1,7 +1,14 @@
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from os import path
+from tempfile import TemporaryDirectory
+from time import perf_counter
 from unittest import TestCase
-from unittest.mock import patch, call
+from unittest.mock import MagicMock, patch, call
+from codec import EventRecord
 from database import Database
-from datetime import date
+from datetime import date, timedelta
+from timer import Timer
 
 
 class TestDatabase(TestCase):
@@ -21,11 +28,13 @@ class TestDatabase(TestCase):
         # then
         sqlite.assert_has_calls(
             [
-                call.connect(self.filename),
+                call.connect(self.filename, check_same_thread=True),
                 call.connect().cursor(),
                 call.connect()
                 .cursor()
-                .execute("CREATE TABLE timestamp(date, event, time)"),
+                .execute(
+                    "CREATE TABLE timestamp(date, event, time, user NOT NULL DEFAULT '')"
+                ),
             ]
         )
 
@@ -42,12 +51,33 @@ class TestDatabase(TestCase):
     def test_db_load(self) -> None:
         # given
         patch("database.path.isfile", return_value=True).start()
-        con = patch("database.sqlite3.connect", return_value={}).start()
+        connection = MagicMock()
+        con = patch("database.sqlite3.connect", return_value=connection).start()
         # when
         db = Database(self.filename)
         # then
-        self.assertEqual({}, db.con)
-        con.assert_called_once_with(":memory:")
+        self.assertEqual(connection, db.con)
+        con.assert_called_once_with(":memory:", check_same_thread=True)
+
+    def test_db_load_with_metrics(self) -> None:
+        # given
+        patch("database.path.isfile", return_value=True).start()
+        connection = MagicMock()
+        patch("database.sqlite3.connect", return_value=connection).start()
+        recorder = patch("database.recorder").start()
+        # when
+        _ = Database(self.filename)
+        # then
+        recorder.watch.assert_called_once_with(connection, ":memory:")
+
+    def test_db_load_shared(self) -> None:
+        # given
+        patch("database.path.isfile", return_value=True).start()
+        con = patch("database.sqlite3.connect").start()
+        # when
+        _ = Database(self.filename, shared=True)
+        # then
+        con.assert_called_once_with(":memory:", check_same_thread=False)
 
     def test_create_timestamp(self) -> None:
         # given
@@ -55,10 +85,10 @@ class TestDatabase(TestCase):
         patch("app.Timer._check_valid_timestamp", return_value=True).start()
         con = patch("database.sqlite3").start()
         today = patch("database.date", wraps=date).start()
-        today.today.return_value = "2024-01-01"
+        today.today.return_value = date(2024, 1, 1)
         time_stamp = "2024-01-01 17:00:00"
         db = Database(self.filename)
-        expected_call = "INSERT INTO timestamp VALUES ('2024-01-01', 'start', '2024-01-01 17:00:00')"
+        values = ("2024-01-01", "start", "2024-01-01 17:00:00", "")
         con.reset_mock()
         # when
         db.write_timestamp("start", time_stamp)
@@ -66,7 +96,24 @@ class TestDatabase(TestCase):
         con.assert_has_calls(
             [
                 call.connect().cursor(),
-                call.connect().cursor().execute(expected_call),
+                call.connect()
+                .cursor()
+                .execute(
+                    "INSERT INTO timestamp(date, event, time, user) VALUES (?, ?, ?, ?)",
+                    values,
+                ),
+                call.connect()
+                .cursor()
+                .executemany(
+                    "INSERT INTO changelog(op, date, event, time, user) VALUES ('insert', ?, ?, ?, ?)",
+                    [values],
+                ),
+                call.connect()
+                .cursor()
+                .execute(
+                    "DELETE FROM checkpoint WHERE user = ? AND period >= ?",
+                    ("", "2024-01"),
+                ),
                 call.connect().commit(),
             ]
         )
@@ -74,13 +121,10 @@ class TestDatabase(TestCase):
     def test_last_event(self) -> None:
         # given
         today = patch("database.date", wraps=date).start()
-        today.today.return_value = "2024-01-01"
+        today.today.return_value = date(2024, 1, 1)
         patch("database.path.isfile", return_value=True).start()
         con = patch("database.sqlite3").start()
         db = Database(self.filename)
-        expected_call = (
-            "SELECT event FROM timestamp WHERE date='2024-01-01' ORDER BY time DESC"
-        )
         con.reset_mock()
         # when
         db.get_last_event()
@@ -88,7 +132,12 @@ class TestDatabase(TestCase):
         con.assert_has_calls(
             [
                 call.connect().cursor(),
-                call.connect().cursor().execute(expected_call),
+                call.connect()
+                .cursor()
+                .execute(
+                    "SELECT event FROM timestamp WHERE user = ? AND date = ? ORDER BY time DESC",
+                    ("", "2024-01-01"),
+                ),
                 call.connect().cursor().execute().fetchone(),
             ]
         )
@@ -96,7 +145,7 @@ class TestDatabase(TestCase):
     def test_get_times_by(self) -> None:
         # given
         today = patch("database.date", wraps=date).start()
-        today.today.return_value = "2024-01-01"
+        today.today.return_value = date(2024, 1, 1)
         patch("database.path.isfile", return_value=True).start()
         con = patch("database.sqlite3").start()
         db = Database(self.filename)
@@ -104,8 +153,8 @@ class TestDatabase(TestCase):
             for order in ("ASC", "DESC"):
                 with self.subTest(event):
                     expected_call = (
-                        f"SELECT time FROM timestamp WHERE date='2024-01-01' AND event='{event}' ORDER BY time "
-                        f"{order}"
+                        "SELECT rowid, time, event FROM timestamp WHERE user = ? AND date = ? AND event = ? "
+                        f"ORDER BY time {order}"
                     )
                 con.reset_mock()
                 # when
@@ -114,7 +163,9 @@ class TestDatabase(TestCase):
                 con.assert_has_calls(
                     [
                         call.connect().cursor(),
-                        call.connect().cursor().execute(expected_call),
+                        call.connect()
+                        .cursor()
+                        .execute(expected_call, ("", "2024-01-01", event)),
                         call.connect().cursor().execute().fetchall(),
                     ]
                 )
@@ -122,11 +173,11 @@ class TestDatabase(TestCase):
     def test_get_data_by_date(self) -> None:
         # given
         today = patch("database.date", wraps=date).start()
-        today.today.return_value = "2024-01-01"
+        today.today.return_value = date(2024, 1, 1)
         patch("database.path.isfile", return_value=True).start()
         con = patch("database.sqlite3").start()
         db = Database(self.filename)
-        expected_call = "SELECT rowid, time, event FROM timestamp WHERE date='2024-01-01' ORDER BY time ASC"
+        expected_call = "SELECT rowid, time, event FROM timestamp WHERE user = ? AND date = ? ORDER BY time ASC"
         con.reset_mock()
         # when
         db.get_data_by_date("2024-01-01")
@@ -134,7 +185,7 @@ class TestDatabase(TestCase):
         con.assert_has_calls(
             [
                 call.connect().cursor(),
-                call.connect().cursor().execute(expected_call),
+                call.connect().cursor().execute(expected_call, ("", "2024-01-01")),
                 call.connect().cursor().execute().fetchall(),
             ]
         )
@@ -142,13 +193,14 @@ class TestDatabase(TestCase):
     def test_delete_row(self) -> None:
         # given
         today = patch("database.date", wraps=date).start()
-        today.today.return_value = "2024-01-01"
+        today.today.return_value = date(2024, 1, 1)
         patch("database.path.isfile", return_value=True).start()
         con = patch("database.sqlite3").start()
         con.connect().cursor().rowcount = 1
+        con.connect().cursor().execute().fetchone.return_value = ("2024-01-01",)
 
         db = Database(self.filename)
-        expected_call = "DELETE FROM timestamp WHERE rowid='42'"
+        expected_call = "DELETE FROM timestamp WHERE rowid = ? AND user = ?"
         con.reset_mock()
         # when
         result = db.delete_row(42)
@@ -156,8 +208,13 @@ class TestDatabase(TestCase):
         self.assertEqual(True, result)
         con.assert_has_calls(
             [
-                call.connect().cursor(),
-                call.connect().cursor().execute(expected_call),
+                call.connect().cursor().execute(expected_call, (42, "")),
+                call.connect()
+                .cursor()
+                .execute(
+                    "DELETE FROM checkpoint WHERE user = ? AND period >= ?",
+                    ("", "2024-01"),
+                ),
                 call.connect().commit(),
             ]
         )
@@ -165,13 +222,14 @@ class TestDatabase(TestCase):
     def test_delete_row_not_successful(self) -> None:
         # given
         today = patch("database.date", wraps=date).start()
-        today.today.return_value = "2024-01-01"
+        today.today.return_value = date(2024, 1, 1)
         patch("database.path.isfile", return_value=True).start()
         con = patch("database.sqlite3").start()
         con.connect().cursor().rowcount = 0
+        con.connect().cursor().execute().fetchone.return_value = None
 
         db = Database(self.filename)
-        expected_call = "DELETE FROM timestamp WHERE rowid='42'"
+        expected_call = "DELETE FROM timestamp WHERE rowid = ? AND user = ?"
         con.reset_mock()
         # when
         result = db.delete_row(42)
@@ -179,8 +237,389 @@ class TestDatabase(TestCase):
         self.assertEqual(False, result)
         con.assert_has_calls(
             [
-                call.connect().cursor(),
-                call.connect().cursor().execute(expected_call),
+                call.connect().cursor().execute(expected_call, (42, "")),
                 call.connect().commit(),
             ]
         )
+
+    def test_get_dates_between(self) -> None:
+        # given
+        patch("database.path.isfile", return_value=True).start()
+        con = patch("database.sqlite3").start()
+        db = Database(self.filename)
+        expected_call = (
+            call.connect()
+            .cursor()
+            .execute(
+                "SELECT DISTINCT date FROM timestamp WHERE user = ? AND date >= ? AND date <= ? "
+                "ORDER BY date ASC",
+                ("", "2024-01-01", "2024-02-01"),
+            )
+        )
+        con.reset_mock()
+        # when
+        db.get_dates_between("2024-01-01", "2024-02-01")
+        # then
+        con.assert_has_calls([expected_call, expected_call.fetchall()])
+
+    def test_get_last_checkpoint(self) -> None:
+        # given
+        patch("database.path.isfile", return_value=True).start()
+        con = patch("database.sqlite3").start()
+        db = Database(self.filename)
+        expected_call = (
+            call.connect()
+            .cursor()
+            .execute(
+                "SELECT period, balance FROM checkpoint WHERE user = ? ORDER BY period DESC LIMIT 1",
+                ("",),
+            )
+        )
+        con.reset_mock()
+        # when
+        db.get_last_checkpoint()
+        # then
+        con.assert_has_calls([expected_call, expected_call.fetchone()])
+
+    def test_write_checkpoint(self) -> None:
+        # given
+        patch("database.path.isfile", return_value=True).start()
+        con = patch("database.sqlite3").start()
+        db = Database(self.filename)
+        con.reset_mock()
+        # when
+        db.write_checkpoint("2024-01", 3600)
+        # then
+        con.assert_has_calls(
+            [
+                call.connect()
+                .cursor()
+                .execute(
+                    "INSERT OR REPLACE INTO checkpoint VALUES (?, ?, ?)",
+                    ("", "2024-01", 3600),
+                ),
+                call.connect().commit(),
+            ]
+        )
+
+    def test_write_timestamps(self) -> None:
+        # given
+        patch("database.path.isfile", return_value=True).start()
+        con = patch("database.sqlite3").start()
+        db = Database(self.filename)
+        con.reset_mock()
+        # when
+        db.write_timestamps(
+            [
+                ("start", "2024-02-01 08:00:00", "2024-02-01"),
+                ("stop", "2024-01-31 17:00:00", "2024-01-31"),
+            ]
+        )
+        # then
+        con.assert_has_calls(
+            [
+                call.connect().__enter__(),
+                call.connect().cursor(),
+                call.connect()
+                .cursor()
+                .executemany(
+                    "INSERT INTO timestamp(date, event, time, user) VALUES (?, ?, ?, ?)",
+                    [
+                        ("2024-02-01", "start", "2024-02-01 08:00:00", ""),
+                        ("2024-01-31", "stop", "2024-01-31 17:00:00", ""),
+                    ],
+                ),
+                call.connect()
+                .cursor()
+                .executemany(
+                    "INSERT INTO changelog(op, date, event, time, user) VALUES ('insert', ?, ?, ?, ?)",
+                    [
+                        ("2024-02-01", "start", "2024-02-01 08:00:00", ""),
+                        ("2024-01-31", "stop", "2024-01-31 17:00:00", ""),
+                    ],
+                ),
+                call.connect()
+                .cursor()
+                .execute(
+                    "DELETE FROM checkpoint WHERE user = ? AND period >= ?",
+                    ("", "2024-01"),
+                ),
+                call.connect().__exit__(None, None, None),
+            ]
+        )
+
+    def test_get_rows_by_id(self) -> None:
+        # given
+        patch("database.path.isfile", return_value=True).start()
+        con = patch("database.sqlite3").start()
+        db = Database(self.filename)
+        con.reset_mock()
+        # when
+        db.get_rows_by_id([41, 42])
+        # then
+        con.assert_has_calls(
+            [
+                call.connect()
+                .cursor()
+                .execute(
+                    "SELECT rowid, time, event FROM timestamp WHERE rowid IN (?, ?) AND user = ? ORDER BY time ASC",
+                    [41, 42, ""],
+                ),
+                call.connect().cursor().execute().fetchall(),
+            ]
+        )
+
+    def test_get_data_between(self) -> None:
+        # given
+        patch("database.path.isfile", return_value=True).start()
+        con = patch("database.sqlite3").start()
+        db = Database(self.filename)
+        con.reset_mock()
+        # when
+        db.get_data_between("2024-01-01", "2024-01-07")
+        # then
+        con.assert_has_calls(
+            [
+                call.connect()
+                .cursor()
+                .execute(
+                    "SELECT rowid, time, event FROM timestamp WHERE user = ? AND date >= ? AND date <= ? "
+                    "ORDER BY time ASC",
+                    ("", "2024-01-01", "2024-01-07"),
+                ),
+                call.connect().cursor().execute().fetchall(),
+            ]
+        )
+
+    def test_delete_rows(self) -> None:
+        # given
+        patch("database.path.isfile", return_value=True).start()
+        con = patch("database.sqlite3").start()
+        con.connect().cursor().execute().fetchone.return_value = ("2024-01-01",)
+        con.connect().cursor().rowcount = 2
+        db = Database(self.filename)
+        con.reset_mock()
+        # when
+        result = db.delete_rows([41, 42])
+        # then
+        self.assertEqual(2, result)
+        con.assert_has_calls(
+            [
+                call.connect()
+                .cursor()
+                .execute(
+                    "INSERT INTO changelog(op, date, event, time, user) "
+                    "SELECT 'delete', date, event, time, user FROM timestamp WHERE rowid IN (?, ?) AND user = ?",
+                    [41, 42, ""],
+                ),
+                call.connect()
+                .cursor()
+                .execute(
+                    "DELETE FROM timestamp WHERE rowid IN (?, ?) AND user = ?",
+                    [41, 42, ""],
+                ),
+                call.connect()
+                .cursor()
+                .execute(
+                    "DELETE FROM checkpoint WHERE user = ? AND period >= ?",
+                    ("", "2024-01"),
+                ),
+                call.connect().__exit__(None, None, None),
+            ]
+        )
+
+    def test_get_events_between(self) -> None:
+        # given
+        patch("database.path.isfile", return_value=True).start()
+        con = patch("database.sqlite3").start()
+        db = Database(self.filename)
+        con.reset_mock()
+        # when
+        result = db.get_events_between("2024-01-01", "2024-01-31")
+        # then
+        con.assert_has_calls(
+            [
+                call.connect()
+                .cursor()
+                .execute(
+                    "SELECT date, event, time FROM timestamp WHERE user = ? AND date >= ? AND date <= ? "
+                    "ORDER BY date, time",
+                    ("", "2024-01-01", "2024-01-31"),
+                )
+            ]
+        )
+        self.assertEqual(con.connect().cursor().execute(), result)
+
+    def test_get_last_seq(self) -> None:
+        # given
+        patch("database.path.isfile", return_value=True).start()
+        con = patch("database.sqlite3").start()
+        db = Database(self.filename)
+        con.connect().cursor().execute().fetchone.return_value = (42,)
+        # when
+        result = db.get_last_seq()
+        # then
+        self.assertEqual(42, result)
+        con.connect().cursor().execute.assert_called_with(
+            "SELECT COALESCE(MAX(seq), 0) FROM changelog"
+        )
+
+    def test_get_first_changed_date(self) -> None:
+        # given
+        patch("database.path.isfile", return_value=True).start()
+        con = patch("database.sqlite3").start()
+        con.connect().cursor().execute().fetchone.return_value = ("2024-01-01",)
+        db = Database(self.filename)
+        # when
+        result = db.get_first_changed_date(42)
+        # then
+        self.assertEqual("2024-01-01", result)
+        con.connect().cursor().execute.assert_called_with(
+            "SELECT MIN(date) FROM changelog WHERE seq > ? AND user = ?", (42, "")
+        )
+
+
+class TestMultiUser(TestCase):
+
+    def setUp(self) -> None:
+        self.directory = TemporaryDirectory()
+        self.filename = path.join(self.directory.name, "ptymer.db")
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def open(self, user: str) -> Database:
+        db = Database(self.filename, user=user)
+        db.date_today = "2024-01-02"
+        return db
+
+    def test_users_are_separated(self) -> None:
+        # given
+        alice, bob = self.open("alice"), self.open("bob")
+        alice.write_timestamp("start", "2024-01-02 08:00:00")
+        alice.write_timestamp("stop", "2024-01-02 12:00:00")
+        bob.write_timestamp("start", "2024-01-02 09:00:00")
+        bob.write_day_total("2024-01-02", 60)
+        bob.write_checkpoint("2023-12", 120)
+        # when
+        result = (
+            alice.get_last_event(),
+            bob.get_last_event(),
+            alice.get_day_total("2024-01-02"),
+            alice.get_last_checkpoint(),
+            alice.delete_row(3),
+            len(alice.get_changes_since(0)),
+        )
+        # then
+        self.assertEqual((("stop",), ("start",), None, None, False, 2), result)
+        self.assertEqual(("2023-12", 120), bob.get_last_checkpoint())
+        self.assertEqual(
+            [EventRecord(3, "2024-01-02 09:00:00", "start")],
+            bob.get_data_by_date("2024-01-02"),
+        )
+        alice.close()
+        bob.close()
+
+    def test_migrate_single_user_file(self) -> None:
+        # given
+        con = sqlite3.connect(self.filename)
+        con.executescript("""
+            CREATE TABLE timestamp(date, event, time);
+            CREATE INDEX timestamp_date_time ON timestamp(date, time);
+            CREATE TABLE checkpoint(period PRIMARY KEY, balance);
+            CREATE TABLE sync_state(origin PRIMARY KEY, seq);
+            INSERT INTO timestamp VALUES ('2024-01-02', 'start', '2024-01-02 08:00:00');
+            INSERT INTO checkpoint VALUES ('2023-12', 120);
+            INSERT INTO sync_state VALUES ('laptop', 7);
+            """)
+        con.close()
+        # when
+        db = self.open("")
+        # then
+        self.assertEqual(
+            [EventRecord(1, "2024-01-02 08:00:00", "start")],
+            db.get_data_by_date("2024-01-02"),
+        )
+        self.assertIsNone(db.get_last_checkpoint())
+        self.assertEqual(7, db.get_sync_seq("laptop"))
+        self.assertEqual([], self.open("alice").get_data_by_date("2024-01-02"))
+        indexes = {
+            row[0]
+            for row in db.con.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index'"
+            )
+        }
+        self.assertNotIn("timestamp_date_time", indexes)
+        self.assertIn("timestamp_user_date_time", indexes)
+        db.close()
+
+    def test_migrate_day_total_trigger(self) -> None:
+        # given
+        db = self.open("")
+        db.con.executescript("""
+            DROP TRIGGER day_total_insert;
+            CREATE TRIGGER day_total_insert AFTER INSERT ON timestamp BEGIN
+                DELETE FROM day_total WHERE user = new.user AND date = new.date;
+            END;
+            """)
+        db.close()
+        # when
+        db = self.open("")
+        db.write_timestamp("start", "2024-01-02 08:00:00")
+        db.write_timestamp("stop", "2024-01-02 12:00:00")
+        db.write_day_total("2024-01-02", 14400)
+        db.write_timestamp("start", "2024-01-02 13:00:00")
+        # then
+        self.assertEqual(14400, db.get_day_total("2024-01-02"))
+        db.close()
+
+    def test_checkpoints_of_other_targets_are_dropped(self) -> None:
+        for name, value in (
+            ("HOURS", (7, 7, 7, 7, 7, 0, 0)),
+            ("HOLIDAYS", ("2024-01-01",)),
+        ):
+            with self.subTest(name):
+                # given
+                db = self.open("")
+                db.write_checkpoint("2023-12", 60)
+                # when
+                with patch(f"codec.Target.{name}", value):
+                    result = db.get_last_checkpoint()
+                # then
+                self.assertIsNone(result)
+                db.close()
+
+    def test_parallel_users(self) -> None:
+        # given
+        users, sessions = 32, 8
+        self.open("setup").close()
+        latencies: list[float] = []
+
+        def work(user: str) -> tuple:
+            db = self.open(user)
+            timer = Timer(db)
+            try:
+                for hour in range(sessions):
+                    for event, minute in (("start", 0), ("stop", 30)):
+                        started = perf_counter()
+                        db.write_timestamp(
+                            event, f"2024-01-02 {8 + hour:02}:{minute:02}:00"
+                        )
+                        timer.calc_worktime()
+                        db.get_daily_totals("2024-01-01", "2024-01-02")
+                        latencies.append(perf_counter() - started)
+                return timer.calc_worktime(), db.get_daily_totals(
+                    "2024-01-01", "2024-01-02"
+                )
+            finally:
+                db.close()
+
+        # when
+        with ThreadPoolExecutor(users) as pool:
+            results = list(pool.map(work, [f"user{n}" for n in range(users)]))
+        # then
+        for worktime, totals in results:
+            self.assertEqual(timedelta(hours=sessions / 2), worktime)
+            self.assertEqual([("2024-01-02", sessions * 1800)], totals)
+        # writers wait for each other, but never for the busy timeout
+        self.assertLess(max(latencies), 2)
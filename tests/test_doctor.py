@@ -0,0 +1,129 @@
+from unittest import TestCase
+from codec import EventRecord
+from doctor import RowIdSpool, check
+from memory import MemoryDatabase
+
+
+class TestDoctor(TestCase):
+
+    def check(self, rows: list[tuple], today: str = "2024-01-05") -> list[tuple]:
+        return [
+            (issue.row_id, issue.kind, issue.fixable)
+            for issue in check(
+                [
+                    (row_id, date_, event, f"{date_} {time_}")
+                    for row_id, date_, event, time_ in rows
+                ],
+                today,
+            )
+        ]
+
+    def test_check_consistent(self) -> None:
+        # when
+        result = self.check(
+            [
+                (1, "2024-01-01", "start", "08:00:00"),
+                (2, "2024-01-01", "stop", "12:00:00"),
+                (3, "2024-01-02", "start", "08:00:00"),
+                (4, "2024-01-02", "stop", "12:00:00"),
+                (5, "2024-01-05", "start", "08:00:00"),
+            ]
+        )
+        # then
+        self.assertEqual([], result)
+
+    def test_check_issues(self) -> None:
+        # when
+        result = self.check(
+            [
+                (1, "2024-01-01", "stop", "07:00:00"),
+                (2, "2024-01-01", "start", "08:00:00"),
+                (3, "2024-01-01", "start", "09:00:00"),
+                (4, "2024-01-01", "stop", "12:00:00"),
+                (5, "2024-01-01", "stop", "12:00:00"),
+                (6, "2024-01-01", "stop", "12:30:00"),
+                (7, "2024-01-02", "start", "08:00:00"),
+                (8, "2024-01-02", "pause", "09:00:00"),
+                (9, "2024-01-03", "start", "08:00:00"),
+            ]
+        )
+        # then
+        self.assertEqual(
+            [
+                (1, "stop without start", True),
+                (3, "second start", True),
+                (5, "duplicate", True),
+                (4, "second stop", True),
+                (8, "invalid timestamp", True),
+                (7, "session not stopped", False),
+                (9, "session not stopped", False),
+            ],
+            result,
+        )
+
+    def test_check_time_outside_date(self) -> None:
+        # when
+        result = list(
+            check(
+                [
+                    (1, "2024-01-02", "start", "2024-01-01 23:00:00"),
+                    (2, "2024-01-02", "stop", "2024-01-02 01:00:00"),
+                ],
+                "2024-01-05",
+            )
+        )
+        # then
+        self.assertEqual(
+            [(1, "time outside its date", False)],
+            [(issue.row_id, issue.kind, issue.fixable) for issue in result],
+        )
+
+    def test_fixes_restore_alternation(self) -> None:
+        # given
+        db = MemoryDatabase()
+        db.date_today = "2024-01-05"
+        db.write_timestamps(
+            [
+                ("stop", "2024-01-01 07:00:00", "2024-01-01"),
+                ("start", "2024-01-01 08:00:00", "2024-01-01"),
+                ("start", "2024-01-01 09:00:00", "2024-01-01"),
+                ("stop", "2024-01-01 12:00:00", "2024-01-01"),
+                ("stop", "2024-01-01 12:30:00", "2024-01-01"),
+            ]
+        )
+        with RowIdSpool(batch=2) as spool:
+            for issue in check(db.iter_timestamps(), db.date_today):
+                spool.add(issue.row_id)
+            # when
+            removed = db.delete_row_batches(spool.batches())
+        # then
+        self.assertEqual(3, removed)
+        self.assertEqual([], list(check(db.iter_timestamps(), db.date_today)))
+        self.assertEqual(
+            [
+                EventRecord(2, "2024-01-01 08:00:00", "start"),
+                EventRecord(5, "2024-01-01 12:30:00", "stop"),
+            ],
+            db.get_data_by_date("2024-01-01"),
+        )
+
+
+class TestRowIdSpool(TestCase):
+
+    def test_batches(self) -> None:
+        # given
+        with RowIdSpool(batch=3) as spool:
+            for row_id in range(1, 8):
+                spool.add(row_id)
+            # when
+            result = list(spool.batches())
+        # then
+        self.assertEqual([[1, 2, 3], [4, 5, 6], [7]], result)
+        self.assertEqual(7, spool.count)
+
+    def test_batches_empty(self) -> None:
+        # when
+        with RowIdSpool() as spool:
+            result = list(spool.batches())
+        # then
+        self.assertEqual([], result)
@@ -0,0 +1,178 @@
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from os import path
+from tempfile import TemporaryDirectory
+from threading import Thread
+from unittest import TestCase
+from unittest.mock import MagicMock
+from database import Database
+from hooks import HookError, HookWorker, post_events
+from timer import Timer
+
+
+class Endpoint(ThreadingHTTPServer):
+    # stand-in for a local chat or calendar bridge, answers with the queued status codes and records the events
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), EndpointHandler)
+        self.statuses: list[int] = []
+        self.batches: list[list[dict]] = []
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}/events"
+
+
+class EndpointHandler(BaseHTTPRequestHandler):
+
+    def do_POST(self) -> None:
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        status = self.server.statuses.pop(0) if self.server.statuses else 204
+        if status < 300:
+            self.server.batches.append(json.loads(body)["events"])
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+class TestHooks(TestCase):
+
+    def setUp(self) -> None:
+        self.directory = TemporaryDirectory()
+        self.db = Database(path.join(self.directory.name, "ptymer.db"), outbox=True)
+        self.db.date_today = "2024-01-01"
+        self.endpoint = Endpoint()
+        self.thread = Thread(
+            target=self.endpoint.serve_forever, kwargs={"poll_interval": 0.05}
+        )
+        self.thread.start()
+        self.sleep = MagicMock()
+        self.worker = HookWorker(
+            self.db, self.endpoint.url, batch=2, backoff=1.0, sleep=self.sleep
+        )
+
+    def tearDown(self) -> None:
+        self.endpoint.shutdown()
+        self.endpoint.server_close()
+        self.thread.join()
+        self.db.close()
+        self.directory.cleanup()
+
+    def test_outbox_in_the_same_transaction(self) -> None:
+        # given
+        timer = Timer(self.db)
+        # when
+        timer.create_timestamp("start")
+        self.db.write_timestamp("stop", "2024-01-01 12:00:00")
+        self.db.delete_row(1)
+        # then
+        self.assertEqual(
+            [
+                (1, "insert", "2024-01-01", "start"),
+                (2, "insert", "2024-01-01", "stop"),
+                (3, "delete", "2024-01-01", "start"),
+            ],
+            [row[:4] for row in self.db.get_outbox(10)],
+        )
+
+    def test_outbox_disabled(self) -> None:
+        # given
+        self.db.outbox = False
+        # when
+        self.db.write_timestamp("start", "2024-01-01 08:00:00")
+        # then
+        self.assertEqual([], self.db.get_outbox(10))
+
+    def test_drain_in_batches(self) -> None:
+        # given
+        self.db.write_timestamps(
+            [
+                ("start", "2024-01-01 08:00:00", "2024-01-01"),
+                ("stop", "2024-01-01 12:00:00", "2024-01-01"),
+                ("start", "2024-01-01 13:00:00", "2024-01-01"),
+            ]
+        )
+        # when
+        result = self.worker.drain()
+        # then
+        self.assertEqual(3, result)
+        self.assertEqual([2, 1], [len(batch) for batch in self.endpoint.batches])
+        self.assertEqual(
+            {
+                "id": 1,
+                "op": "insert",
+                "date": "2024-01-01",
+                "event": "start",
+                "time": "2024-01-01 08:00:00",
+                "user": "",
+            },
+            self.endpoint.batches[0][0],
+        )
+        self.assertEqual([], self.db.get_outbox(10))
+
+    def test_drain_retries_later(self) -> None:
+        # given
+        self.db.write_timestamp("start", "2024-01-01 08:00:00")
+        self.endpoint.statuses = [503, 503]
+        # when
+        first = self.worker.drain()
+        second = self.worker.drain()
+        # then
+        self.assertEqual((0, 0), (first, second))
+        self.assertEqual(2.0, self.worker.delay)
+        self.assertEqual(2, self.db.get_outbox(10)[0][5])
+        # when
+        third = self.worker.drain()
+        # then
+        self.assertEqual(1, third)
+        self.assertEqual(0.0, self.worker.delay)
+        self.assertEqual([], self.db.get_outbox(10))
+
+    def test_drain_drops_rejected_events(self) -> None:
+        # given
+        self.db.write_timestamps(
+            [
+                ("start", "2024-01-01 08:00:00", "2024-01-01"),
+                ("stop", "2024-01-01 12:00:00", "2024-01-01"),
+                ("start", "2024-01-01 13:00:00", "2024-01-01"),
+            ]
+        )
+        self.endpoint.statuses = [400]
+        # when
+        result = self.worker.drain()
+        # then
+        self.assertEqual(1, result)
+        self.assertEqual(3, self.endpoint.batches[0][0]["id"])
+        self.assertEqual([], self.db.get_outbox(10))
+
+    def test_run(self) -> None:
+        # given
+        self.db.write_timestamp("start", "2024-01-01 08:00:00")
+        self.endpoint.statuses = [500]
+        self.worker.poll = 0.5
+        # when
+        self.worker.run(cycles=2)
+        # then
+        self.assertEqual(1, len(self.endpoint.batches))
+        self.assertEqual([((1.0,),), ((0.5,),)], self.sleep.call_args_list)
+
+    def test_post_events_unreachable(self) -> None:
+        # given
+        url = self.endpoint.url
+        self.endpoint.shutdown()
+        self.endpoint.server_close()
+        # when / then
+        with self.assertRaises(HookError) as context:
+            post_events(url, [], timeout=1)
+        self.assertTrue(context.exception.retry)
+
+    def test_post_events_rejected(self) -> None:
+        # given
+        self.endpoint.statuses = [404]
+        # when / then
+        with self.assertRaises(HookError) as context:
+            post_events(self.endpoint.url, [])
+        self.assertFalse(context.exception.retry)
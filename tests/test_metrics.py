@@ -0,0 +1,119 @@
+import sqlite3
+from os import path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from metrics import Recorder, format_samples, parse_samples
+
+
+class TestMetrics(TestCase):
+
+    def setUp(self) -> None:
+        self.directory = TemporaryDirectory()
+        self.filename = path.join(self.directory.name, "ptymer.prom")
+        self.now = 1700000000.0
+        self.recorder = Recorder(
+            self.filename, buckets=(0.1, 1.0), rows_seconds=60, clock=lambda: self.now
+        )
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def read(self) -> str:
+        with open(self.filename) as f:
+            return f.read()
+
+    def test_record_latency(self) -> None:
+        # when
+        self.recorder.record("show", 0.05)
+        self.recorder.record("show", 0.5)
+        # then
+        self.assertEqual(
+            "# HELP ptymer_command_seconds Latency of the ptymer commands in seconds.\n"
+            "# TYPE ptymer_command_seconds histogram\n"
+            'ptymer_command_seconds_bucket{command="show",le="0.1"} 1\n'
+            'ptymer_command_seconds_bucket{command="show",le="1"} 2\n'
+            'ptymer_command_seconds_bucket{command="show",le="+Inf"} 2\n'
+            'ptymer_command_seconds_sum{command="show"} 0.55\n'
+            'ptymer_command_seconds_count{command="show"} 2\n',
+            self.read(),
+        )
+
+    def test_record_queries(self) -> None:
+        # given
+        con = sqlite3.connect(":memory:")
+        self.recorder.watch(con, path.join(self.directory.name, "missing.db"))
+        con.execute("CREATE TABLE timestamp(date, event, time)")
+        con.execute("SELECT * FROM timestamp")
+        con.execute("select * from timestamp")
+        # when
+        self.recorder.record("start", 2.0)
+        # then
+        samples = parse_samples(self.read())
+        self.assertEqual(
+            2, samples['ptymer_queries_total{command="start",kind="SELECT"}']
+        )
+        self.assertEqual(
+            1, samples['ptymer_queries_total{command="start",kind="CREATE"}']
+        )
+        self.assertEqual(
+            0, samples['ptymer_command_seconds_bucket{command="start",le="1"}']
+        )
+        self.assertEqual({}, self.recorder.queries)
+        con.close()
+
+    def test_record_database(self) -> None:
+        # given
+        database = path.join(self.directory.name, "ptymer.db")
+        con = sqlite3.connect(database)
+        self.recorder.watch(con, database)
+        with con:
+            con.execute("CREATE TABLE timestamp(date, event, time)")
+            con.execute(
+                "INSERT INTO timestamp VALUES ('2024-01-01', 'start', '2024-01-01 08:00:00')"
+            )
+        con.close()
+        # when
+        self.recorder.record("start", 0.01)
+        # then
+        samples = parse_samples(self.read())
+        self.assertEqual(path.getsize(database), samples["ptymer_database_bytes"])
+        self.assertEqual(1, samples['ptymer_rows{table="timestamp"}'])
+        self.assertEqual(1700000000, samples["ptymer_rows_updated_seconds"])
+
+    def test_rows_are_counted_at_most_once_per_interval(self) -> None:
+        # given
+        database = path.join(self.directory.name, "ptymer.db")
+        con = sqlite3.connect(database)
+        con.execute("CREATE TABLE timestamp(date, event, time)")
+        self.recorder.watch(con, database)
+        self.recorder.record("start", 0.01)
+        with con:
+            con.execute(
+                "INSERT INTO timestamp VALUES ('2024-01-01', 'start', '2024-01-01 08:00:00')"
+            )
+        for seconds, expected in ((59, 0), (60, 1)):
+            with self.subTest(seconds):
+                self.now = 1700000000.0 + seconds
+                # when
+                self.recorder.record("stop", 0.01)
+                # then
+                samples = parse_samples(self.read())
+                self.assertEqual(expected, samples['ptymer_rows{table="timestamp"}'])
+        con.close()
+
+    def test_record_without_latency(self) -> None:
+        # when
+        self.recorder.record("serve", None)
+        # then
+        self.assertNotIn("ptymer_command_seconds", self.read())
+
+    def test_format_samples_skips_empty_families(self) -> None:
+        # when
+        result = format_samples({"ptymer_database_bytes": 8192})
+        # then
+        self.assertEqual(
+            "# HELP ptymer_database_bytes Size of the database file in bytes.\n"
+            "# TYPE ptymer_database_bytes gauge\n"
+            "ptymer_database_bytes 8192\n",
+            result,
+        )
@@ -0,0 +1,208 @@
+from datetime import datetime, timedelta
+from os import path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import MagicMock, call, patch
+from memory import MemoryDatabase
+from notify import (
+    ConsoleNotifier,
+    DesktopNotifier,
+    FileWatcher,
+    NotifyDaemon,
+    calc_alerts,
+    get_notifier,
+)
+from timer import Timer
+
+
+class RecordingNotifier:
+
+    def __init__(self):
+        self.messages = []
+
+    def notify(self, title: str, message: str) -> None:
+        self.messages.append(title)
+
+
+class TestNotify(TestCase):
+
+    def setUp(self) -> None:
+        self.db = MemoryDatabase()
+        self.db.date_today = "2024-01-01"
+        self.db.write_timestamps(
+            [
+                ("start", "2024-01-01 07:00:00", "2024-01-01"),
+                ("stop", "2024-01-01 08:00:00", "2024-01-01"),
+                ("start", "2024-01-01 09:00:00", "2024-01-01"),
+            ]
+        )
+
+    def tearDown(self) -> None:
+        patch.stopall()
+
+    def test_calc_alerts(self) -> None:
+        # when
+        result = calc_alerts(
+            Timer(self.db), datetime(2024, 1, 1, 10), timedelta(hours=6)
+        )
+        # then
+        self.assertEqual(
+            [
+                (datetime(2024, 1, 1, 15), ("break", "2024-01-01 09:00:00")),
+                (datetime(2024, 1, 1, 16), ("target", datetime(2024, 1, 1).date())),
+            ],
+            [(alert.time, alert.key) for alert in result],
+        )
+
+    def test_calc_alerts_reached(self) -> None:
+        # when
+        result = calc_alerts(
+            Timer(self.db), datetime(2024, 1, 1, 17), timedelta(hours=6)
+        )
+        # then
+        now = datetime(2024, 1, 1, 17)
+        self.assertEqual([now, now], [alert.time for alert in result])
+
+    def test_calc_alerts_without_session(self) -> None:
+        # given
+        self.db.write_timestamp("stop", "2024-01-01 10:00:00")
+        # when
+        result = calc_alerts(
+            Timer(self.db), datetime(2024, 1, 1, 11), timedelta(hours=6)
+        )
+        # then
+        self.assertEqual([], result)
+
+    def test_calc_alerts_without_target(self) -> None:
+        # given
+        self.db.date_today = "2024-01-06"
+        self.db.write_timestamp("start", "2024-01-06 09:00:00")
+        # when
+        result = calc_alerts(Timer(self.db), datetime(2024, 1, 6, 10), timedelta())
+        # then
+        self.assertEqual([], result)
+
+    def test_calc_alerts_on_holiday(self) -> None:
+        # given
+        self.db.write_timestamp("start", "2024-01-01 09:00:00")
+        patch("codec.Target.HOLIDAYS", ("2024-01-01",)).start()
+        # when
+        result = calc_alerts(Timer(self.db), datetime(2024, 1, 1, 10), timedelta())
+        # then
+        self.assertEqual([], result)
+
+    def test_daemon_sleeps_until_next_alert(self) -> None:
+        # given
+        patch("notify.open_storage", return_value=self.db).start()
+        patch("notify.os.path.isfile", return_value=True).start()
+        watcher = MagicMock(spec=FileWatcher)
+        clock = MagicMock(
+            side_effect=[
+                datetime(2024, 1, 1, 10),
+                datetime(2024, 1, 1, 15),
+                datetime(2024, 1, 1, 15, 0, 5),
+                datetime(2024, 1, 1, 16),
+            ]
+        )
+        notifier = RecordingNotifier()
+        daemon = NotifyDaemon("ptymer.db", notifier, timedelta(hours=6), watcher, clock)
+        # when
+        daemon.run(4)
+        # then
+        self.assertEqual(["Time for a break", "Work time is over"], notifier.messages)
+        watcher.wait.assert_has_calls(
+            [
+                call(datetime(2024, 1, 1, 15)),
+                call(datetime(2024, 1, 1, 16)),
+                call(datetime(2024, 1, 1, 16)),
+                call(datetime(2024, 1, 2)),
+            ]
+        )
+        self.assertEqual(4, watcher.mark.call_count)
+
+    def test_daemon_without_data(self) -> None:
+        # given
+        patch("notify.os.path.isfile", return_value=False).start()
+        open_storage = patch("notify.open_storage").start()
+        watcher = MagicMock(spec=FileWatcher)
+        daemon = NotifyDaemon(
+            "ptymer.db",
+            RecordingNotifier(),
+            watcher=watcher,
+            clock=lambda: datetime(2024, 1, 1, 10),
+        )
+        # when
+        daemon.step()
+        # then
+        open_storage.assert_not_called()
+        watcher.wait.assert_called_once_with(datetime(2024, 1, 2))
+
+    def test_get_notifier(self) -> None:
+        for found, expected in (
+            (None, ConsoleNotifier),
+            ("/bin/notify-send", DesktopNotifier),
+        ):
+            with self.subTest(expected):
+                # given
+                patch("notify.which", return_value=found).start()
+                # when
+                result = get_notifier()
+                # then
+                self.assertIsInstance(result, expected)
+
+
+class TestFileWatcher(TestCase):
+
+    def setUp(self) -> None:
+        self.directory = TemporaryDirectory()
+        self.filename = path.join(self.directory.name, "ptymer.db")
+        with open(self.filename, "w") as f:
+            f.write("x")
+        self.now = datetime(2024, 1, 1, 10)
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def sleep(self, seconds: float) -> None:
+        self.now += timedelta(seconds=seconds)
+
+    def test_wait_until_deadline(self) -> None:
+        # given
+        watcher = FileWatcher(self.filename, 2, lambda: self.now, self.sleep)
+        # when
+        result = watcher.wait(datetime(2024, 1, 1, 10, 0, 5))
+        # then
+        self.assertFalse(result)
+        self.assertEqual(datetime(2024, 1, 1, 10, 0, 5), self.now)
+
+    def test_wait_until_change(self) -> None:
+        # given
+        watcher = FileWatcher(self.filename, 2, lambda: self.now, self.sleep)
+        with open(self.filename, "a") as f:
+            f.write("y")
+        # when
+        result = watcher.wait(None)
+        # then
+        self.assertTrue(result)
+        self.assertEqual(datetime(2024, 1, 1, 10, 0, 2), self.now)
+
+    def test_wait_until_wal_change(self) -> None:
+        # given
+        watcher = FileWatcher(self.filename, 2, lambda: self.now, self.sleep)
+        with open(self.filename + "-wal", "w") as f:
+            f.write("y")
+        # when
+        result = watcher.wait(None)
+        # then
+        self.assertTrue(result)
+
+    def test_mark(self) -> None:
+        # given
+        watcher = FileWatcher(self.filename, 2, lambda: self.now, self.sleep)
+        with open(self.filename, "a") as f:
+            f.write("y")
+        watcher.mark()
+        # when
+        result = watcher.wait(datetime(2024, 1, 1, 10, 0, 1))
+        # then
+        self.assertFalse(result)
@@ -0,0 +1,169 @@
+import subprocess
+import sys
+from datetime import date, datetime, timedelta
+from os import path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from ptymer import (
+    Client,
+    ClientError,
+    DayTotal,
+    PeriodTotal,
+    ProjectTotal,
+    Status,
+    Timestamp,
+)
+
+
+class TestClient(TestCase):
+
+    def setUp(self) -> None:
+        self.now = datetime(2024, 1, 3, 17, 0)
+        self.client = Client(":memory:", "memory", "", clock=lambda: self.now)
+
+    def tearDown(self) -> None:
+        self.client.close()
+
+    def test_start_and_stop(self) -> None:
+        # when
+        started = self.client.start(datetime(2024, 1, 2, 8, 0, 0, 500), "acme", ["dev"])
+        stopped = self.client.stop(datetime(2024, 1, 2, 12, 30))
+        # then
+        self.assertEqual(datetime(2024, 1, 2, 8, 0), started)
+        self.assertEqual(datetime(2024, 1, 2, 12, 30), stopped)
+        self.assertEqual(
+            [
+                Timestamp(1, datetime(2024, 1, 2, 8, 0), "start"),
+                Timestamp(2, datetime(2024, 1, 2, 12, 30), "stop"),
+            ],
+            self.client.timestamps(date(2024, 1, 2)),
+        )
+        self.assertEqual(
+            [ProjectTotal("acme", timedelta(hours=4, minutes=30))],
+            self.client.projects(date(2024, 1, 1), date(2024, 1, 31)),
+        )
+
+    def test_start_uses_the_clock(self) -> None:
+        # when
+        result = self.client.start()
+        # then
+        self.assertEqual(self.now, result)
+        self.assertEqual(
+            Status(date(2024, 1, 3), True, timedelta(), None), self.client.status()
+        )
+
+    def test_start_twice(self) -> None:
+        # given
+        self.client.start(datetime(2024, 1, 2, 8, 0))
+        # when / then
+        with self.assertRaises(ClientError):
+            self.client.start(datetime(2024, 1, 2, 9, 0))
+
+    def test_stop_before_start(self) -> None:
+        # given
+        self.client.start(datetime(2024, 1, 2, 8, 0))
+        # when / then
+        with self.assertRaises(ClientError):
+            self.client.stop(datetime(2024, 1, 2, 7, 0))
+
+    def test_status(self) -> None:
+        # given
+        self.client.add(
+            [
+                (datetime(2024, 1, 2, 8, 0), "start"),
+                (datetime(2024, 1, 2, 12, 0), "stop"),
+                (datetime(2024, 1, 2, 13, 0), "start"),
+                (datetime(2024, 1, 3, 8, 0), "start"),
+            ]
+        )
+        # when
+        result = self.client.status(date(2024, 1, 2))
+        # then
+        self.assertEqual(
+            Status(date(2024, 1, 2), True, timedelta(hours=4), timedelta(hours=1)),
+            result,
+        )
+        self.assertEqual(
+            Status(date(2024, 1, 3), True, timedelta(hours=9), None),
+            self.client.status(),
+        )
+        self.assertEqual(
+            Status(date(2024, 1, 1), False, timedelta(), None),
+            self.client.status(date(2024, 1, 1)),
+        )
+
+    def test_add_and_delete_in_batches(self) -> None:
+        # given
+        entries = [
+            (datetime(2024, 1, 1, 8, 0) + timedelta(days=day, hours=hours), event)
+            for day in range(200)
+            for hours, event in ((0, "start"), (8, "stop"))
+        ]
+        # when
+        added = self.client.add(entries)
+        deleted = self.client.delete(range(1, 201))
+        # then
+        self.assertEqual(400, added)
+        self.assertEqual(200, deleted)
+        self.assertEqual(
+            [DayTotal(date(2024, 4, 10), timedelta(hours=8))],
+            self.client.report(date(2024, 4, 10), date(2024, 4, 10)),
+        )
+
+    def test_add_incorrect_event(self) -> None:
+        # when / then
+        with self.assertRaises(ClientError):
+            self.client.add(
+                [
+                    (datetime(2024, 1, 1, 8, 0), "start"),
+                    (datetime(2024, 1, 1, 9, 0), "pause"),
+                ]
+            )
+        self.assertEqual([], self.client.timestamps(date(2024, 1, 1)))
+
+    def test_period(self) -> None:
+        # given
+        self.client.add(
+            [
+                (datetime(2024, 1, 2, 8, 0), "start"),
+                (datetime(2024, 1, 2, 16, 0), "stop"),
+            ]
+        )
+        # when
+        result = self.client.period("week", date(2024, 1, 3))
+        # then
+        self.assertEqual(7, len(result))
+        self.assertEqual(
+            PeriodTotal("2024-01-02", 1, timedelta(hours=8), timedelta(hours=8)),
+            result[1],
+        )
+        with self.assertRaises(ClientError):
+            self.client.period("quarter")
+
+    def test_sqlite_engine(self) -> None:
+        # given
+        with TemporaryDirectory() as directory:
+            with Client(path.join(directory, "ptymer.db"), "sqlite", "alice") as client:
+                # when
+                client.start(datetime(2024, 1, 2, 8, 0))
+                client.stop(datetime(2024, 1, 2, 9, 30))
+                # then
+                self.assertEqual(
+                    [DayTotal(date(2024, 1, 2), timedelta(hours=1, minutes=30))],
+                    client.report(date(2024, 1, 1), date(2024, 1, 2)),
+                )
+
+    def test_import_without_cli(self) -> None:
+        # when
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import sys, ptymer; print('typer' in sys.modules, 'rich' in sys.modules)",
+            ],
+            capture_output=True,
+            text=True,
+            cwd=path.dirname(path.dirname(path.abspath(__file__))),
+        )
+        # then
+        self.assertEqual("False False", result.stdout.strip())
@@ -0,0 +1,162 @@
+from datetime import date, timedelta
+from os import path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from database import Database
+
+DAYS = 400
+
+# every Database query, run against a populated file; the hot ones run on every start, stop and show
+QUERIES = {
+    "get_times_by": lambda db: db.get_times_by("start"),
+    "get_last_event": lambda db: db.get_last_event(),
+    "get_data_by_date": lambda db: db.get_data_by_date("2024-01-02"),
+    "delete_row": lambda db: db.delete_row(5),
+    "get_last_time": lambda db: db.get_last_time("start"),
+    "get_day_total": lambda db: db.get_day_total("2024-01-02"),
+    "write_timestamp": lambda db: db.write_timestamp("stop", "2024-01-02 19:00:00"),
+    "write_timestamps": lambda db: db.write_timestamps(
+        [("start", "2024-01-02 20:00:00", "2024-01-02")]
+    ),
+    "delete_rows": lambda db: db.delete_rows([9, 10]),
+    "get_rows_by_id": lambda db: db.get_rows_by_id([1, 2]),
+    "get_data_between": lambda db: db.get_data_between("2023-06-01", "2023-06-30"),
+    "get_timestamp_page": lambda db: db.get_timestamp_page(
+        "2023-06-01", "2023-06-30", 50, 700
+    ),
+    "get_events_between": lambda db: list(
+        db.get_events_between("2023-06-01", "2023-06-30")
+    ),
+    "get_dates_between": lambda db: db.get_dates_between("2023-06-01", "2023-06-30"),
+    "get_project_totals": lambda db: db.get_project_totals(
+        "2023-06-01", "2023-06-30", None, "dev"
+    ),
+    "get_daily_totals": lambda db: db.get_daily_totals(
+        "2023-06-01", "2023-06-30", "acme"
+    ),
+    "get_session_data": lambda db: db.get_session_data("2023-06-01", "acme"),
+    "get_calendar_span": lambda db: db.get_calendar_span("week", "2023-06-01"),
+    "get_calendar_totals": lambda db: db.get_calendar_totals(
+        "2023-06-01", "2023-06-30", "week"
+    ),
+    "get_last_checkpoint": lambda db: db.get_last_checkpoint(),
+    "get_changes_since": lambda db: db.get_changes_since(DAYS),
+    "get_first_changed_date": lambda db: db.get_first_changed_date(DAYS),
+    "get_outbox": lambda db: db.get_outbox(100),
+}
+HOT = ("get_times_by", "get_last_event", "get_data_by_date", "delete_row")
+STATEMENTS = ("SELECT", "WITH", "INSERT", "DELETE", "UPDATE")
+
+
+def populate(db: Database, days: int) -> None:
+    rows = []
+    first = date(2024, 1, 2) - timedelta(days=days - 1)
+    for offset in range(days):
+        day = (first + timedelta(days=offset)).isoformat()
+        for event, time_ in (
+            ("start", "08:00"),
+            ("stop", "12:00"),
+            ("start", "13:00"),
+            ("stop", "17:00"),
+        ):
+            rows.append((event, f"{day} {time_}:00", day))
+    db.write_timestamps(rows)
+    db.write_timestamp("start", "2024-01-02 18:00:00", project="acme", tags=["dev"])
+
+
+def full_scans(plan: list[tuple], tables: set[str]) -> list[str]:
+    # a scan of a stored table, or a join that scans more than one of its inputs
+    found = []
+    scans: dict[int, list[str]] = {}
+    for _, parent, _, detail in plan:
+        if not detail.startswith("SCAN "):
+            continue
+        name = detail.split()[1]
+        if name in tables:
+            found.append(detail)
+        scans.setdefault(parent, []).append(detail)
+    for siblings in scans.values():
+        if len(siblings) > 1:
+            found.append(" x ".join(siblings))
+    return found
+
+
+class TestQueryPlan(TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.directory = TemporaryDirectory()
+        cls.db = Database(path.join(cls.directory.name, "ptymer.db"))
+        cls.db.date_today = "2024-01-02"
+        populate(cls.db, DAYS)
+        cls.tables = {
+            name
+            for (name,) in cls.db.con.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table'"
+            )
+        }
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.db.close()
+        cls.directory.cleanup()
+
+    def plans(self, query) -> dict[str, list[tuple]]:
+        statements = []
+        self.db.con.set_trace_callback(statements.append)
+        try:
+            query(self.db)
+        finally:
+            self.db.con.set_trace_callback(None)
+        return {
+            statement: self.db.con.execute(f"EXPLAIN QUERY PLAN {statement}").fetchall()
+            for statement in dict.fromkeys(statements)
+            if statement.lstrip().upper().startswith(STATEMENTS)
+        }
+
+    def test_queries_without_full_scan(self) -> None:
+        for name, query in QUERIES.items():
+            with self.subTest(name):
+                # when
+                plans = self.plans(query)
+                # then
+                self.assertTrue(plans)
+                for statement, plan in plans.items():
+                    self.assertEqual(
+                        [], full_scans(plan, self.tables), f"{name}: {statement}"
+                    )
+
+    def test_hot_queries_use_an_index(self) -> None:
+        for name in HOT:
+            with self.subTest(name):
+                # when
+                plans = self.plans(QUERIES[name])
+                # then
+                details = [row[3] for plan in plans.values() for row in plan]
+                self.assertTrue(
+                    any(detail.startswith("SEARCH timestamp") for detail in details),
+                    details,
+                )
+
+    def test_stream_without_sort(self) -> None:
+        # when
+        plans = self.plans(lambda db: list(db.iter_timestamps()))
+        # then
+        details = [row[3] for plan in plans.values() for row in plan]
+        self.assertEqual(
+            ["SEARCH timestamp USING INDEX timestamp_user_date_time (user=?)"], details
+        )
+
+    def test_full_scans(self) -> None:
+        # given
+        plan = [
+            (3, 0, 0, "MATERIALIZE starts"),
+            (9, 0, 0, "SCAN starts"),
+            (12, 0, 0, "SCAN stops"),
+            (20, 3, 0, "SCAN timestamp"),
+            (24, 3, 0, "SEARCH calendar USING PRIMARY KEY (date=?)"),
+        ]
+        # when
+        result = full_scans(plan, {"timestamp", "calendar"})
+        # then
+        self.assertEqual(["SCAN timestamp", "SCAN starts x SCAN stops"], result)
@@ -0,0 +1,219 @@
+import json
+from datetime import date
+from http.client import HTTPConnection
+from os import path
+from tempfile import TemporaryDirectory
+from threading import Thread
+from unittest import TestCase
+from unittest.mock import patch
+from database import Database
+from server import ApiServer
+from sync import export_bundle, import_bundle
+
+
+class TestServer(TestCase):
+
+    def setUp(self) -> None:
+        self.directory = TemporaryDirectory()
+        self.db = Database(path.join(self.directory.name, "ptymer.db"), shared=True)
+        self.db.write_timestamps(
+            [
+                ("start", "2024-01-01 08:00:00", "2024-01-01"),
+                ("stop", "2024-01-01 12:00:00", "2024-01-01"),
+                ("start", "2024-01-02 09:00:00", "2024-01-02"),
+                ("stop", "2024-01-02 10:30:00", "2024-01-02"),
+            ]
+        )
+        self.db.write_timestamp(
+            "start", "2024-01-03 08:00:00", "2024-01-03", "ptymer", ["dev"]
+        )
+        self.db.write_timestamp("stop", "2024-01-03 09:00:00", "2024-01-03")
+        today = patch("server.date", wraps=date).start()
+        today.today.return_value = date(2024, 1, 3)
+        self.server = ApiServer(("127.0.0.1", 0), self.db, workers=2)
+        self.thread = Thread(
+            target=self.server.serve_forever, kwargs={"poll_interval": 0.05}
+        )
+        self.thread.start()
+        self.connection = HTTPConnection("127.0.0.1", self.server.server_port)
+
+    def tearDown(self) -> None:
+        patch.stopall()
+        self.connection.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        self.db.close()
+        self.directory.cleanup()
+
+    def request(self, url: str, headers=None) -> tuple:
+        self.connection.request("GET", url, headers=headers or {})
+        response = self.connection.getresponse()
+        body = response.read()
+        return response, json.loads(body) if body else None
+
+    def test_state(self) -> None:
+        # when
+        response, payload = self.request("/state")
+        # then
+        self.assertEqual(200, response.status)
+        self.assertEqual("application/json", response.getheader("Content-Type"))
+        self.assertEqual(
+            {"date": "2024-01-03", "running": False, "last_event": "stop"}, payload
+        )
+
+    def test_today(self) -> None:
+        # when
+        _, payload = self.request("/today")
+        # then
+        self.assertEqual(
+            {"date": "2024-01-03", "running": False, "worktime": 3600, "pausetime": 0},
+            payload,
+        )
+
+    def test_week(self) -> None:
+        # when
+        _, payload = self.request("/week")
+        # then
+        self.assertEqual(
+            [
+                {"date": "2024-01-01", "worktime": 14400},
+                {"date": "2024-01-02", "worktime": 5400},
+                {"date": "2024-01-03", "worktime": 3600},
+            ],
+            payload["days"],
+        )
+        self.assertEqual(23400, payload["worktime"])
+
+    def test_range(self) -> None:
+        # when
+        _, payload = self.request("/range?from=2024-01-02&to=2024-01-03")
+        # then
+        self.assertEqual(9000, payload["worktime"])
+        self.assertEqual("2024-01-02", payload["from"])
+
+    def test_range_with_project(self) -> None:
+        # when
+        _, payload = self.request("/range?from=2024-01-01&project=ptymer")
+        # then
+        self.assertEqual([{"date": "2024-01-03", "worktime": 3600}], payload["days"])
+
+    def test_range_without_from(self) -> None:
+        # when
+        response, payload = self.request("/range")
+        # then
+        self.assertEqual(400, response.status)
+        self.assertEqual({"error": "Parameter from is required"}, payload)
+
+    def test_range_incorrect_date(self) -> None:
+        # when
+        response, payload = self.request("/range?from=yesterday")
+        # then
+        self.assertEqual(400, response.status)
+        self.assertIn("Incorrect date", payload["error"])
+
+    def test_projects(self) -> None:
+        # when
+        _, payload = self.request("/projects?from=2024-01-01")
+        # then
+        self.assertEqual(
+            [
+                {"project": "", "worktime": 19800},
+                {"project": "ptymer", "worktime": 3600},
+            ],
+            payload["projects"],
+        )
+
+    def test_timestamps(self) -> None:
+        # when
+        _, payload = self.request("/timestamps?date=2024-01-02")
+        # then
+        self.assertEqual(
+            [
+                {"id": 3, "time": "2024-01-02 09:00:00", "event": "start"},
+                {"id": 4, "time": "2024-01-02 10:30:00", "event": "stop"},
+            ],
+            payload["timestamps"],
+        )
+
+    def test_unknown_endpoint(self) -> None:
+        # when
+        response, _ = self.request("/unknown")
+        # then
+        self.assertEqual(400, response.status)
+
+    def test_not_modified(self) -> None:
+        # given
+        response, _ = self.request("/today")
+        etag = response.getheader("ETag")
+        # when
+        response, payload = self.request("/today", {"If-None-Match": etag})
+        # then
+        self.assertEqual(304, response.status)
+        self.assertIsNone(payload)
+        self.assertEqual(etag, response.getheader("ETag"))
+
+    def test_modified_after_write(self) -> None:
+        # given
+        response, _ = self.request("/timestamps")
+        etag = response.getheader("ETag")
+        self.db.write_timestamp("start", "2024-01-03 10:00:00", "2024-01-03")
+        # when
+        response, payload = self.request("/timestamps", {"If-None-Match": etag})
+        # then
+        self.assertEqual(200, response.status)
+        self.assertNotEqual(etag, response.getheader("ETag"))
+        self.assertEqual(3, len(payload["timestamps"]))
+
+    def test_modified_after_import(self) -> None:
+        # given
+        response, _ = self.request("/timestamps")
+        etag = response.getheader("ETag")
+        laptop = Database(path.join(self.directory.name, "laptop.db"))
+        laptop.write_timestamp("start", "2024-01-03 10:00:00", "2024-01-03")
+        bundle = path.join(self.directory.name, "bundle.gz")
+        export_bundle(laptop, bundle)
+        laptop.close()
+        import_bundle(self.db, bundle)
+        # when
+        response, payload = self.request("/timestamps", {"If-None-Match": etag})
+        # then
+        self.assertEqual(200, response.status)
+        self.assertNotEqual(etag, response.getheader("ETag"))
+        self.assertEqual(3, len(payload["timestamps"]))
+
+    def test_idle_connections_do_not_block_workers(self) -> None:
+        # given
+        idle = [HTTPConnection("127.0.0.1", self.server.server_port) for _ in range(2)]
+        for connection in idle:
+            connection.request("GET", "/state")
+            connection.getresponse().read()
+        self.connection.timeout = 3
+        # when
+        response, _ = self.request("/state")
+        # then
+        self.assertEqual(200, response.status)
+        self.assertEqual("close", response.getheader("Connection"))
+        for connection in idle:
+            connection.close()
+
+    def test_internal_error(self) -> None:
+        # given
+        self.db.write_timestamp("stop", "2024-01-04 09:00:00", "2024-01-04")
+        patch("server.date.today", return_value=date(2024, 1, 4)).start()
+        # when
+        response, payload = self.request("/today")
+        # then
+        self.assertEqual(500, response.status)
+        self.assertIn("error", payload)
+        self.assertEqual(200, self.request("/state")[0].status)
+
+    def test_no_etag_while_running(self) -> None:
+        # given
+        self.db.write_timestamp("start", "2024-01-03 10:00:00", "2024-01-03")
+        # when
+        response, payload = self.request("/today")
+        # then
+        self.assertEqual(200, response.status)
+        self.assertIsNone(response.getheader("ETag"))
+        self.assertTrue(payload["running"])
@@ -0,0 +1,751 @@
+from datetime import datetime, timedelta
+from os import path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+from codec import EventRecord
+from database import Database
+from logfile import LogDatabase
+from memory import MemoryDatabase
+from storage import open_storage
+from timer import Timer
+
+
+class StorageConformance:
+    # shared behaviour of all storage engines, mixed into one TestCase per engine
+
+    def open(self):
+        raise NotImplementedError
+
+    def setUp(self) -> None:
+        self.directory = TemporaryDirectory()
+        self.db = self.open()
+        self.db.date_today = "2024-01-02"
+
+    def tearDown(self) -> None:
+        self.db.close()
+        self.directory.cleanup()
+
+    def _write_day(self) -> None:
+        self.db.write_timestamps(
+            [
+                ("start", "2024-01-02 08:00:00", "2024-01-02"),
+                ("stop", "2024-01-02 12:00:00", "2024-01-02"),
+                ("start", "2024-01-02 13:00:00", "2024-01-02"),
+            ]
+        )
+
+    def test_get_times_by(self) -> None:
+        # given
+        self._write_day()
+        # when
+        ascending = self.db.get_times_by("start")
+        descending = self.db.get_times_by("start", ascending=False)
+        # then
+        self.assertEqual(
+            [
+                EventRecord(1, "2024-01-02 08:00:00", "start"),
+                EventRecord(3, "2024-01-02 13:00:00", "start"),
+            ],
+            list(ascending),
+        )
+        self.assertEqual(list(ascending)[::-1], list(descending))
+
+    def test_get_last_event(self) -> None:
+        # given
+        self.assertIsNone(self.db.get_last_event())
+        self._write_day()
+        # when
+        result = self.db.get_last_event()
+        # then
+        self.assertEqual(("start",), tuple(result))
+
+    def test_write_timestamp_defaults_to_today(self) -> None:
+        # when
+        self.db.write_timestamp("start", "2024-01-02 08:00:00")
+        # then
+        self.assertEqual([("2024-01-02",)], self.db.get_dates_between("", "9999"))
+
+    def test_get_data_by_date(self) -> None:
+        # given
+        self.db.write_timestamp("stop", "2024-01-02 12:00:00")
+        self.db.write_timestamp("start", "2024-01-02 08:00:00")
+        self.db.write_timestamp("start", "2024-01-03 08:00:00", "2024-01-03")
+        # when
+        result = self.db.get_data_by_date("2024-01-02")
+        # then
+        self.assertEqual(
+            [
+                EventRecord(2, "2024-01-02 08:00:00", "start"),
+                EventRecord(1, "2024-01-02 12:00:00", "stop"),
+            ],
+            result,
+        )
+
+    def test_get_data_between(self) -> None:
+        # given
+        self._write_day()
+        self.db.write_timestamp("start", "2024-01-05 08:00:00", "2024-01-05")
+        # when
+        result = self.db.get_data_between("2024-01-01", "2024-01-04")
+        # then
+        self.assertEqual([1, 2, 3], [record.id for record in result])
+
+    def test_get_rows_by_id(self) -> None:
+        # given
+        self._write_day()
+        # when
+        result = self.db.get_rows_by_id([3, 1, 42])
+        # then
+        self.assertEqual(
+            [
+                EventRecord(1, "2024-01-02 08:00:00", "start"),
+                EventRecord(3, "2024-01-02 13:00:00", "start"),
+            ],
+            result,
+        )
+
+    def test_delete_row(self) -> None:
+        # given
+        self._write_day()
+        # when
+        deleted = self.db.delete_row(3)
+        not_deleted = self.db.delete_row(3)
+        # then
+        self.assertTrue(deleted)
+        self.assertFalse(not_deleted)
+        self.assertEqual(("stop",), tuple(self.db.get_last_event()))
+
+    def test_delete_rows(self) -> None:
+        # given
+        self._write_day()
+        # when
+        result = self.db.delete_rows([1, 2, 3, 42])
+        # then
+        self.assertEqual(3, result)
+        self.assertEqual([], list(self.db.get_data_by_date("2024-01-02")))
+        self.assertEqual([], list(self.db.get_dates_between("", "9999")))
+
+    def test_delete_row_batches(self) -> None:
+        # given
+        self._write_day()
+        # when
+        result = self.db.delete_row_batches([[1], [3, 4]])
+        # then
+        self.assertEqual(2, result)
+        self.assertEqual(
+            [2], [record.id for record in self.db.get_data_by_date("2024-01-02")]
+        )
+
+    def test_get_timestamp_page(self) -> None:
+        # given
+        self._write_day()
+        self.db.write_timestamp("stop", "2024-01-03 09:00:00", "2024-01-03")
+        self.db.write_timestamp("start", "2024-01-05 08:00:00", "2024-01-05")
+        # when
+        first = self.db.get_timestamp_page("2024-01-02", "2024-01-03", 2)
+        second = self.db.get_timestamp_page("2024-01-02", "2024-01-03", 2, first[-1][0])
+        # then
+        self.assertEqual(
+            [
+                (1, "2024-01-02", "2024-01-02 08:00:00", "start"),
+                (2, "2024-01-02", "2024-01-02 12:00:00", "stop"),
+            ],
+            [tuple(row) for row in first],
+        )
+        self.assertEqual(
+            [
+                (3, "2024-01-02", "2024-01-02 13:00:00", "start"),
+                (4, "2024-01-03", "2024-01-03 09:00:00", "stop"),
+            ],
+            [tuple(row) for row in second],
+        )
+
+    def test_iter_timestamps(self) -> None:
+        # given
+        self.db.write_timestamps(
+            [
+                ("start", "2024-01-03 08:00:00", "2024-01-03"),
+                ("stop", "2024-01-02 12:00:00", "2024-01-02"),
+                ("start", "2024-01-02 08:00:00", "2024-01-02"),
+            ]
+        )
+        # when
+        result = self.db.iter_timestamps()
+        # then
+        self.assertEqual(
+            [
+                (3, "2024-01-02", "start", "2024-01-02 08:00:00"),
+                (2, "2024-01-02", "stop", "2024-01-02 12:00:00"),
+                (1, "2024-01-03", "start", "2024-01-03 08:00:00"),
+            ],
+            [tuple(row) for row in result],
+        )
+
+    def test_rowids_are_unique(self) -> None:
+        # given
+        self._write_day()
+        self.db.delete_row(2)
+        # when
+        self.db.write_timestamp("stop", "2024-01-02 14:00:00")
+        # then
+        row_ids = [record.id for record in self.db.get_data_by_date("2024-01-02")]
+        self.assertEqual(len(row_ids), len(set(row_ids)))
+
+    def test_get_dates_between(self) -> None:
+        # given
+        self.db.write_timestamps(
+            [
+                ("start", "2024-01-03 08:00:00", "2024-01-03"),
+                ("start", "2024-01-01 08:00:00", "2024-01-01"),
+                ("stop", "2024-01-01 09:00:00", "2024-01-01"),
+                ("start", "2024-01-05 08:00:00", "2024-01-05"),
+            ]
+        )
+        # when
+        result = self.db.get_dates_between("2024-01-01", "2024-01-03")
+        # then
+        self.assertEqual(
+            [("2024-01-01",), ("2024-01-03",)], [tuple(row) for row in result]
+        )
+
+    def test_checkpoints(self) -> None:
+        # given
+        self.assertIsNone(self.db.get_last_checkpoint())
+        self.db.write_checkpoint("2024-01", 60)
+        self.db.write_checkpoint("2024-02", 120)
+        # when
+        result = self.db.get_last_checkpoint()
+        # then
+        self.assertEqual(("2024-02", 120), tuple(result))
+
+    def test_day_totals(self) -> None:
+        # given
+        self.assertIsNone(self.db.get_day_total("2024-01-02"))
+        self.db.write_day_total("2024-01-02", 3600)
+        # when
+        result = self.db.get_day_total("2024-01-02")
+        # then
+        self.assertEqual(3600, result)
+
+    def test_changes_drop_day_total(self) -> None:
+        # given
+        self._write_day()
+        for date_, change in (
+            (
+                "2024-01-02",
+                lambda: self.db.write_timestamp("stop", "2024-01-02 17:00:00"),
+            ),
+            ("2024-01-02", lambda: self.db.delete_rows([1])),
+            (
+                "2024-01-02",
+                lambda: self.db.write_timestamp("start", "2024-01-02 07:00:00"),
+            ),
+            (
+                "2024-01-03",
+                lambda: self.db.write_timestamps(
+                    [
+                        ("start", "2024-01-03 08:00:00", "2024-01-03"),
+                        ("stop", "2024-01-03 09:00:00", "2024-01-03"),
+                    ]
+                ),
+            ),
+        ):
+            self.db.write_day_total("2024-01-02", 3600)
+            self.db.write_day_total("2024-01-03", 3600)
+            with self.subTest(date_):
+                # when
+                change()
+                # then
+                self.assertIsNone(self.db.get_day_total(date_))
+
+    def test_appended_start_keeps_day_total(self) -> None:
+        # given
+        self._write_day()
+        self.db.write_timestamp("stop", "2024-01-02 14:00:00")
+        self.db.write_day_total("2024-01-02", 18000)
+        # when
+        self.db.write_timestamp("start", "2024-01-02 15:00:00")
+        # then
+        self.assertEqual(18000, self.db.get_day_total("2024-01-02"))
+
+    def test_stop_with_day_total(self) -> None:
+        # given
+        self._write_day()
+        # when
+        self.db.write_timestamp("stop", "2024-01-02 17:00:00", day_total=28800)
+        # then
+        self.assertEqual(28800, self.db.get_day_total("2024-01-02"))
+        self.assertEqual(("stop",), tuple(self.db.get_last_event()))
+
+    def test_start_and_stop_without_recalculation(self) -> None:
+        # given
+        self.db.date_today = "2024-01-01"
+        timer = Timer(self.db)
+        with patch("timer.datetime", wraps=datetime) as now:
+            now.now.return_value = datetime(2024, 1, 1, 8)
+            timer.create_timestamp("start")
+            now.now.return_value = datetime(2024, 1, 1, 9)
+            timer.create_timestamp("stop")
+            recalc = patch("timer.Timer.recalc_closed_worktime").start()
+            self.addCleanup(patch.stopall)
+            for hour in range(10, 18):
+                now.now.return_value = datetime(2024, 1, 1, hour)
+                # when
+                timer.create_timestamp("start" if hour % 2 == 0 else "stop")
+        # then
+        recalc.assert_not_called()
+        patch.stopall()
+        self.assertEqual(timedelta(hours=5), timer.calc_closed_worktime())
+        self.assertTrue(timer.check_day_total())
+
+    def test_get_last_time(self) -> None:
+        # given
+        self._write_day()
+        # when / then
+        self.assertEqual(
+            ("2024-01-02 13:00:00",), tuple(self.db.get_last_time("start"))
+        )
+        self.assertEqual(("2024-01-02 12:00:00",), tuple(self.db.get_last_time("stop")))
+        self.db.date_today = "2024-01-03"
+        self.assertIsNone(self.db.get_last_time("start"))
+
+    def test_incremental_day_total_matches_recalculation(self) -> None:
+        # given
+        self.db.date_today = "2024-01-01"
+        timer = Timer(self.db)
+        with patch("timer.datetime", wraps=datetime) as now:
+            for minutes in range(0, 600, 7):
+                now.now.return_value = datetime(2024, 1, 1, 8) + timedelta(
+                    minutes=minutes
+                )
+                event = "start" if timer.check_state_allowed("start") else "stop"
+                # when
+                timer.create_timestamp(event)
+                # then
+                self.assertTrue(timer.check_day_total())
+        self.assertEqual(timer.recalc_closed_worktime(), timer.calc_closed_worktime())
+
+    def test_balance_ignores_open_start_of_past_day(self) -> None:
+        # given
+        self.db.write_timestamp("start", "2023-12-01 08:00:00", "2023-12-01")
+        timer = Timer(self.db)
+        # when
+        result = timer.calc_balance()
+        # then
+        self.assertEqual(timedelta(hours=-8), result)
+        self.assertEqual(("2023-12", -28800), tuple(self.db.get_last_checkpoint()))
+
+    def test_changes_invalidate_later_checkpoints(self) -> None:
+        # given
+        self.db.write_checkpoint("2023-12", 60)
+        self.db.write_checkpoint("2024-01", 120)
+        self.db.write_checkpoint("2024-02", 180)
+        # when
+        self.db.write_timestamp("start", "2024-01-02 08:00:00")
+        # then
+        self.assertEqual(("2023-12", 60), tuple(self.db.get_last_checkpoint()))
+
+    def test_delete_invalidates_checkpoints(self) -> None:
+        # given
+        self._write_day()
+        self.db.write_checkpoint("2023-12", 60)
+        self.db.write_checkpoint("2024-01", 120)
+        # when
+        self.db.delete_rows([1])
+        # then
+        self.assertEqual(("2023-12", 60), tuple(self.db.get_last_checkpoint()))
+
+    def _write_projects(self) -> None:
+        self.db.write_timestamp("start", "2024-01-02 08:00:00", project="acme")
+        self.db.write_timestamp("stop", "2024-01-02 10:00:00")
+        self.db.write_timestamp(
+            "start", "2024-01-02 11:00:00", project="globex", tags=["dev", "call"]
+        )
+        self.db.write_timestamp("stop", "2024-01-02 11:30:00")
+        self.db.write_timestamp("start", "2024-01-02 13:00:00", tags=["dev"])
+        self.db.write_timestamp("stop", "2024-01-02 14:00:00")
+        self.db.write_timestamp(
+            "start", "2024-01-03 08:00:00", "2024-01-03", project="acme"
+        )
+        self.db.write_timestamp("stop", "2024-01-03 09:00:00", "2024-01-03")
+        self.db.write_timestamp(
+            "start", "2024-01-03 10:00:00", "2024-01-03", project="acme"
+        )
+
+    def test_get_project_totals(self) -> None:
+        # given
+        self._write_projects()
+        # when
+        result = self.db.get_project_totals("2024-01-01", "2024-01-31")
+        # then
+        self.assertEqual(
+            [("", 3600), ("acme", 10800), ("globex", 1800)],
+            [tuple(row) for row in result],
+        )
+
+    def test_get_project_totals_filtered(self) -> None:
+        # given
+        self._write_projects()
+        for project, tag, expected in (
+            ("acme", None, [("acme", 10800)]),
+            (None, "dev", [("", 3600), ("globex", 1800)]),
+            ("globex", "call", [("globex", 1800)]),
+            ("acme", "dev", []),
+        ):
+            with self.subTest(f"{project} {tag}"):
+                # when
+                result = self.db.get_project_totals(
+                    "2024-01-01", "2024-01-31", project, tag
+                )
+                # then
+                self.assertEqual(expected, [tuple(row) for row in result])
+
+    def test_get_daily_totals(self) -> None:
+        # given
+        self._write_projects()
+        # when
+        result = self.db.get_daily_totals("2024-01-01", "2024-01-31", "acme")
+        # then
+        self.assertEqual(
+            [("2024-01-02", 7200), ("2024-01-03", 3600)],
+            [tuple(row) for row in result],
+        )
+
+    def test_get_session_data(self) -> None:
+        # given
+        self._write_projects()
+        for date_, project, expected in (
+            ("2024-01-02", "globex", [3, 4]),
+            ("2024-01-02", "", [5, 6]),
+            ("2024-01-03", "acme", [7, 8, 9]),
+        ):
+            with self.subTest(project):
+                # when
+                result = self.db.get_session_data(date_, project)
+                # then
+                self.assertEqual(expected, [record.id for record in result])
+
+    def test_get_calendar_span(self) -> None:
+        for period, date_, expected in (
+            ("week", "2024-01-02", ("2024-01-01", "2024-01-07")),
+            ("week", "2021-01-01", ("2020-12-28", "2021-01-03")),
+            ("month", "2024-02-10", ("2024-02-01", "2024-02-29")),
+            ("quarter", "2024-05-01", ("2024-04-01", "2024-06-30")),
+            ("year", "2024-05-01", ("2024-01-01", "2024-12-31")),
+        ):
+            with self.subTest(f"{period} {date_}"):
+                # when
+                result = self.db.get_calendar_span(period, date_)
+                # then
+                self.assertEqual(expected, tuple(result))
+
+    def test_get_calendar_totals(self) -> None:
+        # given
+        self._write_projects()
+        # when
+        result = self.db.get_calendar_totals(
+            "2024-01-01", "2024-01-07", "date", now="2024-01-03 12:00:00"
+        )
+        # then
+        self.assertEqual(
+            [
+                ("2024-01-01", 0, 0, 28800),
+                ("2024-01-02", 1, 12600, 28800),
+                ("2024-01-03", 1, 10800, 28800),
+                ("2024-01-04", 0, 0, 28800),
+                ("2024-01-05", 0, 0, 28800),
+                ("2024-01-06", 0, 0, 0),
+                ("2024-01-07", 0, 0, 0),
+            ],
+            [tuple(row) for row in result],
+        )
+
+    def test_get_calendar_totals_grouped(self) -> None:
+        # given
+        self._write_projects()
+        self.db.write_timestamp("stop", "2024-01-03 11:00:00", "2024-01-03")
+        self.db.write_timestamp("start", "2024-02-01 08:00:00", "2024-02-01")
+        self.db.write_timestamp("stop", "2024-02-01 09:00:00", "2024-02-01")
+        for period, project, expected in (
+            (
+                "month",
+                None,
+                [("2024-01", 2, 19800), ("2024-02", 1, 3600), ("2024-03", 0, 0)],
+            ),
+            (
+                "month",
+                "acme",
+                [("2024-01", 2, 14400), ("2024-02", 0, 0), ("2024-03", 0, 0)],
+            ),
+            ("quarter", None, [("2024-Q1", 3, 23400)]),
+        ):
+            with self.subTest(f"{period} {project}"):
+                # when
+                result = self.db.get_calendar_totals(
+                    "2024-01-01",
+                    "2024-03-31",
+                    period,
+                    project,
+                    now="2024-04-01 12:00:00",
+                )
+                # then
+                self.assertEqual(expected, [tuple(row[:3]) for row in result])
+
+    def test_get_calendar_targets_follow_holidays(self) -> None:
+        # given
+        self.db.get_calendar_totals("2024-01-01", "2024-01-31", "month")
+        with patch("codec.Target.HOLIDAYS", ("2024-01-01",)):
+            # when
+            result = self.db.get_calendar_totals("2024-01-01", "2024-01-31", "month")
+        # then
+        self.assertEqual(22 * 8 * 3600, result[0][3])
+
+    def test_get_calendar_totals_unknown_period(self) -> None:
+        # when / then
+        with self.assertRaises(ValueError):
+            self.db.get_calendar_totals("2024-01-01", "2024-01-07", "decade")
+
+    def test_deleted_timestamp_loses_labels(self) -> None:
+        # given
+        self._write_projects()
+        # when
+        self.db.delete_rows([1, 2])
+        # then
+        self.assertEqual(
+            [("2024-01-03", 3600)],
+            [tuple(row) for row in self.db.get_daily_totals("", "9999", "acme")],
+        )
+
+    def test_timer_calculations(self) -> None:
+        # given
+        self._write_day()
+        self.db.write_timestamp("stop", "2024-01-02 17:00:00")
+        timer = Timer(self.db)
+        # when
+        worktime = timer.calc_worktime()
+        pausetime = timer.calc_pausetime()
+        # then
+        self.assertEqual(timedelta(hours=8), worktime)
+        self.assertEqual(timedelta(hours=1), pausetime)
+        self.assertTrue(timer.check_state_allowed("start"))
+
+
+class TestDatabaseConformance(StorageConformance, TestCase):
+
+    def open(self):
+        return Database(path.join(self.directory.name, "ptymer.db"))
+
+    def test_stop_is_one_commit(self) -> None:
+        # given
+        self.db.write_timestamp("start", "2024-01-02 08:00:00")
+        commits = []
+        self.db.con.set_trace_callback(
+            lambda statement: statement == "COMMIT" and commits.append(statement)
+        )
+        timer = Timer(self.db)
+        # when
+        with patch("timer.datetime", wraps=datetime) as now:
+            now.now.return_value = datetime(2024, 1, 2, 12)
+            timer.create_timestamp("stop")
+        # then
+        self.assertEqual(["COMMIT"], commits)
+        self.assertEqual(14400, self.db.get_day_total("2024-01-02"))
+
+
+class TestMemoryDatabaseConformance(StorageConformance, TestCase):
+
+    def open(self):
+        return MemoryDatabase()
+
+
+class TestLogDatabaseConformance(StorageConformance, TestCase):
+
+    def open(self):
+        return LogDatabase(path.join(self.directory.name, "ptymer.log"))
+
+    def _reopen(self) -> LogDatabase:
+        self.db.close()
+        self.db = LogDatabase(self.db.filename)
+        self.db.date_today = "2024-01-02"
+        return self.db
+
+    def test_state_is_replayed(self) -> None:
+        # given
+        self._write_day()
+        self.db.delete_row(2)
+        self.db.write_checkpoint("2023-12", 60)
+        self.db.write_day_total("2024-01-02", 3600)
+        # when
+        db = self._reopen()
+        # then
+        self.assertEqual(
+            [1, 3], [record.id for record in db.get_data_by_date("2024-01-02")]
+        )
+        self.assertEqual(("2023-12", 60), db.get_last_checkpoint())
+        self.assertEqual(3600, db.get_day_total("2024-01-02"))
+        db.write_timestamp("stop", "2024-01-02 17:00:00")
+        self.assertEqual(4, db.get_data_by_date("2024-01-02")[-1].id)
+
+    def test_checkpoints_of_other_targets_are_dropped(self) -> None:
+        for name, value in (
+            ("HOURS", (7, 7, 7, 7, 7, 0, 0)),
+            ("HOLIDAYS", ("2024-01-01",)),
+        ):
+            with self.subTest(name):
+                # given
+                self.db.write_checkpoint("2023-12", 60)
+                # when
+                with patch(f"codec.Target.{name}", value):
+                    db = self._reopen()
+                # then
+                self.assertIsNone(db.get_last_checkpoint())
+
+    def test_labels_are_replayed(self) -> None:
+        # given
+        self._write_projects()
+        self.db.compact()
+        # when
+        db = self._reopen()
+        # then
+        self.assertEqual(
+            [("", 3600), ("globex", 1800)],
+            db.get_project_totals("2024-01-01", "2024-01-02", tag="dev"),
+        )
+
+    def test_torn_line_is_ignored(self) -> None:
+        # given
+        self._write_day()
+        with open(self.db.filename, "a") as f:
+            f.write("+\t4\t2024-01-02\tst")
+        # when
+        db = self._reopen()
+        self.assertEqual(3, len(db.get_data_by_date("2024-01-02")))
+        db.write_timestamp("stop", "2024-01-02 17:00:00")
+        # then
+        self.assertEqual(4, len(self._reopen().get_data_by_date("2024-01-02")))
+
+    def test_compact(self) -> None:
+        # given
+        self._write_day()
+        self.db.delete_rows([1, 2])
+        self.db.write_checkpoint("2023-12", 60)
+        self.db.write_day_total("2024-01-02", 0)
+        # when
+        self.db.compact()
+        db = self._reopen()
+        # then
+        with open(db.filename) as f:
+            self.assertEqual(3, len(f.readlines()))
+        self.assertEqual(0, db.get_day_total("2024-01-02"))
+        self.assertEqual(
+            [EventRecord(3, "2024-01-02 13:00:00", "start")], db.get_rows_by_id([3])
+        )
+        self.assertEqual(("2023-12", 60), db.get_last_checkpoint())
+
+    def test_compact_on_open(self) -> None:
+        # given
+        patch("logfile.Log.COMPACT_MIN", 4).start()
+        self.addCleanup(patch.stopall)
+        self._write_day()
+        self.db.delete_rows([1, 2])
+        db = self._reopen()
+        # when
+        db.write_timestamp("stop", "2024-01-02 17:00:00")
+        # then
+        with open(db.filename) as f:
+            self.assertEqual(2, len(f.readlines()))
+        self.assertEqual(2, len(self._reopen().get_data_by_date("2024-01-02")))
+
+    def test_reader_does_not_compact(self) -> None:
+        # given
+        patch("logfile.Log.COMPACT_MIN", 4).start()
+        self.addCleanup(patch.stopall)
+        self._write_day()
+        self.db.delete_rows([1, 2])
+        # when
+        db = self._reopen()
+        db.get_data_by_date("2024-01-02")
+        db.close()
+        # then
+        with open(db.filename) as f:
+            self.assertEqual(5, len(f.readlines()))
+
+    def test_no_compact_below_minimum(self) -> None:
+        # given
+        self._write_day()
+        self.db.delete_rows([1, 2])
+        compact = patch("logfile.LogDatabase.compact").start()
+        self.addCleanup(patch.stopall)
+        # when
+        self._reopen()
+        # then
+        compact.assert_not_called()
+
+    def test_stop_is_one_write(self) -> None:
+        # given
+        self.db.write_timestamp("start", "2024-01-02 08:00:00")
+        fsync = patch("logfile.os.fsync").start()
+        self.addCleanup(patch.stopall)
+        timer = Timer(self.db)
+        # when
+        with patch("timer.datetime", wraps=datetime) as now:
+            now.now.return_value = datetime(2024, 1, 2, 12)
+            timer.create_timestamp("stop")
+        # then
+        fsync.assert_called_once()
+        self.assertEqual(14400, self._reopen().get_day_total("2024-01-02"))
+
+    def test_batch_is_one_write(self) -> None:
+        # given
+        fsync = patch("logfile.os.fsync").start()
+        self.addCleanup(patch.stopall)
+        # when
+        self._write_day()
+        # then
+        fsync.assert_called_once()
+
+
+class TestOpenStorage(TestCase):
+
+    def test_open_storage(self) -> None:
+        for engine, expected in (("memory", MemoryDatabase), ("sqlite", Database)):
+            with self.subTest(engine):
+                # given
+                patch("database.path.isfile", return_value=True).start()
+                patch("database.sqlite3").start()
+                # when
+                result = open_storage(":memory:", engine)
+                # then
+                self.assertIsInstance(result, expected)
+                patch.stopall()
+
+    def test_open_storage_with_user(self) -> None:
+        # given
+        patch("database.path.isfile", return_value=True).start()
+        patch("database.sqlite3").start()
+        self.addCleanup(patch.stopall)
+        # when
+        result = open_storage(":memory:", "sqlite", "alice")
+        # then
+        self.assertEqual("alice", result.user)
+        with self.assertRaises(ValueError):
+            open_storage("ptymer.log", "log", "alice")
+
+    def test_open_storage_with_hooks(self) -> None:
+        # given
+        patch("database.path.isfile", return_value=True).start()
+        patch("database.sqlite3").start()
+        self.addCleanup(patch.stopall)
+        # when
+        without = open_storage(":memory:", "sqlite")
+        patch("storage.Hooks.URL", "http://127.0.0.1:9000/events").start()
+        result = open_storage(":memory:", "sqlite")
+        # then
+        self.assertFalse(without.outbox)
+        self.assertTrue(result.outbox)
+
+    def test_open_storage_unknown_engine(self) -> None:
+        # when / then
+        with self.assertRaises(ValueError):
+            open_storage("ptymer.db", "csv")
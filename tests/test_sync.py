@@ -0,0 +1,201 @@
+import gzip
+import json
+from os import path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from database import Database
+from sync import (
+    BUNDLE_VERSION,
+    BundleError,
+    export_bundle,
+    get_machine_id,
+    import_bundle,
+)
+
+
+class TestSync(TestCase):
+
+    def setUp(self) -> None:
+        self.laptop_dir = TemporaryDirectory()
+        self.desktop_dir = TemporaryDirectory()
+        self.laptop = Database(path.join(self.laptop_dir.name, "ptymer.db"))
+        self.desktop = Database(path.join(self.desktop_dir.name, "ptymer.db"))
+        self.bundle = path.join(self.laptop_dir.name, "bundle.gz")
+
+    def tearDown(self) -> None:
+        self.laptop.close()
+        self.desktop.close()
+        self.laptop_dir.cleanup()
+        self.desktop_dir.cleanup()
+
+    @staticmethod
+    def _rows(db: Database) -> list:
+        return db.con.execute(
+            "SELECT date, event, time FROM timestamp ORDER BY time"
+        ).fetchall()
+
+    def test_export_and_import(self) -> None:
+        # given
+        self.laptop.write_timestamp("start", "2024-01-01 08:00:00", "2024-01-01")
+        self.laptop.write_timestamp("stop", "2024-01-01 17:00:00", "2024-01-01")
+        # when
+        exported = export_bundle(self.laptop, self.bundle)
+        applied = import_bundle(self.desktop, self.bundle)
+        # then
+        self.assertEqual(2, exported)
+        self.assertEqual(2, applied)
+        self.assertEqual(self._rows(self.laptop), self._rows(self.desktop))
+
+    def test_export_only_changes_since_last_export(self) -> None:
+        # given
+        self.laptop.write_timestamp("start", "2024-01-01 08:00:00", "2024-01-01")
+        export_bundle(self.laptop, self.bundle)
+        import_bundle(self.desktop, self.bundle)
+        self.laptop.write_timestamp("stop", "2024-01-01 17:00:00", "2024-01-01")
+        self.laptop.delete_row(1)
+        # when
+        exported = export_bundle(self.laptop, self.bundle)
+        applied = import_bundle(self.desktop, self.bundle)
+        # then
+        self.assertEqual(2, exported)
+        self.assertEqual(2, applied)
+        self.assertEqual(
+            [("2024-01-01", "stop", "2024-01-01 17:00:00")], self._rows(self.desktop)
+        )
+
+    def test_import_is_idempotent(self) -> None:
+        # given
+        self.laptop.write_timestamps(
+            [
+                ("start", "2024-01-01 08:00:00", "2024-01-01"),
+                ("stop", "2024-01-01 17:00:00", "2024-01-01"),
+            ]
+        )
+        export_bundle(self.laptop, self.bundle)
+        import_bundle(self.desktop, self.bundle)
+        export_bundle(self.laptop, self.bundle, full=True)
+        # when
+        applied = import_bundle(self.desktop, self.bundle)
+        # then
+        self.assertEqual(0, applied)
+        self.assertEqual(2, len(self._rows(self.desktop)))
+
+    def test_imported_changes_are_not_exported_again(self) -> None:
+        # given
+        self.laptop.write_timestamp("start", "2024-01-01 08:00:00", "2024-01-01")
+        export_bundle(self.laptop, self.bundle)
+        import_bundle(self.desktop, self.bundle)
+        # when
+        exported = export_bundle(self.desktop, self.bundle)
+        # then
+        self.assertEqual(0, exported)
+
+    def test_imported_changes_advance_the_changelog(self) -> None:
+        # given
+        self.laptop.write_timestamp("start", "2024-01-01 08:00:00", "2024-01-01")
+        export_bundle(self.laptop, self.bundle)
+        last_seq = self.desktop.get_last_seq()
+        # when
+        import_bundle(self.desktop, self.bundle)
+        # then
+        self.assertEqual(last_seq + 1, self.desktop.get_last_seq())
+        self.assertEqual("2024-01-01", self.desktop.get_first_changed_date(last_seq))
+
+    def test_import_own_bundle(self) -> None:
+        # given
+        self.laptop.write_timestamp("start", "2024-01-01 08:00:00", "2024-01-01")
+        export_bundle(self.laptop, self.bundle, full=True)
+        # when
+        applied = import_bundle(self.laptop, self.bundle)
+        # then
+        self.assertEqual(0, applied)
+        self.assertEqual(1, len(self._rows(self.laptop)))
+
+    def test_existing_timestamps_are_exported(self) -> None:
+        # given
+        db_file = path.join(self.laptop_dir.name, "old.db")
+        old = Database(db_file)
+        old.con.execute("DROP TABLE changelog")
+        old.con.execute(
+            "INSERT INTO timestamp(date, event, time) VALUES ('2024-01-01', 'start', '2024-01-01 08:00:00')"
+        )
+        old.con.commit()
+        old.close()
+        # when
+        exported = export_bundle(Database(db_file), self.bundle)
+        # then
+        self.assertEqual(1, exported)
+
+    def test_changelog_without_origin_is_migrated(self) -> None:
+        # given
+        db_file = path.join(self.laptop_dir.name, "old.db")
+        old = Database(db_file)
+        old.con.execute("ALTER TABLE changelog DROP COLUMN origin")
+        old.write_timestamp("start", "2024-01-01 08:00:00", "2024-01-01")
+        old.close()
+        # when
+        exported = export_bundle(Database(db_file), self.bundle)
+        # then
+        self.assertEqual(1, exported)
+
+    def test_import_unsupported_version(self) -> None:
+        # given
+        with gzip.open(self.bundle, "wt") as f:
+            json.dump({"version": 99, "origin": "x", "changes": []}, f)
+        # when / then
+        with self.assertRaises(BundleError):
+            import_bundle(self.desktop, self.bundle)
+
+    def test_import_malformed_bundle(self) -> None:
+        change = [1, "insert", "2024-01-01", "start", "2024-01-01 08:00:00"]
+        cases = {
+            "not an object": [],
+            "missing origin": {"version": BUNDLE_VERSION, "changes": []},
+            "missing changes": {"version": BUNDLE_VERSION, "origin": "x"},
+            "change is no list": {
+                "version": BUNDLE_VERSION,
+                "origin": "x",
+                "changes": [{}],
+            },
+            "short change": {
+                "version": BUNDLE_VERSION,
+                "origin": "x",
+                "changes": [change[:4]],
+            },
+            "unknown op": {
+                "version": BUNDLE_VERSION,
+                "origin": "x",
+                "changes": [[1, "update", *change[2:]]],
+            },
+            "seq no number": {
+                "version": BUNDLE_VERSION,
+                "origin": "x",
+                "changes": [["1", *change[1:]]],
+            },
+            "time no string": {
+                "version": BUNDLE_VERSION,
+                "origin": "x",
+                "changes": [[*change[:4], 1]],
+            },
+        }
+        for name, bundle in cases.items():
+            with self.subTest(name):
+                # given
+                with gzip.open(self.bundle, "wt") as f:
+                    json.dump(bundle, f)
+                # when / then
+                with self.assertRaises(BundleError):
+                    import_bundle(self.desktop, self.bundle)
+        self.assertEqual([], self._rows(self.desktop))
+
+    def test_import_missing_bundle(self) -> None:
+        # when / then
+        with self.assertRaises(BundleError):
+            import_bundle(self.desktop, path.join(self.desktop_dir.name, "missing"))
+
+    def test_machine_id_is_stable(self) -> None:
+        # when
+        machine_id = get_machine_id(self.laptop)
+        # then
+        self.assertEqual(machine_id, get_machine_id(self.laptop))
+        self.assertNotEqual(machine_id, get_machine_id(self.desktop))
@@ -1,8 +1,9 @@
 from unittest import TestCase
 from unittest.mock import MagicMock, call, patch
+from codec import EventRecord
 from database import Database
 from timer import Timer
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 
 class TestTimer(TestCase):
@@ -10,6 +11,7 @@ class TestTimer(TestCase):
     def setUp(self) -> None:
         self.filename = ":memory:"
         self.db = MagicMock(spec=Database)
+        self.db.date_today = "2024-01-01"
         now = patch("timer.datetime", wraps=datetime).start()
         now.now.return_value = datetime.strptime(
             "2024-01-01 17:00:00", "%Y-%m-%d %H:%M:%S"
@@ -26,7 +28,15 @@ class TestTimer(TestCase):
         timer.create_timestamp("start")
         # then
         self.db.assert_has_calls(
-            [call.write_timestamp(event="start", time_stamp="2024-01-01 17:00:00")]
+            [
+                call.write_timestamp(
+                    event="start",
+                    time_stamp="2024-01-01 17:00:00",
+                    project=None,
+                    tags=(),
+                    day_total=None,
+                )
+            ]
         )
 
     def test_create_timestamp_collision(self) -> None:
@@ -40,6 +50,91 @@ class TestTimer(TestCase):
         # then
         self.assertEqual("Timestamp collision", str(e.exception))
 
+    def test_create_stop_timestamp_updates_day_total(self) -> None:
+        # given
+        self.db.date_today = "2024-01-01"
+        patch("app.Timer._check_valid_timestamp", return_value=True).start()
+        self.db.get_day_total.return_value = 3600
+        self.db.get_last_time.return_value = ("2024-01-01 16:15:00",)
+        timer = Timer(self.db)
+        # when
+        timer.create_timestamp("stop")
+        # then
+        self.db.get_last_time.assert_called_once_with("start")
+        self.db.get_data_by_date.assert_not_called()
+        self.db.write_day_total.assert_not_called()
+        self.db.assert_has_calls(
+            [
+                call.write_timestamp(
+                    event="stop",
+                    time_stamp="2024-01-01 17:00:00",
+                    project=None,
+                    tags=(),
+                    day_total=6300,
+                ),
+            ]
+        )
+
+    def test_calc_closed_worktime(self) -> None:
+        # given
+        self.db.date_today = "2024-01-01"
+        self.db.get_day_total.return_value = 6300
+        timer = Timer(self.db)
+        # when
+        result = timer.calc_closed_worktime()
+        # then
+        self.assertEqual(timedelta(hours=1, minutes=45), result)
+        self.db.get_data_by_date.assert_not_called()
+
+    def test_calc_closed_worktime_without_day_total(self) -> None:
+        # given
+        self.db.date_today = "2024-01-01"
+        self.db.get_day_total.return_value = None
+        self.db.get_data_by_date.return_value = [
+            EventRecord(1, "2024-01-01 08:00:00", "start"),
+            EventRecord(2, "2024-01-01 12:00:00", "stop"),
+            EventRecord(3, "2024-01-01 13:00:00", "start"),
+        ]
+        timer = Timer(self.db)
+        # when
+        result = timer.calc_closed_worktime()
+        # then
+        self.assertEqual(timedelta(hours=4), result)
+        self.db.write_day_total.assert_called_once_with("2024-01-01", 14400)
+
+    def test_calc_worktime_at(self) -> None:
+        for last_event, expected in (
+            (("start",), timedelta(hours=5)),
+            (("stop",), timedelta(hours=4)),
+        ):
+            with self.subTest(last_event):
+                # given
+                self.db.date_today = "2024-01-01"
+                self.db.get_day_total.return_value = 14400
+                self.db.get_last_event.return_value = last_event
+                self.db.get_last_time.return_value = ("2024-01-01 13:00:00",)
+                timer = Timer(self.db)
+                # when
+                result = timer.calc_worktime_at(datetime(2024, 1, 1, 14))
+                # then
+                self.assertEqual(expected, result)
+
+    def test_check_day_total(self) -> None:
+        self.db.date_today = "2024-01-01"
+        for stored, expected in ((None, True), (14400, True), (14000, False)):
+            with self.subTest(stored):
+                # given
+                self.db.get_day_total.return_value = stored
+                self.db.get_data_by_date.return_value = [
+                    EventRecord(1, "2024-01-01 08:00:00", "start"),
+                    EventRecord(2, "2024-01-01 12:00:00", "stop"),
+                ]
+                timer = Timer(self.db)
+                # when
+                result = timer.check_day_total()
+                # then
+                self.assertEqual(expected, result)
+
     def test_check_state_allowed(self) -> None:
         # given
         self.db.get_last_event.side_effect = [("start",), ("start",), None, None]
@@ -64,8 +159,14 @@ class TestTimer(TestCase):
     def test_calc_duration(self) -> None:
         # given
         date_ = "2024-01-01"
-        times_1 = [(f"{date_} 12:00:00",), (f"{date_} 17:00:00",)]
-        times_2 = [(f"{date_} 08:00:00",), (f"{date_} 13:00:00",)]
+        times_1 = [
+            EventRecord(2, f"{date_} 12:00:00", "stop"),
+            EventRecord(4, f"{date_} 17:00:00", "stop"),
+        ]
+        times_2 = [
+            EventRecord(1, f"{date_} 08:00:00", "start"),
+            EventRecord(3, f"{date_} 13:00:00", "start"),
+        ]
         timer = Timer(self.db)
         # when
         duration = timer.calc_duration(times_1, times_2)
@@ -75,8 +176,11 @@ class TestTimer(TestCase):
     def test_calc_duration_with_uneven_times(self) -> None:
         # given
         date_ = "2024-01-01"
-        times_1 = [(f"{date_} 12:00:00",)]
-        times_2 = [(f"{date_} 08:00:00",), (f"{date_} 13:00:00",)]
+        times_1 = [EventRecord(2, f"{date_} 12:00:00", "stop")]
+        times_2 = [
+            EventRecord(1, f"{date_} 08:00:00", "start"),
+            EventRecord(3, f"{date_} 13:00:00", "start"),
+        ]
         timer = Timer(self.db)
         # when
         duration = timer.calc_duration(times_1, times_2)
@@ -86,7 +190,7 @@ class TestTimer(TestCase):
     def test_check_valid_timestamp(self) -> None:
         # given
         timer = Timer(self.db)
-        self.db.get_times_by.return_value = [("2024-01-01 17:00:00",)]
+        self.db.get_last_time.return_value = ("2024-01-01 17:00:00",)
         time_stamp = datetime.strptime("2024-01-01 17:10:00", "%Y-%m-%d %H:%M:%S")
         # when
         result = timer._check_valid_timestamp(time_stamp, "start")
@@ -96,7 +200,7 @@ class TestTimer(TestCase):
     def test_check_timestamp_without_entries(self) -> None:
         # given
         timer = Timer(self.db)
-        self.db.get_times_by.return_value = None
+        self.db.get_last_time.return_value = None
         time_stamp = datetime.strptime("2024-01-01 17:10:00", "%Y-%m-%d %H:%M:%S")
         # when
         result = timer._check_valid_timestamp(time_stamp, "start")
@@ -106,7 +210,7 @@ class TestTimer(TestCase):
     def test_check_invalid_timestamp(self) -> None:
         # given
         timer = Timer(self.db)
-        self.db.get_times_by.return_value = [("2024-01-01 17:00:00",)]
+        self.db.get_last_time.return_value = ("2024-01-01 17:00:00",)
         time_stamp = datetime.strptime("2024-01-01 16:09:00", "%Y-%m-%d %H:%M:%S")
         # when
         result = timer._check_valid_timestamp(time_stamp, "start")
@@ -115,7 +219,7 @@ class TestTimer(TestCase):
 
     def test_calc_worktime_no_times(self) -> None:
         # given
-        self.db.get_times_by.side_effect = ([], [])
+        self.db.get_data_by_date.return_value = []
         timer = Timer(self.db)
         # when
         with self.assertRaises(Exception) as e:
@@ -126,7 +230,10 @@ class TestTimer(TestCase):
     def test_calc_worktime(self) -> None:
         # given
         patch("timer.Timer.calc_duration", return_value={}).start()
-        self.db.get_times_by.side_effect = ([("t1",)], [("t2",)])
+        self.db.get_data_by_date.return_value = [
+            EventRecord(1, "2024-01-01 08:00:00", "start"),
+            EventRecord(2, "2024-01-01 12:00:00", "stop"),
+        ]
         timer = Timer(self.db)
         # when
         result = timer.calc_worktime()
@@ -135,18 +242,21 @@ class TestTimer(TestCase):
 
     def test_calc_worktime_more_start_times(self) -> None:
         # given
-        test = patch("timer.Timer.calc_duration", return_value={}).start()
-        self.db.get_times_by.side_effect = ([("t1",), ("t2",)], [("t3",)])
+        self.db.get_data_by_date.return_value = [
+            EventRecord(1, "2024-01-01 08:00:00", "start"),
+            EventRecord(2, "2024-01-01 12:00:00", "stop"),
+            EventRecord(3, "2024-01-01 13:00:00", "start"),
+        ]
         timer = Timer(self.db)
         # when
         result = timer.calc_worktime()
         # then
-        self.assertEqual({}, result)
-        test.assert_called_with([("t3",), ("2024-01-01 17:00:00",)], [("t1",), ("t2",)])
+        self.assertEqual(timedelta(hours=8), result)
+        self.db.get_data_by_date.assert_called_once_with("2024-01-01")
 
     def test_calc_pausetime_no_times(self) -> None:
         # given
-        self.db.get_times_by.side_effect = ([], [])
+        self.db.get_data_by_date.return_value = []
         timer = Timer(self.db)
         # when
         result = timer.calc_pausetime()
@@ -156,7 +266,10 @@ class TestTimer(TestCase):
     def test_calc_pausetime(self) -> None:
         # given
         patch("timer.Timer.calc_duration", return_value={}).start()
-        self.db.get_times_by.side_effect = (("t1",), ("t2",))
+        self.db.get_data_by_date.return_value = [
+            EventRecord(1, "2024-01-01 08:00:00", "start"),
+            EventRecord(2, "2024-01-01 12:00:00", "stop"),
+        ]
         timer = Timer(self.db)
         # when
         result = timer.calc_pausetime()
@@ -164,13 +277,243 @@ class TestTimer(TestCase):
         self.assertEqual({}, result)
 
     def test_calc_week(self) -> None:
-        # gicen
-        self.db.date_today = "2024-01-02"
-        patch("timer.Timer.calc_worktime", side_effect=["1", "2", "3"]).start()
+        # given
+        self.db.date_today = "2024-01-03"
+        self.db.get_calendar_span.return_value = ("2024-01-01", "2024-01-07")
+        self.db.get_calendar_totals.return_value = [
+            ("2024-01-01", 1, 3600, 28800),
+            ("2024-01-02", 0, 0, 28800),
+            ("2024-01-03", 1, 7200, 28800),
+            ("2024-01-04", 0, 0, 28800),
+        ]
         timer = Timer(self.db)
-        expected_date_1 = datetime.strptime(self.db.date_today, "%Y-%m-%d")
-        expected_date_2 = datetime.strptime("2024-01-01", "%Y-%m-%d")
         # when
         result = timer.calc_week()
         # then
-        self.assertEqual([(expected_date_1, "1"), (expected_date_2, "2")], result)
+        self.db.get_calendar_span.assert_called_once_with("week", "2024-01-03")
+        self.db.get_calendar_totals.assert_called_once_with(
+            "2024-01-01", "2024-01-07", "date", None, None, "2024-01-01 17:00:00"
+        )
+        self.assertEqual(
+            [
+                (date(2024, 1, 3), timedelta(hours=2)),
+                (date(2024, 1, 1), timedelta(hours=1)),
+            ],
+            result,
+        )
+
+    def test_calc_week_with_offset(self) -> None:
+        # given
+        self.db.date_today = "2024-01-03"
+        self.db.get_calendar_span.return_value = ("2023-12-18", "2023-12-24")
+        self.db.get_calendar_totals.return_value = []
+        timer = Timer(self.db)
+        # when
+        result = timer.calc_week(offset=2)
+        # then
+        self.db.get_calendar_span.assert_called_once_with("week", "2023-12-20")
+        self.assertEqual([], result)
+
+    def test_calc_month(self) -> None:
+        # given
+        self.db.date_today = "2024-03-15"
+        self.db.get_calendar_span.return_value = ("2024-01-01", "2024-01-31")
+        self.db.get_calendar_totals.return_value = [("2024-W01", 2, 3600, 144000)]
+        timer = Timer(self.db)
+        # when
+        result = timer.calc_month(offset=2, project="acme")
+        # then
+        self.db.get_calendar_span.assert_called_once_with("month", "2024-01-01")
+        self.db.get_calendar_totals.assert_called_once_with(
+            "2024-01-01", "2024-01-31", "week", "acme", None, "2024-01-01 17:00:00"
+        )
+        self.assertEqual(
+            [("2024-W01", 2, timedelta(hours=1), timedelta(hours=40))], result
+        )
+
+    def test_calc_month_over_year_boundary(self) -> None:
+        # given
+        self.db.date_today = "2024-01-15"
+        self.db.get_calendar_span.return_value = ("2023-12-01", "2023-12-31")
+        timer = Timer(self.db)
+        # when
+        timer.calc_month(offset=1)
+        # then
+        self.db.get_calendar_span.assert_called_once_with("month", "2023-12-01")
+
+    def test_calc_year(self) -> None:
+        # given
+        self.db.date_today = "2024-03-15"
+        self.db.get_calendar_span.return_value = ("2023-01-01", "2023-12-31")
+        self.db.get_calendar_totals.return_value = []
+        timer = Timer(self.db)
+        # when
+        timer.calc_year(offset=1, tag="dev")
+        # then
+        self.db.get_calendar_span.assert_called_once_with("year", "2023-01-01")
+        self.db.get_calendar_totals.assert_called_once_with(
+            "2023-01-01", "2023-12-31", "month", None, "dev", "2024-01-01 17:00:00"
+        )
+
+    def test_calc_balance_without_checkpoint(self) -> None:
+        # given
+        self.db.date_today = "2024-02-05"
+        self.db.get_last_checkpoint.return_value = None
+        self.db.get_dates_between.return_value = [
+            ("2024-01-30",),
+            ("2024-01-31",),
+            ("2024-02-05",),
+        ]
+        patch(
+            "timer.Timer.recalc_closed_worktime",
+            side_effect=[timedelta(hours=9), timedelta(hours=8)],
+        ).start()
+        patch("timer.Timer.calc_worktime", return_value=timedelta(hours=7)).start()
+        timer = Timer(self.db)
+        # when
+        result = timer.calc_balance()
+        # then
+        self.assertEqual(timedelta(), result)
+        self.db.get_dates_between.assert_called_once_with("", "2024-02-05")
+        self.db.write_checkpoint.assert_called_once_with("2024-01", 3600)
+        self.assertEqual("2024-02-05", self.db.date_today)
+
+    def test_calc_balance_from_checkpoint(self) -> None:
+        # given
+        self.db.date_today = "2024-12-07"
+        self.db.get_last_checkpoint.return_value = ("2024-11", -1800)
+        self.db.get_dates_between.return_value = [("2024-12-07",)]
+        patch("timer.Timer.calc_worktime", return_value=timedelta(hours=2)).start()
+        timer = Timer(self.db)
+        # when
+        result = timer.calc_balance()
+        # then
+        self.assertEqual(timedelta(hours=1, minutes=30), result)
+        self.db.get_dates_between.assert_called_once_with("2024-12-01", "2024-12-07")
+        self.db.write_checkpoint.assert_not_called()
+
+    def test_calc_balance_day_without_start(self) -> None:
+        # given
+        self.db.date_today = "2024-01-01"
+        self.db.get_last_checkpoint.return_value = None
+        self.db.get_dates_between.return_value = [("2024-01-01",)]
+        patch("timer.Timer.calc_worktime", side_effect=Exception()).start()
+        timer = Timer(self.db)
+        # when
+        result = timer.calc_balance()
+        # then
+        self.assertEqual(timedelta(hours=-8), result)
+
+    def test_calc_balance_on_holiday(self) -> None:
+        # given
+        self.db.date_today = "2024-01-01"
+        self.db.get_last_checkpoint.return_value = None
+        self.db.get_dates_between.return_value = [("2024-01-01",)]
+        patch("timer.Timer.calc_worktime", return_value=timedelta(hours=2)).start()
+        patch("codec.Target.HOLIDAYS", ("2024-01-01",)).start()
+        timer = Timer(self.db)
+        # when
+        result = timer.calc_balance()
+        # then
+        self.assertEqual(timedelta(hours=2), result)
+
+    def test_next_period(self) -> None:
+        for period, expected in (("2024-01", "2024-02-01"), ("2024-12", "2025-01-01")):
+            with self.subTest(period):
+                # when
+                result = Timer._next_period(period)
+                # then
+                self.assertEqual(expected, result)
+
+    def test_calc_range(self) -> None:
+        # given
+        self.db.date_today = "2024-01-10"
+        self.db.get_dates_between.return_value = [
+            ("2024-01-02",),
+            ("2024-01-03",),
+            ("2024-01-10",),
+        ]
+        recalc = patch(
+            "timer.Timer.recalc_closed_worktime",
+            side_effect=[timedelta(hours=1), timedelta()],
+        ).start()
+        patch("timer.Timer.calc_worktime", side_effect=Exception()).start()
+        timer = Timer(self.db)
+        # when
+        result = timer.calc_range(date(2024, 1, 1), date(2024, 1, 10))
+        # then
+        self.assertEqual(
+            [(date(2024, 1, 2), timedelta(hours=1)), (date(2024, 1, 3), timedelta())],
+            result,
+        )
+        self.assertEqual(2, recalc.call_count)
+        self.db.get_dates_between.assert_called_once_with("2024-01-01", "2024-01-10")
+        self.assertEqual("2024-01-10", self.db.date_today)
+
+    def test_calc_range_with_archive(self) -> None:
+        # given
+        self.db.date_today = "2024-01-10"
+        self.db.get_dates_between.return_value = [("2024-01-04",)]
+        patch(
+            "timer.Timer.recalc_closed_worktime", return_value=timedelta(hours=2)
+        ).start()
+        archive = MagicMock(until=date(2024, 1, 4))
+        archive.calc_days.return_value = [(date(2024, 1, 2), timedelta(hours=1))]
+        timer = Timer(self.db)
+        # when
+        result = timer.calc_range(date(2024, 1, 1), date(2024, 1, 5), archive)
+        # then
+        self.assertEqual(
+            [
+                (date(2024, 1, 2), timedelta(hours=1)),
+                (date(2024, 1, 4), timedelta(hours=2)),
+            ],
+            result,
+        )
+        archive.calc_days.assert_called_once_with(date(2024, 1, 1), date(2024, 1, 3))
+        self.db.get_dates_between.assert_called_once_with("2024-01-04", "2024-01-05")
+
+    def test_create_timestamp_with_project(self) -> None:
+        # given
+        patch("app.Timer._check_valid_timestamp", return_value=True).start()
+        timer = Timer(self.db)
+        # when
+        timer.create_timestamp("start", project="acme", tags=["dev"])
+        # then
+        self.db.write_timestamp.assert_called_once_with(
+            event="start",
+            time_stamp="2024-01-01 17:00:00",
+            project="acme",
+            tags=["dev"],
+            day_total=None,
+        )
+
+    def test_calc_week_for_project(self) -> None:
+        # given
+        self.db.date_today = "2024-01-04"
+        self.db.get_calendar_span.return_value = ("2024-01-01", "2024-01-07")
+        self.db.get_calendar_totals.return_value = [("2024-01-03", 1, 7200, 0)]
+        timer = Timer(self.db)
+        # when
+        result = timer.calc_week("acme")
+        # then
+        self.db.get_calendar_totals.assert_called_once_with(
+            "2024-01-01", "2024-01-07", "date", "acme", None, "2024-01-01 17:00:00"
+        )
+        self.assertEqual([(date(2024, 1, 3), timedelta(hours=2))], result)
+
+    def test_calc_project_totals(self) -> None:
+        # given
+        self.db.get_project_totals.return_value = [("", 60), ("acme", 3600)]
+        timer = Timer(self.db)
+        # when
+        result = timer.calc_project_totals(
+            date(2024, 1, 1), date(2024, 1, 31), tag="dev"
+        )
+        # then
+        self.db.get_project_totals.assert_called_once_with(
+            "2024-01-01", "2024-01-31", None, "dev"
+        )
+        self.assertEqual(
+            [("", timedelta(minutes=1)), ("acme", timedelta(hours=1))], result
+        )
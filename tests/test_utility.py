@@ -1,5 +1,6 @@
 from unittest import TestCase
-from unittest.mock import patch, call
+from unittest.mock import mock_open, patch, call
+from codec import EventRecord
 from utility import (
     db_file_existing,
     output_with_timestamp,
@@ -9,8 +10,17 @@ from utility import (
     output_day,
     remove_time_from_date_time,
     _format_timedelta,
+    format_balance,
+    output_entries,
+    read_lines,
+    output_report,
+    output_projects,
+    output_periods,
+    output_issue,
+    check_label,
 )
 from datetime import datetime, date, timedelta
+from doctor import Issue
 
 
 class TestUtility(TestCase):
@@ -90,9 +100,9 @@ class TestUtility(TestCase):
         with patch("utility.Table") as mock:
             console = patch("utility.console.print").start()
             data = [
-                (54, "2024-01-03 12:00:12", "start"),
-                (55, "2024-01-03 22:22:22", "stop"),
-                (56, "2024-01-03 23:23:42", "start"),
+                EventRecord(54, "2024-01-03 12:00:12", "start"),
+                EventRecord(55, "2024-01-03 22:22:22", "stop"),
+                EventRecord(56, "2024-01-03 23:23:42", "start"),
             ]
             expected_calls = [
                 call("Index", "Time", "Event"),
@@ -137,3 +147,130 @@ class TestUtility(TestCase):
         result = _format_timedelta(timedelta_)
         # then
         self.assertEqual("25:00:00", result)
+
+    def test_format_balance(self) -> None:
+        for balance, expected in (
+            (timedelta(hours=1, minutes=30), "+1:30:00"),
+            (timedelta(minutes=-90), "-1:30:00"),
+            (timedelta(), "+0:00:00"),
+        ):
+            with self.subTest(expected):
+                # when
+                result = format_balance(balance)
+                # then
+                self.assertEqual(expected, result)
+
+    def test_output_entries(self) -> None:
+        # given
+        with patch("utility.Table") as mock:
+            console = patch("utility.console.print").start()
+            data = [
+                (54, "2024-01-03 12:00:12", "start"),
+                ("new", "2024-01-04 22:22:22", "stop"),
+            ]
+            expected_calls = [
+                call("Index", "Timestamp", "Event"),
+                call().add_row("54", "2024-01-03 12:00:12", "start"),
+                call().add_row("new", "2024-01-04 22:22:22", "stop"),
+            ]
+            # when
+            output_entries(data)
+            # then
+            console.assert_called_once()
+            mock.assert_has_calls(expected_calls)
+
+    def test_read_lines(self) -> None:
+        # given
+        content = "# comment\n2024-01-01 08:00:00 start\n\n 42 \n"
+        patch("builtins.open", mock_open(read_data=content)).start()
+        # when
+        result = read_lines("entries.txt")
+        # then
+        self.assertEqual(["2024-01-01 08:00:00 start", "42"], result)
+
+    def test_output_report(self) -> None:
+        # given
+        with patch("utility.Table") as mock:
+            console = patch("utility.console.print").start()
+            data = [
+                (date(2024, 1, 1), timedelta(hours=8)),
+                (date(2024, 1, 2), timedelta(hours=10)),
+                (date(2024, 1, 3), timedelta(hours=6)),
+            ]
+            expected_calls = [
+                call("Statistic", "Value"),
+                call().add_row("Days", "3"),
+                call().add_row("Overall", "24:00:00"),
+                call().add_row("Average", "8:00:00"),
+                call().add_row("Longest", "10:00:00 (2024-01-02)"),
+            ]
+            # when
+            output_report(data)
+            # then
+            console.assert_called_once()
+            mock.assert_has_calls(expected_calls)
+
+    def test_output_periods(self) -> None:
+        # given
+        with patch("utility.Table") as mock:
+            console = patch("utility.console.print").start()
+            data = [
+                ("2024-01", 2, timedelta(hours=9), timedelta(hours=184)),
+                ("2024-02", 1, timedelta(hours=30), timedelta(hours=168)),
+            ]
+            expected_calls = [
+                call("Month", "Days", "Worktime", "Target"),
+                call().add_row("2024-01", "2", "9:00:00", "184:00:00"),
+                call().add_row("2024-02", "1", "30:00:00", "168:00:00"),
+                call().add_section(),
+                call().add_row("Overall", "3", "39:00:00", "352:00:00"),
+            ]
+            # when
+            output_periods(data, "Month")
+            # then
+            console.assert_called_once()
+            mock.assert_has_calls(expected_calls)
+
+    def test_output_issue(self) -> None:
+        # given
+        with patch("utility.print") as mock:
+            issue = Issue("2024-01-02", 7, "2024-01-02 08:00:00", "duplicate", True)
+            # when
+            output_issue(issue)
+            # then
+            mock.assert_called_once_with(
+                "[red]⏱[/red] 2024-01-02 #7 2024-01-02 08:00:00: duplicate [dim](fixable)[/dim]"
+            )
+
+    def test_output_projects(self) -> None:
+        # given
+        with patch("utility.Table") as mock:
+            console = patch("utility.console.print").start()
+            data = [("", timedelta(hours=1)), ("acme", timedelta(hours=7))]
+            expected_calls = [
+                call("Project", "Worktime"),
+                call().add_row("-", "1:00:00"),
+                call().add_row("acme", "7:00:00"),
+                call().add_section(),
+                call().add_row("Overall", "8:00:00"),
+            ]
+            # when
+            output_projects(data)
+            # then
+            console.assert_called_once()
+            mock.assert_has_calls(expected_calls)
+
+    def test_check_label(self) -> None:
+        for name, expected in (
+            ("acme", True),
+            ("client x", True),
+            ("", False),
+            (" ", False),
+            ("a,b", False),
+            ("a\tb", False),
+        ):
+            with self.subTest(name):
+                # when
+                result = check_label(name)
+                # then
+                self.assertEqual(expected, result)
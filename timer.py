@@ -1,13 +1,23 @@
 from contextlib import suppress
-from typing import List, Literal, Optional
-from database import Database
-from constants import Event, Format, InfoText
-from datetime import timedelta, datetime
+from itertools import islice
+from typing import Iterable, List, Literal, Optional
+from archive import Archive
+from storage import Storage
+from constants import Event, InfoText, Period
+from datetime import date, timedelta, datetime
+from codec import (
+    EventRecord,
+    calendar_day,
+    format_datetime,
+    parse_date,
+    parse_datetime,
+    format_date,
+)
 
 
 class Timer:
 
-    def __init__(self, db: Database):
+    def __init__(self, db: Storage):
         self.db = db
 
     def check_state_allowed(self, event: Literal["start", "stop", None]) -> bool:
@@ -19,16 +29,15 @@ class Timer:
         return True
 
     def calc_worktime(self) -> timedelta:
-        times_start = self.db.get_times_by(event=Event.START, ascending=True)
-        times_stop = self.db.get_times_by(event=Event.STOP, ascending=True)
+        times_start, times_stop = self._get_day_records()
 
         if times_start:
+            worktime = self.calc_duration(times_stop, times_start)
             if self._timer_not_stopped(times_start, times_stop):
-                current_time = self._calc_time_stamp()
-                current_time = (current_time.strftime(Format.DATETIME),)
-
-                times_stop.append(current_time)
-            return self.calc_duration(times_stop, times_start)
+                # the running session counts until now, in whole seconds like the stored ones
+                current_time = self._calc_time_stamp().replace(microsecond=0)
+                worktime += current_time - times_start[len(times_stop)].value
+            return worktime
         else:
             raise Exception(InfoText.WARN_DURATION)
 
@@ -40,33 +49,85 @@ class Timer:
             return False
 
     def calc_pausetime(self) -> Optional[timedelta]:
-        times_start = self.db.get_times_by(event=Event.START, ascending=True)
-        times_stop = self.db.get_times_by(event=Event.STOP, ascending=True)
+        times_start, times_stop = self._get_day_records()
         if len(times_stop) == 0:
             return None
         if times_start:
-            return self.calc_duration(times_start[1:], times_stop)
-
-    def calc_duration(self, time_1: list[tuple], time_2: list[tuple]) -> timedelta:
-        diff_times = [
-            datetime.strptime(x[0], Format.DATETIME)
-            - datetime.strptime(y[0], Format.DATETIME)
-            for x, y in zip(time_1, time_2)
-        ]
+            return self.calc_duration(islice(times_start, 1, None), times_stop)
 
-        return sum(diff_times, timedelta())
+    def calc_duration(
+        self, time_1: Iterable[EventRecord], time_2: Iterable[EventRecord]
+    ) -> timedelta:
+        return sum((x.value - y.value for x, y in zip(time_1, time_2)), timedelta())
 
-    def create_timestamp(self, event: str, delta: int = 0) -> None:
-        time_stamp = self._calc_time_stamp(delta)
+    def create_timestamp(
+        self, event: str, delta: int = 0, project=None, tags=(), at=None
+    ) -> None:
+        time_stamp = at or self._calc_time_stamp(delta)
         if not self._check_valid_timestamp(time_stamp, event):
             raise Exception("Timestamp collision")
-        time_stamp = time_stamp.strftime(Format.DATETIME)
-        self.db.write_timestamp(event=event, time_stamp=time_stamp)
+        day_total = None
+        if event == Event.STOP:
+            last_start = self.db.get_last_time(Event.START)
+            if last_start:
+                # the stop closes the latest start, the sessions before it are unchanged
+                closed = self._read_closed_worktime()
+                closed += time_stamp - parse_datetime(last_start[0])
+                day_total = int(closed.total_seconds())
+        # one commit for the stop and its day total
+        self.db.write_timestamp(
+            event=event,
+            time_stamp=format_datetime(time_stamp),
+            project=project,
+            tags=tags,
+            day_total=day_total,
+        )
+
+    def calc_closed_worktime(self) -> timedelta:
+        seconds = self.db.get_day_total(self.db.date_today)
+        if seconds is not None:
+            return timedelta(seconds=seconds)
+        closed = self.recalc_closed_worktime()
+        self.db.write_day_total(self.db.date_today, int(closed.total_seconds()))
+        return closed
+
+    def recalc_closed_worktime(self) -> timedelta:
+        times_start, times_stop = self._get_day_records()
+        return self.calc_duration(times_stop, times_start)
+
+    def _get_day_records(self) -> tuple[list[EventRecord], list[EventRecord]]:
+        # one query per day instead of one per event, split by event in time order
+        times_start: list[EventRecord] = []
+        times_stop: list[EventRecord] = []
+        for record in self.db.get_data_by_date(self.db.date_today):
+            (times_start if record.event == Event.START else times_stop).append(record)
+        return times_start, times_stop
+
+    def _read_closed_worktime(self) -> timedelta:
+        # like calc_closed_worktime, without writing
+        seconds = self.db.get_day_total(self.db.date_today)
+        if seconds is None:
+            return self.recalc_closed_worktime()
+        return timedelta(seconds=seconds)
+
+    def calc_worktime_at(self, now: datetime) -> timedelta:
+        # like calc_worktime, for a given moment and without reading every timestamp of the day
+        worktime = self._read_closed_worktime()
+        if not self.check_state_allowed(Event.START):
+            last_start = self.db.get_last_time(Event.START)
+            worktime += now - parse_datetime(last_start[0])
+        return worktime
+
+    def check_day_total(self) -> bool:
+        seconds = self.db.get_day_total(self.db.date_today)
+        if seconds is None:
+            return True
+        return timedelta(seconds=seconds) == self.recalc_closed_worktime()
 
     def _check_valid_timestamp(self, time_stamp: datetime, event: str) -> bool:
-        times = self.db.get_times_by(event=event)
-        if times:
-            latest_time = datetime.strptime(times[0][0], Format.DATETIME)
+        last_time = self.db.get_last_time(event)
+        if last_time:
+            latest_time = parse_datetime(last_time[0])
             return latest_time < time_stamp
         return True
 
@@ -74,15 +135,124 @@ class Timer:
     def _calc_time_stamp(delta: int = 0) -> datetime:
         return datetime.now() - timedelta(minutes=delta)
 
-    def calc_week(self) -> List:
-        week_durations = []
-        current_week = datetime.strptime(self.db.date_today, Format.DATE)
-        for date_delta in range(0, 7):
-            new_date = current_week - timedelta(days=date_delta)
-            self.db.date_today = new_date.strftime(Format.DATE)
-            if current_week.strftime("%V") == new_date.strftime("%V"):
+    def calc_week(self, project=None, offset: int = 0) -> List:
+        day = parse_date(self.db.date_today) - timedelta(weeks=offset)
+        return [
+            (parse_date(date_), duration)
+            for date_, days, duration, _ in self.calc_period(
+                Period.WEEK, Period.DATE, day, project
+            )
+            if days
+        ][::-1]
+
+    def calc_month(self, offset: int = 0, project=None, tag=None) -> List:
+        today = parse_date(self.db.date_today)
+        year, month = divmod(today.year * 12 + today.month - 1 - offset, 12)
+        return self.calc_period(
+            Period.MONTH, Period.WEEK, date(year, month + 1, 1), project, tag
+        )
+
+    def calc_year(self, offset: int = 0, project=None, tag=None) -> List:
+        today = parse_date(self.db.date_today)
+        return self.calc_period(
+            Period.YEAR, Period.MONTH, date(today.year - offset, 1, 1), project, tag
+        )
+
+    def calc_period(
+        self, period: str, group: str, day: date, project=None, tag=None
+    ) -> List:
+        start, end = self.db.get_calendar_span(period, format_date(day))
+        now = format_datetime(self._calc_time_stamp())
+        return [
+            (key, days, timedelta(seconds=seconds), timedelta(seconds=target))
+            for key, days, seconds, target in self.db.get_calendar_totals(
+                start, end, group, project, tag, now
+            )
+        ]
+
+    def calc_labelled_days(
+        self, start: date, end: date, project=None, tag=None
+    ) -> List:
+        return [
+            (parse_date(date_), timedelta(seconds=seconds))
+            for date_, seconds in self.db.get_daily_totals(
+                format_date(start), format_date(end), project, tag
+            )
+        ]
+
+    def calc_project_totals(
+        self, start: date, end: date, project=None, tag=None
+    ) -> List:
+        return [
+            (project_, timedelta(seconds=seconds))
+            for project_, seconds in self.db.get_project_totals(
+                format_date(start), format_date(end), project, tag
+            )
+        ]
+
+    def calc_range(
+        self, start: date, end: date, archive: Optional[Archive] = None
+    ) -> List:
+        durations = []
+        if archive:
+            last_archived = archive.until - timedelta(days=1)
+            durations += archive.calc_days(start, min(end, last_archived))
+            start = max(start, archive.until)
+        today = self.db.date_today
+        try:
+            for (date_,) in self.db.get_dates_between(
+                format_date(start), format_date(end)
+            ):
                 with suppress(Exception):
-                    week_durations.append((new_date, self.calc_worktime()))
-            else:
-                break
-        return week_durations
+                    durations.append(
+                        (parse_date(date_), self._calc_day_worktime(date_, today))
+                    )
+        finally:
+            self.db.date_today = today
+        return durations
+
+    def _calc_day_worktime(self, date_: str, today: str) -> timedelta:
+        self.db.date_today = date_
+        if date_ < today:
+            # a start left open on a past day is dropped, like in the archive
+            return self.recalc_closed_worktime()
+        return self.calc_worktime()
+
+    def calc_balance(self) -> timedelta:
+        today = self.db.date_today
+        current_period = today[:7]
+        checkpoint = self.db.get_last_checkpoint()
+        if checkpoint:
+            period, seconds = checkpoint
+            balance = timedelta(seconds=seconds)
+            start = self._next_period(period)
+        else:
+            balance = timedelta()
+            start = ""
+        period = None
+        try:
+            for (date_,) in self.db.get_dates_between(start, today):
+                if period and period != date_[:7] and period < current_period:
+                    self.db.write_checkpoint(period, int(balance.total_seconds()))
+                period = date_[:7]
+                balance += self._calc_day_balance(date_, today)
+            if period and period < current_period:
+                self.db.write_checkpoint(period, int(balance.total_seconds()))
+        finally:
+            self.db.date_today = today
+        return balance
+
+    def _calc_day_balance(self, date_: str, today: str) -> timedelta:
+        worked = timedelta()
+        with suppress(Exception):
+            # past days only count stopped sessions, so a forgotten stop isn't checkpointed as running until now
+            worked = self._calc_day_worktime(date_, today)
+        # the calendar's target, so holidays count as days off
+        return worked - timedelta(seconds=calendar_day(parse_date(date_))[-1])
+
+    @staticmethod
+    def _next_period(period: str) -> str:
+        year, month = map(int, period.split("-"))
+        if month == 12:
+            return f"{year + 1}-01-01"
+        return f"{year}-{month + 1:02d}-01"
@@ -1,9 +1,9 @@
 from datetime import datetime, timedelta
 from typing import List, Tuple
 from rich.table import Table
-import re
 from os import path
-from constants import File, Format
+from constants import File, InfoText
+from codec import EventRecord, date_of, format_time, is_valid, time_of
 from rich.console import Console
 from rich import print
 
@@ -15,19 +15,23 @@ def db_file_existing() -> bool:
     return path.isfile(f"./{File.NAME}")
 
 
+def archive_file_existing() -> bool:
+    return path.isfile(f"./{File.ARCHIVE}")
+
+
 def output_with_timestamp(text: str, delta: int = 0) -> None:
-    time_stamp = (datetime.now() - timedelta(minutes=delta)).strftime(Format.TIME)
+    time_stamp = format_time(datetime.now() - timedelta(minutes=delta))
     print(f"[{time_stamp}]: " + text)
 
 
 def output_week(timestamps: List[Tuple]) -> None:
     table = Table("Day", "Worktime")
-    hours = []
-    for date_, timestamp in timestamps[::-1]:
-        hours.append(timestamp)
+    overall = timedelta()
+    for date_, timestamp in reversed(timestamps):
+        overall += timestamp
         table.add_row(date_.strftime("%A"), str(timestamp))
     table.add_section()
-    table.add_row("Overall", _format_timedelta(sum(hours, timedelta())))
+    table.add_row("Overall", _format_timedelta(overall))
     console.print(table)
 
 
@@ -38,26 +42,90 @@ def _format_timedelta(timedelta_: timedelta):
     return "{:d}:{:02d}:{:02d}".format(hours, minutes, seconds)
 
 
-def output_day(timestamps: List[Tuple]) -> None:
+def output_report(durations: List[Tuple]) -> None:
+    table = Table("Statistic", "Value")
+    hours = [duration for _, duration in durations]
+    total = sum(hours, timedelta())
+    longest_day, longest = max(durations, key=lambda day: day[1])
+    table.add_row("Days", str(len(durations)))
+    table.add_row("Overall", _format_timedelta(total))
+    table.add_row("Average", _format_timedelta(total / len(durations)))
+    table.add_row("Longest", f"{_format_timedelta(longest)} ({longest_day})")
+    console.print(table)
+
+
+def output_projects(totals: List[Tuple]) -> None:
+    table = Table("Project", "Worktime")
+    for project, duration in totals:
+        table.add_row(project or "-", _format_timedelta(duration))
+    table.add_section()
+    overall = sum((duration for _, duration in totals), timedelta())
+    table.add_row("Overall", _format_timedelta(overall))
+    console.print(table)
+
+
+def output_periods(periods: List[Tuple], name: str) -> None:
+    table = Table(name, "Days", "Worktime", "Target")
+    for period, days, duration, target in periods:
+        table.add_row(
+            period, str(days), _format_timedelta(duration), _format_timedelta(target)
+        )
+    table.add_section()
+    table.add_row(
+        "Overall",
+        str(sum(days for _, days, _, _ in periods)),
+        _format_timedelta(
+            sum((duration for _, _, duration, _ in periods), timedelta())
+        ),
+        _format_timedelta(sum((target for _, _, _, target in periods), timedelta())),
+    )
+    console.print(table)
+
+
+def output_issue(issue: Tuple) -> None:
+    fix = " [dim](fixable)[/dim]" if issue.fixable else ""
+    print(
+        f"{InfoText.WARN_SYMBOL} {issue.date} #{issue.row_id} {issue.time}: {issue.kind}{fix}"
+    )
+
+
+def format_balance(balance: timedelta) -> str:
+    sign = "-" if balance < timedelta() else "+"
+    return sign + _format_timedelta(abs(balance))
+
+
+def output_day(timestamps: List[EventRecord]) -> None:
     table = Table("Index", "Time", "Event")
-    for index, time, event in timestamps:
-        table.add_row(str(index), remove_date_from_date_time(time), event)
+    for record in timestamps:
+        table.add_row(
+            str(record.id), remove_date_from_date_time(record.time), record.event
+        )
+    console.print(table)
+
+
+def output_entries(entries: List[Tuple]) -> None:
+    table = Table("Index", "Timestamp", "Event")
+    for index, time, event in entries:
+        table.add_row(str(index), time, event)
     console.print(table)
 
 
+def read_lines(file: str) -> List[str]:
+    with open(file) as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
 def remove_date_from_date_time(date_time: str) -> str:
-    pattern = r"\d{4}-\d{2}-\d{2}\s"
-    return re.sub(pattern, "", date_time)
+    return time_of(date_time)
 
 
 def remove_time_from_date_time(date_time: str) -> str:
-    pattern = r"\s\d{2}:\d{2}:\d{2}$"
-    return re.sub(pattern, "", date_time)
+    return date_of(date_time)
+
+
+def check_label(name: str) -> bool:
+    return bool(name.strip()) and not any(char in name for char in ",\t\n")
 
 
 def check_correct_date_format(date: str, format: str) -> bool:
-    try:
-        datetime.strptime(date, format)
-    except ValueError:
-        return False
-    return True
+    return is_valid(date, format)